@@ -1,7 +1,7 @@
 # aquest.py
 # External quest data management for Anime RPG
 
-from quests import QuestDatabase
+from quests import Quest, QuestDatabase
 from typing import List
 
 def create_quests_from_data(quest_db: QuestDatabase):
@@ -0,0 +1,227 @@
+# auction.py
+# Player auction house with per-item order books for the Anime RPG
+
+import heapq
+import itertools
+from typing import Dict, List, Optional, Set
+from currency import CurrencyManager, currency_manager
+from inventory import Inventory
+from output import output
+
+BUY, SELL = "buy", "sell"
+
+
+class Order:
+    """A resting bid or ask. Prices are per unit in the order's own currency."""
+    __slots__ = ("order_id", "trader", "item_id", "side", "price", "currency", "quantity",
+                 "gold_price", "escrow", "active")
+
+    def __init__(self, order_id: int, trader: str, item_id: str, side: str, price: float,
+                 currency: str, quantity: int, gold_price: float):
+        self.order_id = order_id  # Also the time priority: lower ids were placed first
+        self.trader = trader
+        self.item_id = item_id
+        self.side = side
+        self.price = price
+        self.currency = currency
+        self.quantity = quantity
+        self.gold_price = gold_price  # Price converted to Gold, used for matching
+        self.escrow = 0.0  # Funds held for a bid, in the order's currency
+        self.active = True
+
+
+class Trade:
+    """A match between a bid and an ask."""
+    __slots__ = ("item_id", "buyer", "seller", "quantity", "gold_price")
+
+    def __init__(self, item_id: str, buyer: str, seller: str, quantity: int, gold_price: float):
+        self.item_id = item_id
+        self.buyer = buyer
+        self.seller = seller
+        self.quantity = quantity
+        self.gold_price = gold_price
+
+    def __repr__(self):
+        return f"Trade({self.buyer} <- {self.seller}: {self.quantity}x {self.item_id} @ {self.gold_price:.2f}G)"
+
+
+class OrderBook:
+    """
+    Bids in a max-heap and asks in a min-heap, both keyed by (Gold price, order id)
+    for price-time priority. Cancelled or filled orders are dropped lazily.
+    """
+    def __init__(self, item_id: str):
+        self.item_id = item_id
+        self.bids: List[tuple] = []  # (-gold_price, order_id, order)
+        self.asks: List[tuple] = []  # (gold_price, order_id, order)
+
+    def add(self, order: Order):
+        if order.side == BUY:
+            heapq.heappush(self.bids, (-order.gold_price, order.order_id, order))
+        else:
+            heapq.heappush(self.asks, (order.gold_price, order.order_id, order))
+
+    @staticmethod
+    def _top(heap: List[tuple]) -> Optional[Order]:
+        while heap and not heap[0][2].active:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def best_bid(self) -> Optional[Order]:
+        return self._top(self.bids)
+
+    def best_ask(self) -> Optional[Order]:
+        return self._top(self.asks)
+
+
+class AuctionHouse:
+    """
+    Collects orders from registered traders and matches them in a batch each tick.
+    Sellers' items and buyers' funds are held in escrow while orders rest, and
+    trades settle across currencies through the CurrencyManager rates.
+    """
+    def __init__(self, currencies: CurrencyManager = currency_manager):
+        self.currencies = currencies
+        self.books: Dict[str, OrderBook] = {}
+        self.orders: Dict[int, Order] = {}
+        self.inventories: Dict[str, Inventory] = {}
+        self.wallets: Dict[str, Dict[str, float]] = {}  # trader: {currency: balance}
+        self._ids = itertools.count(1)
+        self._dirty: Set[str] = set()
+
+    def register_trader(self, name: str, inventory: Inventory, wallet: Dict[str, float]):
+        self.inventories[name] = inventory
+        self.wallets[name] = wallet
+
+    def _to_gold(self, amount: float, currency: str) -> float:
+        return amount * self.currencies.get_exchange_rate(currency, "Gold")
+
+    def _from_gold(self, amount: float, currency: str) -> float:
+        return amount * self.currencies.get_exchange_rate("Gold", currency)
+
+    def place_order(self, trader: str, item_id: str, side: str, price: float, quantity: int,
+                    currency: str = "Gold") -> Optional[Order]:
+        """Escrow the goods or funds and queue the order for the next matching pass."""
+        if quantity <= 0 or price <= 0:
+            output.emit(f"Orders need a positive quantity and price, got {quantity}x at {price}.",
+                        "auction_rejected", trader=trader, item_id=item_id)
+            return None
+        if side == SELL:
+            if not self.inventories[trader].remove_item(item_id, quantity):
+                output.emit(f"{trader} does not have {quantity}x {item_id} to sell.",
+                            "auction_rejected", trader=trader, item_id=item_id)
+                return None
+        else:
+            wallet = self.wallets[trader]
+            cost = price * quantity
+            if wallet.get(currency, 0) < cost:
+                output.emit(f"{trader} cannot afford {quantity}x {item_id}.",
+                            "auction_rejected", trader=trader, item_id=item_id)
+                return None
+            if not self.inventories[trader].can_add(item_id, quantity):
+                output.emit(f"{trader} has no room for {quantity}x {item_id}.",
+                            "auction_rejected", trader=trader, item_id=item_id)
+                return None
+            wallet[currency] -= cost
+
+        order = Order(next(self._ids), trader, item_id, side, price, currency, quantity,
+                      self._to_gold(price, currency))
+        if side == BUY:
+            order.escrow = price * quantity
+        self.orders[order.order_id] = order
+        book = self.books.get(item_id)
+        if book is None:
+            book = self.books[item_id] = OrderBook(item_id)
+        book.add(order)
+        self._dirty.add(item_id)
+        return order
+
+    def cancel_order(self, order_id: int):
+        order = self.orders.pop(order_id, None)
+        if not order or not order.active:
+            return
+        order.active = False
+        self._refund(order)
+
+    def _refund(self, order: Order):
+        if order.side == SELL:
+            self.inventories[order.trader].add_item(order.item_id, order.quantity)
+        else:
+            wallet = self.wallets[order.trader]
+            wallet[order.currency] = wallet.get(order.currency, 0) + order.escrow
+            order.escrow = 0.0
+
+    def _settle(self, bid: Order, ask: Order, quantity: int, gold_price: float):
+        gold_total = gold_price * quantity
+        # Buyer pays from escrow in their currency; anything left stays escrowed for the rest of the bid
+        bid.escrow -= self._from_gold(gold_total, bid.currency)
+        seller_wallet = self.wallets[ask.trader]
+        seller_wallet[ask.currency] = seller_wallet.get(ask.currency, 0) + self._from_gold(gold_total, ask.currency)
+        self.inventories[bid.trader].add_item(bid.item_id, quantity)
+        for order in (bid, ask):
+            order.quantity -= quantity
+            if order.quantity == 0:
+                order.active = False
+                del self.orders[order.order_id]
+        if not bid.active and bid.escrow > 1e-9:
+            # Filled below the bid price: return the difference
+            self._refund(bid)
+
+    def match_book(self, book: OrderBook) -> List[Trade]:
+        trades = []
+        while True:
+            bid, ask = book.best_bid(), book.best_ask()
+            if not bid or not ask or bid.gold_price < ask.gold_price:
+                break
+            quantity = min(bid.quantity, ask.quantity)
+            if not self.inventories[bid.trader].can_add(bid.item_id, quantity):
+                # The buyer's bag filled up while the bid rested: drop the bid before anyone is paid
+                output.emit(f"{bid.trader} has no room left for {bid.item_id}; their bid is cancelled.",
+                            "bid_cancelled", trader=bid.trader, item_id=bid.item_id, order_id=bid.order_id)
+                self.cancel_order(bid.order_id)
+                continue
+            # The order that was resting first sets the price
+            gold_price = bid.gold_price if bid.order_id < ask.order_id else ask.gold_price
+            self._settle(bid, ask, quantity, gold_price)
+            trades.append(Trade(book.item_id, bid.trader, ask.trader, quantity, gold_price))
+        return trades
+
+    def tick(self) -> List[Trade]:
+        """Batch-match every order book that received orders since the last tick."""
+        trades = []
+        dirty, self._dirty = self._dirty, set()
+        for item_id in dirty:
+            trades.extend(self.match_book(self.books[item_id]))
+        return trades
+
+auction_house = AuctionHouse()
+
+# Load test
+if __name__ == "__main__":
+    import random
+    import time
+
+    random.seed(12)
+    house = AuctionHouse()
+    traders = [f"trader_{i}" for i in range(500)]
+    items = [f"item_{i}" for i in range(50)]
+    for name in traders:
+        bag = Inventory()
+        for item_id in items:
+            bag.add_item(item_id, 1000)
+        house.register_trader(name, bag, {"Gold": 1e9, "Silver": 1e9, "Platinum": 1e9})
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        side = random.choice((BUY, SELL))
+        currency = random.choice(("Gold", "Silver", "Platinum"))
+        gold_price = random.gauss(100, 10) + (3 if side == BUY else -3)
+        price = round(gold_price * currency_manager.get_exchange_rate("Gold", currency), 2)
+        house.place_order(random.choice(traders), random.choice(items), side, price, random.randint(1, 20), currency)
+    placed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    trades = house.tick()
+    matched = time.perf_counter() - start
+    print(f"Placed 10k orders in {placed:.3f}s; matched {len(trades)} trades in {matched:.3f}s "
+          f"({len(trades) / matched:,.0f} matches/s), {len(house.orders)} orders still resting")
@@ -0,0 +1,215 @@
+# balance.py
+# Monte Carlo balance sweeps over enemy templates and level scaling for the Anime RPG
+
+import csv
+import multiprocessing
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from character import PlayerCharacter
+from enemies import EnemyFactory, enemy_factory, register_all_enemies
+from items import item_registry, register_all_items
+from output import NullSink, output
+
+# Assumed pacing used to turn rewards into per-minute rates
+SECONDS_PER_TURN = 3.0
+SECONDS_BETWEEN_BATTLES = 15.0
+MAX_TURNS = 500  # Battles still running after this many turns count as losses
+
+# (hp, attack, defense, speed)
+Stats = Tuple[int, int, int, int]
+
+CSV_FIELDS = ("player_level", "enemy_template", "enemy_level", "win_prob", "expected_turns",
+              "exp_per_min", "gold_per_min", "loot_value_per_min")
+
+
+def fight(player: Stats, enemy: Stats, rng: random.Random, variance: float = 0.0,
+          abilities: Tuple[str, ...] = (), items: Optional[Dict[str, int]] = None) -> Tuple[bool, int]:
+    """
+    One battle with the same rules as enemies.simulate_battle: the faster side
+    (the player on ties) strikes first, enemy defense lets at least 1 damage
+    through and player defense can absorb a hit completely. `variance` spreads
+    each hit uniformly by +/- that fraction. Given the enemy's special
+    `abilities` (function names) or carried `items`, each enemy turn is chosen
+    by the enemy_ai scoring, as in simulate_battle(..., enemy_ai), with the
+    effects modelled in SPECIAL_ABILITY_MODELS and ITEM_MODELS; otherwise the
+    enemy only attacks. Returns (player won, turns).
+    """
+    p_hp, p_atk, p_def, p_speed = player
+    e_hp, e_atk, e_def, e_speed = enemy
+    e_max = e_hp
+    player_first = p_speed >= e_speed
+    if variance:
+        low, high = 1 - variance, 1 + variance
+        uniform = rng.uniform
+    tactics = bool(abilities or items)
+    if tactics:
+        from enemy_ai import ITEM_MODELS, best_action  # enemy_ai imports estimator, which imports this module
+        from estimator import SPECIAL_ABILITY_MODELS
+        items = dict(items or {})
+        usable = tuple(item_id for item_id, count in items.items() if count > 0 and item_id in ITEM_MODELS)
+    for turn in range(1, MAX_TURNS + 1):
+        for player_turn in ((True, False) if player_first else (False, True)):
+            if player_turn:
+                hit = round(p_atk * uniform(low, high)) if variance else p_atk
+                e_hp -= max(1, hit - e_def)
+                if e_hp <= 0:
+                    return True, turn
+            else:
+                hit = round(e_atk * uniform(low, high)) if variance else e_atk
+                if tactics:
+                    action = best_action((e_hp, e_max, e_atk, abilities, usable, p_hp, p_def))
+                    if action in ITEM_MODELS:
+                        items[action] -= 1
+                        if not items[action]:
+                            usable = tuple(item_id for item_id in usable if item_id != action)
+                        kind, amount = ITEM_MODELS[action]
+                    else:
+                        kind, amount = SPECIAL_ABILITY_MODELS.get(action, ("damage", 0))
+                    if kind == "heal":
+                        e_hp = min(e_max, e_hp + amount)
+                        continue
+                    hit += amount
+                p_hp -= max(0, hit - p_def)
+                if p_hp <= 0:
+                    return False, turn
+    return False, MAX_TURNS
+
+
+def player_stats(level: int) -> Stats:
+    """Stats of an unequipped PlayerCharacter at a level, taken from the real level-up rules."""
+    character = PlayerCharacter("Probe", "Adventurer")
+    with output.use(NullSink()):
+        for _ in range(level - 1):
+            character.level_up()
+    stats = character.base_stats
+    return stats['HP'], stats['Attack'], stats['Defense'], stats['Speed']
+
+
+def expected_loot_value(loot_table: Dict[str, float]) -> float:
+    """Average Gold value of one drop_loot() call."""
+    total = 0.0
+    for item_id, chance in loot_table.items():
+        item = item_registry.get_item(item_id)
+        if item:
+            total += min(chance, 1.0) * item.value
+    return total
+
+
+def _simulate_row(task: tuple) -> List[tuple]:
+    """Worker: every player level against one (template, enemy level) cell."""
+    (template_id, enemy_level, enemy, abilities, items, exp_reward, gold_reward, loot_value, players, trials,
+     seed, variance) = task
+    rng = random.Random(seed)
+    rows = []
+    # Without variance every trial of a matchup plays out identically
+    runs = trials if variance else 1
+    for player_level, stats in players:
+        wins = turns_total = 0
+        for _ in range(runs):
+            won, turns = fight(stats, enemy, rng, variance, abilities, items)
+            wins += won
+            turns_total += turns
+        win_prob = wins / runs
+        turns = turns_total / runs
+        minutes = (turns * SECONDS_PER_TURN + SECONDS_BETWEEN_BATTLES) / 60
+        rows.append((player_level, template_id, enemy_level, win_prob, turns,
+                     win_prob * exp_reward / minutes, win_prob * gold_reward / minutes,
+                     win_prob * loot_value / minutes))
+    return rows
+
+
+class BalanceSweep:
+    """
+    Sweeps player level x enemy template x enemy level. Enemies are built by
+    the real EnemyFactory so its level scaling is what gets measured; the
+    battles themselves run in the headless fight() core across processes.
+    Enemies use their specials and potions as enemy_ai would unless
+    `attack_only` is set.
+    """
+    def __init__(self, factory: EnemyFactory = enemy_factory, trials: int = 200, variance: float = 0.1,
+                 seed: int = 0, attack_only: bool = False):
+        self.factory = factory
+        self.trials = trials
+        self.variance = variance
+        self.seed = seed
+        self.attack_only = attack_only
+
+    def tasks(self, player_levels: Iterable[int], templates: Sequence[str], enemy_levels: Iterable[int]) -> List[tuple]:
+        players = [(level, player_stats(level)) for level in player_levels]
+        tasks = []
+        for template_id in templates:
+            for enemy_level in enemy_levels:
+                enemy = self.factory.create_enemy(template_id, enemy_level)
+                if self.attack_only:
+                    abilities, items = (), {}
+                else:
+                    abilities, items = tuple(a.__name__ for a in enemy.special_abilities), dict(enemy.items)
+                tasks.append((template_id, enemy_level, (enemy.max_hp, enemy.atk, enemy.defense, enemy.speed),
+                              abilities, items, enemy.exp_reward, enemy.gold_reward, expected_loot_value(enemy.loot_table), players,
+                              self.trials, f"{self.seed}:{template_id}:{enemy_level}", self.variance))
+        return tasks
+
+    def run(self, player_levels: Iterable[int], templates: Optional[Sequence[str]] = None,
+            enemy_levels: Iterable[int] = range(1, 61), workers: Optional[int] = None) -> List[tuple]:
+        templates = list(templates or self.factory.enemy_templates)
+        tasks = self.tasks(list(player_levels), templates, list(enemy_levels))
+        if workers == 1:
+            chunks = map(_simulate_row, tasks)
+            return [row for chunk in chunks for row in chunk]
+        chunksize = max(1, len(tasks) // ((workers or multiprocessing.cpu_count()) * 8))
+        with multiprocessing.Pool(workers) as pool:
+            chunks = pool.map(_simulate_row, tasks, chunksize=chunksize)
+        return [row for chunk in chunks for row in chunk]
+
+
+def write_csv(filepath: str, rows: Iterable[tuple]):
+    with open(filepath, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows(rows)
+
+
+def write_npz(filepath: str, rows: List[tuple]):
+    """Column arrays for plotting; needs NumPy, which the game itself does not."""
+    try:
+        import numpy
+    except ImportError:
+        print("NumPy is not installed; write a .csv file instead.")
+        return
+    columns = list(zip(*rows)) if rows else [()] * len(CSV_FIELDS)
+    numpy.savez(filepath, **{name: numpy.array(column) for name, column in zip(CSV_FIELDS, columns)})
+
+
+def parse_range(text: str) -> range:
+    """'1-50' or '7' as an inclusive range of levels."""
+    low, _, high = text.partition("-")
+    return range(int(low), int(high or low) + 1)
+
+# Balance sweep from the command line
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Monte Carlo balance sweep over enemy templates and levels.")
+    parser.add_argument("--player-levels", type=parse_range, default=parse_range("1-50"))
+    parser.add_argument("--enemy-levels", type=parse_range, default=parse_range("1-60"))
+    parser.add_argument("--templates", nargs="*", help="enemy template ids (default: all registered)")
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--variance", type=float, default=0.1, help="damage spread per hit, as a fraction")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--attack-only", action="store_true", help="enemies never use specials or potions")
+    parser.add_argument("--out", default="balance.csv", help=".csv, or .npz for NumPy arrays")
+    args = parser.parse_args()
+
+    register_all_items()
+    register_all_enemies()
+    sweep = BalanceSweep(trials=args.trials, variance=args.variance, seed=args.seed, attack_only=args.attack_only)
+    start = time.perf_counter()
+    rows = sweep.run(args.player_levels, args.templates, args.enemy_levels, args.workers)
+    elapsed = time.perf_counter() - start
+    if args.out.endswith(".npz"):
+        write_npz(args.out, rows)
+    else:
+        write_csv(args.out, rows)
+    print(f"{len(rows):,} cells x {args.trials} trials in {elapsed:.1f}s -> {args.out}")
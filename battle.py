@@ -0,0 +1,318 @@
+# battle.py
+# Initiative-queue battle engine for parties against enemy groups in the Anime RPG
+
+import heapq
+import itertools
+import random
+from typing import Dict, List, Optional, Sequence
+from character import PlayerCharacter, Skill, StatusEffect
+from enemies import STATUS_STATS, Enemy
+from metrics import timed
+from output import output
+from profiler import profiler
+from skills import skill_registry
+
+# A combatant with speed s acts every ACTION_DELAY / s time units
+ACTION_DELAY = 100.0
+MAX_ACTIONS = 100_000  # Battles still running after this many actions end in a draw
+
+# Targeting rules a combatant's `ai` can name
+TARGETING = ("weakest", "random")
+
+PARTY, ENEMIES = 0, 1
+
+
+class Combatant:
+    """
+    A PlayerCharacter or Enemy taking part in a Battle: which side it is on,
+    how it picks targets, and the status effects it picked up in this battle.
+    """
+    __slots__ = ("unit", "side", "is_player", "ai", "skills", "statuses", "index", "version")
+
+    def __init__(self, unit, side: int, ai: str):
+        if ai not in TARGETING:
+            raise ValueError(f"Unknown targeting rule: {ai}")
+        self.unit = unit
+        self.side = side
+        self.is_player = isinstance(unit, PlayerCharacter)
+        self.ai = ai
+        # Offensive skills, strongest first, so the first affordable one is the pick
+        skills = [skill for skill in getattr(unit, "skills", ()) if skill.damage > 0 or skill.effect]
+        self.skills: List[Skill] = sorted(skills, key=lambda skill: skill.damage, reverse=True)
+        self.statuses: List[StatusEffect] = []
+        self.index = -1  # Position in its side's alive list, -1 once defeated
+        self.version = 0  # Bumped on every HP change so stale HP heap entries can be skipped
+
+    @property
+    def name(self) -> str:
+        return self.unit.name
+
+    @property
+    def hp(self) -> int:
+        return self.unit.current_stats['HP'] if self.is_player else self.unit.hp
+
+    @property
+    def speed(self) -> int:
+        return max(1, self.unit.speed)
+
+
+class Battle:
+    """
+    A fight between a party and an enemy group of any size.
+
+    Turn order comes from an initiative queue, a heap of (next action time,
+    order, combatant): each combatant acts again ACTION_DELAY / speed after its
+    previous action, so a faster combatant acts more often rather than just
+    first. Equal times go to whoever was queued first, the party before the
+    enemies. Defeated combatants are dropped when they come up.
+
+    Targets are chosen per combatant: "weakest" takes the opposing member with
+    the least HP from that side's HP heap, "random" picks from its alive list.
+    An action is one pop and one push on the queue plus at most a few HP heap
+    updates, so it costs O(log n) in the number of combatants.
+
+    With `tactics`, enemies due at the same moment act as a volley: they pick
+    targets and decide together in one decide_many call, which scores each
+    distinct state once, then act in queue order. An enemy whose target fell
+    earlier in the volley picks a new one and decides alone.
+    """
+    def __init__(self, party: Sequence[PlayerCharacter], enemies: Sequence[Enemy],
+                 rng: Optional[random.Random] = None, special_chance: float = 0.3,
+                 party_ai: str = "weakest", enemy_ai: str = "random", tactics=None):
+        self.rng = rng or random.Random()
+        self.special_chance = special_chance
+        self.tactics = tactics  # An enemy_ai.EnemyAI choosing enemy actions; random specials without one
+        self.combatants = ([Combatant(unit, PARTY, party_ai) for unit in party],
+                           [Combatant(unit, ENEMIES, enemy_ai) for unit in enemies])
+        self.alive: tuple = ([], [])
+        self.hp_heaps: tuple = ([], [])
+        self.queue: List[tuple] = []
+        self._order = itertools.count()
+        self.time = 0.0
+        self.actions = 0
+        self._by_unit = {id(c.unit): c for side in self.combatants for c in side}
+        for side in self.combatants:
+            for combatant in side:
+                if combatant.hp > 0:
+                    alive = self.alive[combatant.side]
+                    combatant.index = len(alive)
+                    alive.append(combatant)
+                    self._track(combatant)
+                    self._schedule(combatant, ACTION_DELAY / combatant.speed)
+
+    def _schedule(self, combatant: Combatant, at: float):
+        heapq.heappush(self.queue, (at, next(self._order), combatant))
+
+    def _track(self, combatant: Combatant):
+        """Record a combatant's new HP, removing it from the fight at 0."""
+        combatant.version += 1
+        if combatant.hp <= 0:
+            if combatant.index >= 0:
+                self._remove(combatant)
+            return
+        heap, alive = self.hp_heaps[combatant.side], self.alive[combatant.side]
+        if len(heap) > 4 * len(alive) + 16:
+            # Mostly stale entries: rebuild from the living, amortized O(1) per push
+            heap[:] = [(c.hp, next(self._order), c.version, c) for c in alive]
+            heapq.heapify(heap)
+        else:
+            heapq.heappush(heap, (combatant.hp, next(self._order), combatant.version, combatant))
+
+    def _remove(self, combatant: Combatant):
+        alive = self.alive[combatant.side]
+        last = alive.pop()
+        if last is not combatant:
+            alive[combatant.index] = last
+            last.index = combatant.index
+        combatant.index = -1
+
+    def _target(self, actor: Combatant) -> Combatant:
+        foes = 1 - actor.side
+        if actor.ai == "weakest":
+            heap = self.hp_heaps[foes]
+            while True:
+                _, _, version, target = heap[0]
+                if version == target.version and target.index >= 0:
+                    return target
+                heapq.heappop(heap)
+        alive = self.alive[foes]
+        return alive[self.rng.randrange(len(alive))]
+
+    def _apply_status(self, target: Combatant, status: StatusEffect):
+        # Ad hoc skills share one StatusEffect instance, so every target ticks down its own copy
+        if output.enabled:
+            output.emit(f"{target.name} is now affected by {status.name}!", "status", target=target.name,
+                        status=status.name)
+        target.statuses.append(StatusEffect(status.name, status.duration, dict(status.effect)))
+
+    def _on_status(self, unit, status: StatusEffect):
+        """on_status hook for registry casts: the battle keeps and ticks the recipient's statuses."""
+        self._apply_status(self._by_unit[id(unit)], status)
+
+    def _tick_statuses(self, combatant: Combatant):
+        unit = combatant.unit
+        remaining = []
+        for status in combatant.statuses:
+            for stat, value in status.effect.items():
+                if combatant.is_player:
+                    if stat in unit.current_stats:
+                        unit.current_stats[stat] = max(0, unit.current_stats[stat] - value)
+                elif stat in STATUS_STATS:
+                    attr = STATUS_STATS[stat]
+                    setattr(unit, attr, max(0, getattr(unit, attr) - value))
+            if output.enabled:
+                output.emit(f"{combatant.name} suffers from {status.name}! HP left: {combatant.hp}", "status_tick",
+                            target=combatant.name, status=status.name, hp=combatant.hp)
+            if not status.tick():
+                remaining.append(status)
+        combatant.statuses = remaining
+        self._track(combatant)
+
+    def _act(self, actor: Combatant, target: Combatant):
+        unit = actor.unit
+        if actor.is_player:
+            mp = unit.current_stats['MP']
+            for skill in actor.skills:
+                if skill.mana_cost <= mp and skill.cast:
+                    # Registry skills hand their statuses back so the battle ticks them
+                    skill.cast(unit, target.unit, self._on_status)
+                    self._track(actor)  # Self-targeted damage or heals change the caster's HP
+                    break
+                if skill.mana_cost <= mp:
+                    # Ad hoc skills, not via use_skill: enemies have no apply_status
+                    unit.current_stats['MP'] = mp - skill.mana_cost
+                    if output.enabled:
+                        output.emit(f"{actor.name} used {skill.name} on {target.name}!", "skill", caster=actor.name,
+                                    skill=skill.name, target=target.name)
+                    target.unit.take_damage(skill.damage)
+                    if skill.effect and target.hp > 0:
+                        self._apply_status(target, skill.effect)
+                    break
+            else:
+                unit.attack(target.unit)
+        elif unit.special_abilities and self.rng.random() < self.special_chance:
+            self.rng.choice(unit.special_abilities)(unit, target.unit)
+            self._track(actor)  # heal_self changes the caster's HP
+        else:
+            unit.attack_target(target.unit)
+        self._track(target)
+
+    def step(self) -> bool:
+        """Run the next combatant's action; False once either side has been wiped out."""
+        if not self.alive[PARTY] or not self.alive[ENEMIES]:
+            return False
+        while True:
+            at, _, actor = heapq.heappop(self.queue)
+            if actor.index >= 0:
+                break
+        self.time = at
+        self.actions += 1
+        with profiler.action("battle_turn"):
+            if self.tactics and actor.side == ENEMIES:
+                self._volley(actor, at)
+            else:
+                if actor.statuses:
+                    self._tick_statuses(actor)
+                if actor.index >= 0:
+                    self._act(actor, self._target(actor))
+                    if actor.index >= 0:  # A caster can fall to its own skill
+                        self._schedule(actor, at + ACTION_DELAY / actor.speed)
+            output.flush()
+        return bool(self.alive[PARTY] and self.alive[ENEMIES])
+
+    def _volley(self, first: Combatant, at: float):
+        """Every enemy due at `at` decides through the tactics in one batch, then acts."""
+        volley = [first]
+        queue = self.queue
+        while queue and queue[0][0] == at and queue[0][2].side == ENEMIES:
+            actor = heapq.heappop(queue)[2]
+            if actor.index >= 0:
+                volley.append(actor)
+                self.actions += 1
+        ready = []
+        for actor in volley:
+            if actor.statuses:
+                self._tick_statuses(actor)
+            if actor.index >= 0:
+                ready.append(actor)
+        targets = [self._target(actor) for actor in ready]
+        decisions = self.tactics.decide_many([(actor.unit, target.unit) for actor, target in zip(ready, targets)])
+        for actor, target, action in zip(ready, targets, decisions):
+            if self.alive[PARTY]:
+                if target.index < 0:
+                    target, action = self._target(actor), None
+                self.tactics.act(actor.unit, target.unit, action)
+                self._track(actor)  # Heals and potions change the actor's HP
+                self._track(target)
+            self._schedule(actor, at + ACTION_DELAY / actor.speed)
+
+    def winner(self) -> Optional[str]:
+        if self.alive[PARTY] and not self.alive[ENEMIES]:
+            return "party"
+        if self.alive[ENEMIES] and not self.alive[PARTY]:
+            return "enemies"
+        return None
+
+    @timed("party_battle_seconds")
+    def run(self, max_actions: int = MAX_ACTIONS) -> Dict:
+        """Fight until one side is down (or `max_actions` runs out) and summarize the result."""
+        output.emit(f"Battle Start! {len(self.alive[PARTY])} heroes against {len(self.alive[ENEMIES])} enemies.",
+                    "battle_start", party=len(self.alive[PARTY]), enemies=len(self.alive[ENEMIES]))
+        while self.actions < max_actions and self.step():
+            pass
+        winner = self.winner()
+        if winner == "party":
+            output.emit("The party is victorious!", "victory")
+        elif winner == "enemies":
+            output.emit("The party has fallen...", "defeat")
+        else:
+            output.emit("The battle ends in a stalemate.", "stalemate")
+        output.flush()
+        return {
+            "winner": winner,
+            "actions": self.actions,
+            "time": self.time,
+            "party_left": len(self.alive[PARTY]),
+            "enemies_left": len(self.alive[ENEMIES]),
+        }
+
+
+def simulate_party_battle(party: Sequence[PlayerCharacter], enemies: Sequence[Enemy],
+                          rng: Optional[random.Random] = None, **options) -> Dict:
+    return Battle(party, enemies, rng, **options).run()
+
+# Sample party and 50v50 benchmark
+def make_party(size: int, level: int = 8) -> List[PlayerCharacter]:
+    fireball, poison_dart = skill_registry.get_skill("fireball"), skill_registry.get_skill("poison_dart")
+    party = []
+    for i in range(size):
+        hero = PlayerCharacter(f"Hero {i + 1}", "Mage" if i % 2 else "Warrior")
+        for _ in range(level - 1):
+            hero.level_up()
+        hero.current_stats['HP'], hero.current_stats['MP'] = hero.max_hp, hero.max_mp
+        hero.skills = [fireball, poison_dart] if i % 2 else [poison_dart]
+        party.append(hero)
+    return party
+
+if __name__ == "__main__":
+    import time
+    from enemies import enemy_factory, register_all_enemies
+    from output import NullSink
+
+    register_all_enemies()
+    result = simulate_party_battle(make_party(3), [enemy_factory.create_enemy("goblin", 2) for _ in range(3)],
+                                   random.Random(1))
+    print(result)
+
+    for size in (10, 50, 200):
+        rng = random.Random(size)
+        with output.use(NullSink()):
+            battles = [Battle(make_party(size), [enemy_factory.create_enemy("goblin", rng.randint(1, 3))
+                                                for _ in range(size)], random.Random(i)) for i in range(5)]
+            start = time.perf_counter()
+            results = [battle.run() for battle in battles]
+            elapsed = time.perf_counter() - start
+        actions = sum(r["actions"] for r in results)
+        wins = sum(r["winner"] == "party" for r in results)
+        print(f"{size}v{size}: {len(battles)} battles, {actions:,} actions, party won {wins}, "
+              f"{elapsed / actions * 1e6:.2f} us per action")
@@ -0,0 +1,335 @@
+# benchmarks.py
+# Benchmark suite for the Anime RPG's hot paths
+#
+#   python benchmarks.py                  run everything, compare against the saved baseline
+#   python benchmarks.py --save           run and store the results as the new baseline
+#   python benchmarks.py -k shop -k quest only run benchmarks whose name contains a filter
+#
+# Every benchmark builds its fixtures from a fixed seed, so runs are repeatable.
+# The exit code is 1 when any benchmark is slower than its baseline by more than
+# the threshold (20% by default).
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+from battle import Battle
+from character import Player
+from crafting import RecipeBook
+from currency import Currency, CurrencyManager
+from enemies import Enemy, EnemyFactory, simulate_battle
+from inventory import Inventory
+from items import CraftingRecipe, Item, ItemRegistry, item_registry
+from output import NullSink, output
+from quests import Quest, QuestDatabase
+from shop import Shop, ShopItem
+from skills import skill_registry
+
+SEED = 1337
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+RARITIES = ("Common", "Rare", "Epic", "Legendary")
+
+# name: setup function returning (run, operations per run), optionally followed by a
+# cleanup that undoes changes to shared state (such as the global item registry) after the run
+BENCHMARKS: Dict[str, Callable[[], tuple]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    def decorator(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+# Fixtures
+def make_items(count: int) -> list:
+    return [Item(item_id=f"item_{i}", name=f"Item {i}", description="Generated item.",
+                 item_type=random.choice(("consumable", "equipment", "material")),
+                 rarity=random.choices(RARITIES, weights=(70, 20, 8, 2))[0],
+                 usable_in_battle=True, usable_outside_battle=True,
+                 value=random.randint(1, 1000), weight=random.random())
+            for i in range(count)]
+
+
+def make_enemy(enemy_id: str, level: int, loot_size: int = 5) -> Enemy:
+    return Enemy(enemy_id=enemy_id, name=f"Monster {enemy_id}", level=level, max_hp=20 + level * 12,
+                 atk=6 + level * 3, defense=level, speed=random.randint(1, 10),
+                 exp_reward=level * 10, gold_reward=level * 5,
+                 loot_table={f"item_{random.randrange(5000)}": random.random() for _ in range(loot_size)})
+
+
+def make_player(name: str = "Bench") -> Player:
+    player = Player(name)
+    player.inventory.max_slots = None
+    return player
+
+
+# Benchmarks
+@benchmark("enemy_spawn")
+def bench_enemy_spawn():
+    factory = EnemyFactory()
+    for i in range(200):
+        factory.register_template(make_enemy(f"template_{i}", random.randint(1, 50)))
+    requests = [(f"template_{random.randrange(200)}", random.randint(1, 60)) for _ in range(10_000)]
+
+    def run():
+        for enemy_id, level in requests:
+            factory.create_enemy(enemy_id, level)
+    return run, len(requests)
+
+
+@benchmark("simulate_battle")
+def bench_simulate_battle():
+    fights = [(make_player(f"Hero {i}"), make_enemy(f"foe_{i}", random.randint(1, 5))) for i in range(300)]
+
+    def run():
+        for player, enemy in fights:
+            simulate_battle(player, enemy)
+    return run, len(fights)
+
+
+@benchmark("party_battle_50v50")
+def bench_party_battle():
+    fireball, poison_dart = skill_registry.get_skill("fireball"), skill_registry.get_skill("poison_dart")
+    battles = []
+    for b in range(4):
+        party = [make_player(f"Hero {b}-{i}") for i in range(50)]
+        for hero in party:
+            hero.skills = [fireball, poison_dart]
+        enemies = [make_enemy(f"horde_{b}_{i}", random.randint(1, 3)) for i in range(50)]
+        battles.append(Battle(party, enemies, random.Random(SEED + b)))
+
+    def run():
+        for battle in battles:
+            battle.run()
+    return run, len(battles)
+
+
+@benchmark("skill_cast")
+def bench_skill_cast():
+    caster, target = make_player("Caster"), make_player("Target")
+    skill_ids = [skill.skill_id for skill in skill_registry.get_all_skills()]
+    casts = [random.choice(skill_ids) for _ in range(10_000)]
+
+    def run():
+        caster.current_stats['MP'] = target.current_stats['HP'] = 10 ** 9
+        for skill_id in casts:
+            skill_registry.get_skill(skill_id).cast(caster, target)
+    return run, len(casts)
+
+
+@benchmark("drop_loot")
+def bench_drop_loot():
+    enemies = [make_enemy(f"looter_{i}", 10, loot_size=50) for i in range(100)]
+
+    def run():
+        for _ in range(200):
+            for enemy in enemies:
+                enemy.drop_loot()
+    return run, 200 * len(enemies)
+
+
+@benchmark("item_registry_lookup")
+def bench_item_registry_lookup():
+    registry = ItemRegistry()
+    for item in make_items(50_000):
+        registry.register_item(item)
+    # One lookup in ten misses
+    keys = [f"item_{random.randrange(55_000)}" for _ in range(200_000)]
+
+    def run():
+        get_item = registry.get_item
+        for key in keys:
+            get_item(key)
+    return run, len(keys)
+
+
+@benchmark("crafting")
+def bench_crafting():
+    # Ten tiers, each crafted from the tier below plus a raw material
+    book = RecipeBook()
+    for tier in range(1, 11):
+        book.add_recipe(CraftingRecipe(f"tier_{tier}", {f"tier_{tier - 1}": 2, f"ore_{tier}": 1}))
+    inventory = Inventory()
+    inventory.add_item("tier_0", 2 ** 10 * 50)
+    for tier in range(1, 11):
+        inventory.add_item(f"ore_{tier}", 2 ** (10 - tier) * 50)
+    recipe = book.get_recipe("tier_10")
+
+    def run():
+        book.max_craftable("tier_10", inventory.get_all_items())
+        for _ in range(50):
+            book.craft_many(recipe, 1, inventory)
+    return run, 51
+
+
+@benchmark("shop_purchase")
+def bench_shop_purchase():
+    # Shop and Inventory look items up in the global registry, so register there and put it back afterwards
+    items = make_items(500)
+    replaced = {item.item_id: item_registry.get_item(item.item_id) for item in items}
+    for item in items:
+        item_registry.register_item(item)
+    stock = [ShopItem(item.item_id, price=random.randint(1, 100), quantity=10 ** 6,
+                      currency=random.choice(("Gold", "Silver", "Platinum"))) for item in items]
+    shop = Shop(name="Bench Shop", stock=stock, currency="Gold")
+    player = make_player()
+    for currency in ("Gold", "Silver", "Platinum"):
+        player.set_currency_balance(currency, 10 ** 9)
+    purchases = [random.choice(items).item_id for _ in range(5_000)]
+
+    def run():
+        for item_id in purchases:
+            shop.purchase_item(player, item_id)
+
+    def cleanup():
+        for item_id, previous in replaced.items():
+            if previous:
+                item_registry.register_item(previous)
+            else:
+                item_registry.unregister_item(item_id)
+    return run, len(purchases), cleanup
+
+
+@benchmark("currency_conversion")
+def bench_currency_conversion():
+    manager = CurrencyManager()
+    names = [f"Coin{i}" for i in range(50)]
+    for name in names:
+        manager.add_currency(Currency(name, name[:2], random.uniform(0.01, 100)))
+    pairs = [(random.choice(names), random.choice(names)) for _ in range(100_000)]
+
+    def run():
+        for source, target in pairs:
+            manager.get_exchange_rate(source, target)
+            manager.get_currency(source).convert_to(100, manager.get_currency(target))
+    return run, len(pairs)
+
+
+@benchmark("quest_completion")
+def bench_quest_completion():
+    db = QuestDatabase()
+    player = make_player()
+    for i in range(2_000):
+        objectives = [f"objective_{i}_{j}" for j in range(5)]
+        db.add_quest(Quest(f"quest_{i}", f"Quest {i}", "Generated quest.", reward_exp=10, reward_gold=5,
+                           objectives=objectives))
+        player.completed_objectives.update(objectives)
+
+    def run():
+        for quest_id in list(db.quests):
+            db.complete_quest(player, quest_id)
+    return run, len(db.quests)
+
+
+@benchmark("save_load")
+def bench_save_load():
+    player = make_player()
+    for i in range(5_000):
+        player.inventory.add_item(f"item_{i}", random.randint(1, 500))
+    directory = tempfile.mkdtemp(prefix="ember_bench_")
+    character_path = os.path.join(directory, "character.json")
+    inventory_path = os.path.join(directory, "inventory.json")
+
+    def run():
+        for _ in range(5):
+            with open(character_path, "w") as f:
+                json.dump(player.save_data(), f)
+            with open(character_path) as f:
+                make_player().load_data(json.load(f))
+            player.inventory.save_inventory(inventory_path)
+            Inventory().load_inventory(inventory_path)
+
+    def cleanup():
+        shutil.rmtree(directory, ignore_errors=True)
+    return run, 5, cleanup
+
+
+# Harness
+def run_benchmark(name: str, rounds: int) -> Dict[str, float]:
+    """Time a benchmark over several rounds; fixtures are rebuilt from the seed for every round."""
+    timings = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), output.use(NullSink()):
+        for round_number in range(rounds):
+            random.seed(SEED)
+            run, operations, *cleanup = BENCHMARKS[name]()
+            random.seed(SEED + round_number)
+            try:
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) / operations)
+            finally:
+                for undo in cleanup:
+                    undo()
+    return {"median": statistics.median(timings), "min": min(timings), "operations": operations}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> list:
+    """Names of benchmarks whose median regressed by more than the threshold."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["median"] > base["median"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the game benchmarks.")
+    parser.add_argument("-k", dest="filters", action="append", default=[],
+                        help="only run benchmarks whose name contains this text")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    names = [name for name in BENCHMARKS if not args.filters or any(text in name for text in args.filters)]
+    results = {}
+    print(f"{'benchmark':<24}{'median/op':>12}{'min/op':>12}{'baseline':>12}{'change':>9}")
+    for name in names:
+        results[name] = result = run_benchmark(name, args.rounds)
+        line = f"{name:<24}{format_time(result['median']):>12}{format_time(result['min']):>12}"
+        if name in baseline:
+            change = result["median"] / baseline[name]["median"] - 1
+            line += f"{format_time(baseline[name]['median']):>12}{change:>+9.1%}"
+        print(line)
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 import random
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Set
+from inventory import Inventory
+from output import output
 
 class StatusEffect:
     """
@@ -29,13 +31,17 @@ class Equipment:
 
 class Skill:
     """
-    Represents an active or passive skill.
+    Represents an active or passive skill. Skills from the skill registry also
+    carry their id and `cast`, their effects compiled into one callable.
     """
-    def __init__(self, name: str, mana_cost: int, damage: int, effect: Optional[StatusEffect] = None):
+    def __init__(self, name: str, mana_cost: int, damage: int, effect: Optional[StatusEffect] = None,
+                 skill_id: Optional[str] = None, cast: Optional[Callable] = None):
         self.name = name
         self.mana_cost = mana_cost
-        self.damage = damage
+        self.damage = damage  # Base damage, before any stat scaling
         self.effect = effect
+        self.skill_id = skill_id
+        self.cast = cast  # cast(caster, target, on_status=None) -> bool; on_status(recipient, status)
 
 
 class PlayerCharacter:
@@ -59,17 +65,18 @@ class PlayerCharacter:
             'Luck': 3
         }
 
-        self.current_stats = self.base_stats.copy()
-        self.current_stats['HP'] = self.max_hp
-        self.current_stats['MP'] = self.max_mp
-
-        self.inventory: List[str] = []  # IDs of items
+        # Equipment must exist before max_hp/max_mp are read below
         self.equipment: Dict[str, Optional[Equipment]] = {
             'head': None,
             'body': None,
             'weapon': None,
             'accessory': None
         }
+        self.current_stats = self.base_stats.copy()
+        self.current_stats['HP'] = self.max_hp
+        self.current_stats['MP'] = self.max_mp
+
+        self.inventory = Inventory(max_slots=40)
 
         self.skills: List[Skill] = []
         self.status_effects: List[StatusEffect] = []
@@ -89,6 +96,18 @@ class PlayerCharacter:
                 total += item.stat_boosts.get(stat, 0)
         return total
 
+    @property
+    def speed(self):
+        return self.base_stats['Speed'] + self._equipment_stat_total('Speed')
+
+    def is_alive(self) -> bool:
+        return self.current_stats['HP'] > 0
+
+    def attack(self, target):
+        if output.enabled:
+            output.emit(f"{self.name} attacks {target.name}!", "attack", attacker=self.name, target=target.name)
+        target.take_damage(self.base_stats['Attack'] + self._equipment_stat_total('Attack'))
+
     def gain_exp(self, amount: int):
         """
         Add EXP and handle leveling up.
@@ -110,31 +129,38 @@ class PlayerCharacter:
         self.base_stats['Defense'] += 2
         self.base_stats['Speed'] += 1
         self.base_stats['Luck'] += 1
-        print(f"{self.name} leveled up to {self.level}!")
+        output.emit(f"{self.name} leveled up to {self.level}!", "level_up", name=self.name, level=self.level)
 
     def take_damage(self, amount: int):
         reduced = max(0, amount - self.base_stats['Defense'])
         self.current_stats['HP'] -= reduced
-        print(f"{self.name} took {reduced} damage!")
-        if self.current_stats['HP'] <= 0:
-            print(f"{self.name} has been defeated.")
+        if output.enabled:
+            output.emit(f"{self.name} took {reduced} damage!", "damage", target=self.name, amount=reduced,
+                        hp=self.current_stats['HP'])
+            if self.current_stats['HP'] <= 0:
+                output.emit(f"{self.name} has been defeated.", "defeated", name=self.name)
 
     def heal(self, amount: int):
         self.current_stats['HP'] = min(self.max_hp, self.current_stats['HP'] + amount)
-        print(f"{self.name} healed {amount} HP!")
+        if output.enabled:
+            output.emit(f"{self.name} healed {amount} HP!", "heal", target=self.name, amount=amount)
 
     def use_skill(self, skill: Skill, target):
-        if self.current_stats['MP'] >= skill.mana_cost:
+        if skill.cast:
+            skill.cast(self, target)
+        elif self.current_stats['MP'] >= skill.mana_cost:
             self.current_stats['MP'] -= skill.mana_cost
-            print(f"{self.name} used {skill.name}!")
+            if output.enabled:
+                output.emit(f"{self.name} used {skill.name}!", "skill", caster=self.name, skill=skill.name)
             target.take_damage(skill.damage)
             if skill.effect:
                 target.apply_status(skill.effect)
         else:
-            print(f"Not enough MP to use {skill.name}.")
+            output.emit(f"Not enough MP to use {skill.name}.", "skill_failed", caster=self.name, skill=skill.name)
 
     def apply_status(self, status: StatusEffect):
-        print(f"{self.name} is now affected by {status.name}!")
+        if output.enabled:
+            output.emit(f"{self.name} is now affected by {status.name}!", "status", target=self.name, status=status.name)
         self.status_effects.append(status)
 
     def update_status_effects(self):
@@ -148,26 +174,30 @@ class PlayerCharacter:
 
     def equip(self, item: Equipment):
         self.equipment[item.slot] = item
-        print(f"{self.name} equipped {item.name} to {item.slot}.")
+        output.emit(f"{self.name} equipped {item.name} to {item.slot}.", "equip", name=self.name, item=item.name, slot=item.slot)
 
     def unequip(self, slot: str):
         if self.equipment[slot]:
-            print(f"{self.name} unequipped {self.equipment[slot].name} from {slot}.")
+            output.emit(f"{self.name} unequipped {self.equipment[slot].name} from {slot}.", "unequip", name=self.name, slot=slot)
             self.equipment[slot] = None
 
-    def add_item_to_inventory(self, item_id: str):
-        self.inventory.append(item_id)
-        print(f"{self.name} received item: {item_id}.")
+    def add_item_to_inventory(self, item_id: str, quantity: int = 1) -> bool:
+        if not self.inventory.add_item(item_id, quantity):
+            return False
+        if output.enabled:
+            output.emit(f"{self.name} received item: {item_id}.", "item_received", name=self.name, item_id=item_id,
+                        quantity=quantity)
+        return True
 
     def show_stats(self):
-        print(f"--- {self.name} ---")
-        print(f"Class: {self.char_class} | Level: {self.level}")
-        print(f"HP: {self.current_stats['HP']}/{self.max_hp}")
-        print(f"MP: {self.current_stats['MP']}/{self.max_mp}")
+        output.emit(f"--- {self.name} ---")
+        output.emit(f"Class: {self.char_class} | Level: {self.level}")
+        output.emit(f"HP: {self.current_stats['HP']}/{self.max_hp}")
+        output.emit(f"MP: {self.current_stats['MP']}/{self.max_mp}")
         for stat in ['Attack', 'Defense', 'Speed', 'Luck']:
-            print(f"{stat}: {self.base_stats[stat]} (+{self._equipment_stat_total(stat)})")
-        print("Skills:", [skill.name for skill in self.skills])
-        print("Status Effects:", [status.name for status in self.status_effects])
+            output.emit(f"{stat}: {self.base_stats[stat]} (+{self._equipment_stat_total(stat)})")
+        output.emit(f"Skills: {[skill.name for skill in self.skills]}")
+        output.emit(f"Status Effects: {[status.name for status in self.status_effects]}")
 
     def save_data(self) -> dict:
         """
@@ -179,11 +209,11 @@ class PlayerCharacter:
             'level': self.level,
             'exp': self.exp,
             'base_stats': self.base_stats,
-            'inventory': self.inventory,
+            'inventory': dict(self.inventory.get_all_items()),
             'equipment': {
                 k: (v.name if v else None) for k, v in self.equipment.items()
             },
-            'skills': [skill.name for skill in self.skills],
+            'skills': [skill.skill_id or skill.name for skill in self.skills],
             'status_effects': [(e.name, e.duration, e.effect) for e in self.status_effects]
         }
 
@@ -197,11 +227,96 @@ class PlayerCharacter:
         self.exp = data['exp']
         self.base_stats = data['base_stats']
         self.current_stats = self.base_stats.copy()
-        self.inventory = data['inventory']
-        # Equipment and skills should be loaded with cross-referencing item and skill databases
+        self.inventory = Inventory(max_slots=40)
+        # Older saves stored a list of item ids
+        items = data['inventory']
+        if isinstance(items, list):
+            items = {item_id: items.count(item_id) for item_id in set(items)}
+        for item_id, quantity in items.items():
+            self.inventory.add_item(item_id, quantity)
+        # Skills are saved by id; older saves stored names, which the registry also resolves
+        from skills import skill_registry  # skills imports this module
+        self.skills = []
+        for key in data.get('skills', []):
+            skill = skill_registry.resolve(key)
+            if skill:
+                self.skills.append(skill)
+            else:
+                output.emit(f"Unknown skill {key} was not loaded.", "load_warning", skill=key)
+        # Equipment should be loaded with cross-referencing the item database
         # Placeholder: assuming external managers
 
 
+# Shared type for anything that fights, trades or takes quests
+Character = PlayerCharacter
+
+
+class Player(PlayerCharacter):
+    """
+    The adventurer controlled by the user: adds quests, objectives and a wallet
+    holding each currency separately.
+    """
+    def __init__(self, name: str, char_class: str = "Adventurer"):
+        super().__init__(name, char_class)
+        self.quests: Dict[str, object] = {}  # quest_id: Quest
+        self.completed_objectives: Set[str] = set()
+        self.balances: Dict[str, float] = {"Gold": 0, "Silver": 0, "Platinum": 0}
+
+    def add_quest(self, quest):
+        self.quests[quest.quest_id] = quest
+
+    def start_quest(self, quest_id: str):
+        from quests import quest_db  # quests imports this module
+        quest = quest_db.get_quest(quest_id)
+        if quest:
+            self.add_quest(quest)
+            output.emit(f"{self.name} started the quest: {quest.title}", "quest_started", name=self.name, quest_id=quest_id)
+        else:
+            output.emit(f"Quest {quest_id} does not exist.")
+
+    def complete_objective(self, objective: str):
+        self.completed_objectives.add(objective)
+
+    def add_experience(self, amount: int):
+        self.gain_exp(amount)
+
+    def get_balance(self, currency) -> float:
+        """Balance in a currency, given either its name or the Currency itself."""
+        return self.balances.get(getattr(currency, "name", currency), 0)
+
+    def set_currency_balance(self, currency: str, amount: float):
+        self.balances[currency] = amount
+
+    def add_gold(self, amount: float):
+        self.balances["Gold"] = self.balances.get("Gold", 0) + amount
+
+    def deduct_currency(self, currency: str, amount: float):
+        self.balances[currency] = self.balances.get(currency, 0) - amount
+
+    def show_inventory(self):
+        output.emit(f"--- {self.name}'s Inventory ---")
+        for stack in self.inventory.sorted_stacks():
+            output.emit(f"- {stack.name} (x{stack.quantity})")
+
+    def show_balances(self):
+        output.emit(", ".join(f"{name}: {amount}" for name, amount in self.balances.items()), "balances", **self.balances)
+
+    def save_data(self) -> dict:
+        data = super().save_data()
+        data['quests'] = list(self.quests)
+        data['completed_objectives'] = list(self.completed_objectives)
+        data['balances'] = dict(self.balances)
+        return data
+
+    def load_data(self, data: dict):
+        super().load_data(data)
+        from quests import quest_db
+        self.quests = {quest_id: quest_db.get_quest(quest_id) for quest_id in data.get('quests', [])
+                       if quest_db.get_quest(quest_id)}
+        self.completed_objectives = set(data.get('completed_objectives', []))
+        self.balances = dict(data.get('balances', self.balances))
+
+
 # Sample usage
 if __name__ == "__main__":
     hero = PlayerCharacter("Kaito", "Soul Samurai")
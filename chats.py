@@ -2,13 +2,143 @@
 # Advanced Chat system with various interactions and dialogue choices
 
 import time
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Callable, List, Dict, Optional, Tuple
 from character import Character
 from villagers import Villager, VillagerManager
-from quests import QuestDatabase
+from quests import QuestDatabase, quest_db
+from metrics import metrics
+from output import output
+from profiler import profiler
 from random import choice, randint
 
 
+def _say(chat: 'Chat', text: str):
+    """A line spoken by the villager the player is chatting with."""
+    output.emit(f"\n{chat.character.name}: {text}", "dialogue", villager=chat.character.name)
+
+
+# Dialogue option handlers. Each one receives the active Chat.
+def _best_weapons(chat: 'Chat'):
+    _say(chat, "I have the finest weapons in the land!")
+    output.emit("Would you like to buy one?")
+    chat.character.trade(chat.player)
+
+def _special_offers(chat: 'Chat'):
+    if chat.character.event_trigger == "special_sale":
+        _say(chat, "Yes, today I have a special offer!")
+        chat.character.trade(chat.player)
+    else:
+        _say(chat, "Sorry, no special offers today.")
+
+def _upgrade_armor(chat: 'Chat'):
+    _say(chat, "You should check my best armor! I can upgrade it for you.")
+    # Call an upgrade system (Could be extended in the future)
+    output.emit("Armor upgrade: 100 gold")
+
+def _selling_today(chat: 'Chat'):
+    _say(chat, "Today I have these items for sale:")
+    chat.character.trade(chat.player)
+
+def _buy_something(chat: 'Chat'):
+    _say(chat, "I have the following items in stock:")
+    chat.character.trade(chat.player)
+
+def _special_items(chat: 'Chat'):
+    _say(chat, "I've got a few rare items today. Have a look!")
+    chat.character.trade(chat.player)
+
+def _heal(chat: 'Chat'):
+    _say(chat, "I can heal you, for a price of 50 gold.")
+    # Handle healing
+    chat.player.add_gold(-50)
+    output.emit("You have been healed!")
+
+def _potions(chat: 'Chat'):
+    _say(chat, "I brew the finest potions. Health potions, mana potions, and more!")
+    output.emit("Would you like to purchase one?")
+    chat.character.trade(chat.player)
+
+def _diseases(chat: 'Chat'):
+    _say(chat, "Fortunately, no diseases right now, but I am keeping a watchful eye.")
+
+def _quest_info(chat: 'Chat'):
+    quest = quest_db.get_quest(chat.character.quest_id)
+    if quest:
+        _say(chat, f"You have a quest: '{quest.title}'")
+        output.emit(f"Quest Description: {quest.description}")
+        output.emit(f"Objectives: {', '.join(quest.objectives)}")
+        output.emit(f"Reward: {quest.reward_exp} EXP, {quest.reward_gold} Gold.")
+
+def _heard_special_sale(chat: 'Chat'):
+    _say(chat, "Yes, everything is discounted today. Come and see!")
+    chat.character.trade(chat.player)
+
+def _hidden_secret(chat: 'Chat'):
+    _say(chat, "Hmm, there are always rumors about hidden treasures...")
+    output.emit("Try exploring the forest and talk to the elders. You might find something.")
+
+def _goodbye(chat: 'Chat'):
+    _say(chat, "Take care, adventurer.")
+
+
+# Dialogue data: option_id -> (text, handler). Quest text is formatted with the quest title.
+DIALOGUE_OPTIONS: Dict[str, Tuple[str, Callable[['Chat'], None]]] = {
+    "best_weapons": ("Tell me about your best weapons.", _best_weapons),
+    "special_offers": ("Do you have any special offers?", _special_offers),
+    "upgrade_armor": ("I need to upgrade my armor.", _upgrade_armor),
+    "selling_today": ("What are you selling today?", _selling_today),
+    "buy_something": ("Can I buy something?", _buy_something),
+    "special_items": ("Do you have any special items?", _special_items),
+    "heal": ("Can you heal me?", _heal),
+    "potions": ("Tell me about your potions.", _potions),
+    "diseases": ("Are there any diseases spreading in the village?", _diseases),
+    "quest_info": ("Tell me more about your quest '{quest_title}'.", _quest_info),
+    "heard_special_sale": ("I heard about your special sale!", _heard_special_sale),
+    "hidden_secret": ("Is there something hidden in the village?", _hidden_secret),
+    "goodbye": ("Goodbye.", _goodbye),
+}
+
+# Options offered per villager role
+ROLE_OPTIONS: Dict[str, List[str]] = {
+    "Blacksmith": ["best_weapons", "special_offers", "upgrade_armor"],
+    "Merchant": ["selling_today", "buy_something", "special_items"],
+    "Healer": ["heal", "potions", "diseases"],
+}
+
+# Options offered per villager event trigger
+EVENT_OPTIONS: Dict[str, List[str]] = {
+    "special_sale": ["heard_special_sale"],
+    "hidden_secret": ["hidden_secret"],
+}
+
+# A compiled dialogue: option texts and the matching handlers, index-aligned
+CompiledDialogue = Tuple[Tuple[str, ...], Tuple[Callable[['Chat'], None], ...]]
+
+@lru_cache(maxsize=None)
+def compile_dialogue(role: str, event_trigger: Optional[str], quest_title: Optional[str]) -> CompiledDialogue:
+    """
+    Build the option list and dispatch table for a (role, event_trigger, active quest) combination.
+    Results are cached, so every villager sharing the same combination reuses one table.
+    """
+    option_ids = list(ROLE_OPTIONS.get(role, []))
+    # Quest-related options
+    if quest_title is not None:
+        option_ids.append("quest_info")
+    # Special event-related options
+    option_ids.extend(EVENT_OPTIONS.get(event_trigger, []))
+    # General options
+    option_ids.append("goodbye")
+
+    texts = []
+    handlers = []
+    for option_id in option_ids:
+        text, handler = DIALOGUE_OPTIONS[option_id]
+        texts.append(text.format(quest_title=quest_title) if option_id == "quest_info" else text)
+        handlers.append(handler)
+    return tuple(texts), tuple(handlers)
+
+
 class Chat:
     def __init__(self, character: Villager, player: Character):
         """
@@ -16,70 +146,43 @@ class Chat:
         """
         self.character = character
         self.player = player
-        self.dialogue_options: List[str] = self.generate_dialogue_options()
+        self.dialogue_options, self.dialogue_handlers = self.generate_dialogue_options()
 
-    def generate_dialogue_options(self):
+    def generate_dialogue_options(self) -> CompiledDialogue:
         """
-        Generate different dialogue options based on the villager's role,
+        Look up the compiled dialogue options based on the villager's role,
         player's quests, and other variables.
         """
-        options = []
-
-        if self.character.role == "Blacksmith":
-            options.append("Tell me about your best weapons.")
-            options.append("Do you have any special offers?")
-            options.append("I need to upgrade my armor.")
-        
-        elif self.character.role == "Merchant":
-            options.append("What are you selling today?")
-            options.append("Can I buy something?")
-            options.append("Do you have any special items?")
-        
-        elif self.character.role == "Healer":
-            options.append("Can you heal me?")
-            options.append("Tell me about your potions.")
-            options.append("Are there any diseases spreading in the village?")
-        
-        # Quest-related options
+        quest_title = None
         if self.character.quest_id:
             quest = quest_db.get_quest(self.character.quest_id)
             if quest and not quest.is_completed:
-                options.append(f"Tell me more about your quest '{quest.title}'.")
-
-        # Special event-related options
-        if self.character.event_trigger == "special_sale":
-            options.append("I heard about your special sale!")
-        
-        if self.character.event_trigger == "hidden_secret":
-            options.append("Is there something hidden in the village?")
-
-        # General options
-        options.append("Goodbye.")
-        return options
+                quest_title = quest.title
+        return compile_dialogue(self.character.role, self.character.event_trigger, quest_title)
 
     def start_chat(self):
         """
         Starts the chat session and displays the available options.
         """
-        print(f"\n{self.character.name} is ready to chat!")
+        output.emit(f"\n{self.character.name} is ready to chat!")
         while True:
-            print(f"\n{self.character.name}: {choice(self.character.dialogue)}")
-            print("\nWhat do you want to talk about?")
+            _say(self, choice(self.character.dialogue))
+            output.emit("\nWhat do you want to talk about?")
             
             for idx, option in enumerate(self.dialogue_options, 1):
-                print(f"{idx}. {option}")
+                output.emit(f"{idx}. {option}")
 
             try:
-                choice_index = int(input("\nChoose an option (Enter the number): "))
+                choice_index = int(output.prompt("\nChoose an option (Enter the number): "))
                 if choice_index < 1 or choice_index > len(self.dialogue_options):
-                    print("Invalid choice. Please try again.")
+                    output.emit("Invalid choice. Please try again.")
                     continue
             except ValueError:
-                print("Invalid input. Please enter a number.")
+                output.emit("Invalid input. Please enter a number.")
                 continue
 
             if choice_index == len(self.dialogue_options):
-                print(f"\n{self.character.name}: Farewell, traveler!")
+                _say(self, "Farewell, traveler!")
                 break
 
             # Handle dialogue options based on the player's choice
@@ -89,69 +192,10 @@ class Chat:
         """
         Handle the chosen dialogue option and interact with the player.
         """
-        choice = self.dialogue_options[choice_index - 1]
-
-        if choice == "Tell me about your best weapons.":
-            print(f"\n{self.character.name}: I have the finest weapons in the land!")
-            print("Would you like to buy one?")
-            self.character.trade(self.player)
-
-        elif choice == "Do you have any special offers?":
-            if self.character.event_trigger == "special_sale":
-                print(f"\n{self.character.name}: Yes, today I have a special offer!")
-                self.character.trade(self.player)
-            else:
-                print(f"\n{self.character.name}: Sorry, no special offers today.")
-
-        elif choice == "I need to upgrade my armor.":
-            print(f"\n{self.character.name}: You should check my best armor! I can upgrade it for you.")
-            # Call an upgrade system (Could be extended in the future)
-            print("Armor upgrade: 100 gold")
-
-        elif choice == "What are you selling today?":
-            print(f"\n{self.character.name}: Today I have these items for sale:")
-            self.character.trade(self.player)
-
-        elif choice == "Can I buy something?":
-            print(f"\n{self.character.name}: I have the following items in stock:")
-            self.character.trade(self.player)
-
-        elif choice == "Do you have any special items?":
-            print(f"\n{self.character.name}: I've got a few rare items today. Have a look!")
-            self.character.trade(self.player)
-
-        elif choice == "Can you heal me?":
-            print(f"\n{self.character.name}: I can heal you, for a price of 50 gold.")
-            # Handle healing
-            self.player.add_gold(-50)
-            print("You have been healed!")
-
-        elif choice == "Tell me about your potions.":
-            print(f"\n{self.character.name}: I brew the finest potions. Health potions, mana potions, and more!")
-            print("Would you like to purchase one?")
-            self.character.trade(self.player)
-
-        elif choice == "Are there any diseases spreading in the village?":
-            print(f"\n{self.character.name}: Fortunately, no diseases right now, but I am keeping a watchful eye.")
-
-        elif "Tell me more about your quest" in choice:
-            quest = quest_db.get_quest(self.character.quest_id)
-            if quest:
-                print(f"\n{self.character.name}: You have a quest: '{quest.title}'")
-                print(f"Quest Description: {quest.description}")
-                print(f"Objectives: {', '.join(quest.objectives)}")
-                print(f"Reward: {quest.reward_exp} EXP, {quest.reward_gold} Gold.")
-
-        elif choice == "I heard about your special sale!":
-            print(f"\n{self.character.name}: Yes, everything is discounted today. Come and see!")
-            self.character.trade(self.player)
-
-        elif choice == "Is there something hidden in the village?":
-            print(f"\n{self.character.name}: Hmm, there are always rumors about hidden treasures...")
-            print("Try exploring the forest and talk to the elders. You might find something.")
-
-        elif choice == "Goodbye.":
-            print(f"\n{self.character.name}: Take care, adventurer.")
+        handler = self.dialogue_handlers[choice_index - 1]
+        option = handler.__name__.lstrip("_")
+        with metrics.timer("chat_option_seconds", option=option), profiler.action(f"chat:{option}"):
+            handler(self)
 
 class ChatManager:
     def __init__(self, villager_manager: VillagerManager):
@@ -169,7 +213,7 @@ class ChatManager:
             chat = Chat(villager, player)
             chat.start_chat()
         else:
-            print(f"{villager_name} is not available for a chat right now.")
+            output.emit(f"{villager_name} is not available for a chat right now.")
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,323 @@
+# chunks.py
+# Streaming world chunks with background prefetch and LRU eviction for the Anime RPG
+
+import json
+import math
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ChunkKey = Tuple[int, int]
+
+# Bookkeeping cost charged to every resident chunk, so empty chunks still count against the budget
+CHUNK_OVERHEAD = 256
+
+
+def _ring(cx: int, cy: int, r: int) -> Iterator[ChunkKey]:
+    """Chunk keys on the square ring r chunks out from (cx, cy)."""
+    if r == 0:
+        yield cx, cy
+        return
+    for dx in range(-r, r + 1):
+        yield cx + dx, cy - r
+        yield cx + dx, cy + r
+    for dy in range(-r + 1, r):
+        yield cx - r, cy + dy
+        yield cx + r, cy + dy
+
+
+class ChunkStore:
+    """
+    Keeps one JSON file per chunk in a directory.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def chunk_path(self, key: ChunkKey) -> str:
+        return os.path.join(self.directory, f"chunk_{key[0]}_{key[1]}.json")
+
+    def load(self, key: ChunkKey) -> Optional[str]:
+        try:
+            with open(self.chunk_path(key), "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: ChunkKey, text: str):
+        # Write to a temporary file first so a crash never leaves half a chunk
+        path = self.chunk_path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+class WorldChunk:
+    """
+    A square piece of the world map and the villages placed in it.
+    """
+    def __init__(self, key: ChunkKey, villages: List[Tuple[object, float, float]], size: int):
+        self.key = key
+        self.villages = villages  # (village, x, y)
+        self.size = size + CHUNK_OVERHEAD  # Approximate memory cost in bytes (serialized size)
+        self.dirty = False
+
+
+def write_chunks(store: ChunkStore, placed_records: Iterable[Tuple[dict, float, float]], chunk_size: float):
+    """
+    Split serialized villages into chunk files. Records are grouped in memory
+    and every chunk they touch is overwritten, so pass all of a chunk's
+    records in one call; ContentGenerator.write calls this once per chunk to
+    keep memory flat for large worlds.
+    """
+    grouped: Dict[ChunkKey, List[dict]] = {}
+    for record, x, y in placed_records:
+        key = (int(math.floor(x / chunk_size)), int(math.floor(y / chunk_size)))
+        grouped.setdefault(key, []).append({"x": x, "y": y, "village": record})
+    for key, entries in grouped.items():
+        store.save(key, json.dumps({"villages": entries}))
+
+
+class ChunkManager:
+    """
+    Loads chunks around the player on demand and keeps the resident set under a
+    memory budget. Neighboring chunks are prefetched on a background thread, the
+    least recently used chunks are evicted first, and dirty chunks are written
+    back to the store on eviction.
+
+    Chunks are read from disk outside the lock. Every write-back bumps the
+    chunk's generation, and a read that overlapped one is thrown away and
+    redone, so a stale copy never replaces changes that were just saved.
+    """
+    def __init__(
+        self,
+        store: ChunkStore,
+        chunk_size: float = 512.0,
+        memory_budget: int = 8 * 1024 * 1024,
+        prefetch_radius: int = 1,
+        decode: Callable[[dict], object] = lambda record: record,
+        encode: Callable[[object], dict] = lambda village: village,
+    ):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        self.prefetch_radius = prefetch_radius
+        self.decode = decode
+        self.encode = encode
+        self.chunks: 'OrderedDict[ChunkKey, WorldChunk]' = OrderedDict()
+        self.resident_size = 0
+        self.current_key: Optional[ChunkKey] = None
+        self._lock = threading.RLock()
+        self._generations: Dict[ChunkKey, int] = {}  # Write-backs per chunk
+        # Room for one move's worth of neighbors; requests beyond that are dropped, not queued
+        self._prefetch_queue: 'queue.Queue[Optional[ChunkKey]]' = queue.Queue(maxsize=(2 * prefetch_radius + 1) ** 2)
+        self._prefetcher = threading.Thread(target=self._prefetch_worker, daemon=True)
+        self._prefetcher.start()
+
+    def chunk_key(self, x: float, y: float) -> ChunkKey:
+        return int(math.floor(x / self.chunk_size)), int(math.floor(y / self.chunk_size))
+
+    def _read_chunk(self, key: ChunkKey) -> WorldChunk:
+        text = self.store.load(key)
+        if text is None:
+            return WorldChunk(key, [], 0)
+        data = json.loads(text)
+        villages = [(self.decode(entry["village"]), entry["x"], entry["y"]) for entry in data["villages"]]
+        return WorldChunk(key, villages, len(text))
+
+    def _write_chunk(self, chunk: WorldChunk):
+        entries = [{"x": x, "y": y, "village": self.encode(village)} for village, x, y in chunk.villages]
+        text = json.dumps({"villages": entries})
+        with self._lock:
+            self.store.save(chunk.key, text)
+            self._generations[chunk.key] = self._generations.get(chunk.key, 0) + 1
+            if chunk.key in self.chunks:
+                self.resident_size += len(text) + CHUNK_OVERHEAD - chunk.size
+        chunk.size = len(text) + CHUNK_OVERHEAD
+        chunk.dirty = False
+
+    def _load(self, key: ChunkKey) -> WorldChunk:
+        """Make a chunk resident, reading it from the store unless another thread beat us to it."""
+        while True:
+            with self._lock:
+                chunk = self.chunks.get(key)
+                if chunk:
+                    return chunk
+                generation = self._generations.get(key, 0)
+            loaded = self._read_chunk(key)
+            with self._lock:
+                chunk = self.chunks.get(key)
+                if chunk:
+                    return chunk
+                if self._generations.get(key, 0) == generation:
+                    self.chunks[key] = loaded
+                    self.resident_size += loaded.size
+                    self._evict()
+                    return loaded
+            # Written back while we were reading: our copy is stale, read it again
+
+    def _evict(self):
+        while self.resident_size > self.memory_budget and len(self.chunks) > 1:
+            key, chunk = next(iter(self.chunks.items()))
+            if key == self.current_key:
+                # Never drop the chunk the player is standing in
+                self.chunks.move_to_end(key)
+                key, chunk = next(iter(self.chunks.items()))
+                if key == self.current_key:
+                    break
+            del self.chunks[key]
+            self.resident_size -= chunk.size
+            if chunk.dirty:
+                self._write_chunk(chunk)
+
+    def get_chunk(self, key: ChunkKey) -> WorldChunk:
+        """Return a chunk, loading it synchronously if it is not resident."""
+        with self._lock:
+            chunk = self.chunks.get(key)
+            if chunk:
+                self.chunks.move_to_end(key)
+                return chunk
+        return self._load(key)
+
+    def _near_player(self, key: ChunkKey) -> bool:
+        current = self.current_key
+        return current is not None and max(abs(key[0] - current[0]), abs(key[1] - current[1])) <= self.prefetch_radius
+
+    def _prefetch_worker(self):
+        while True:
+            key = self._prefetch_queue.get()
+            if key is None:
+                break
+            # The player may have moved on since this was queued
+            with self._lock:
+                wanted = key not in self.chunks and self._near_player(key)
+            if wanted:
+                self._load(key)
+            self._prefetch_queue.task_done()
+
+    def update_player_position(self, x: float, y: float) -> WorldChunk:
+        """Load the chunk under the player and, on entering a new chunk, queue its neighbors for prefetch."""
+        key = self.chunk_key(x, y)
+        with self._lock:
+            moved = key != self.current_key
+            self.current_key = key
+        chunk = self.get_chunk(key)
+        if moved:
+            r = self.prefetch_radius
+            for dx in range(-r, r + 1):
+                for dy in range(-r, r + 1):
+                    if dx or dy:
+                        try:
+                            self._prefetch_queue.put_nowait((key[0] + dx, key[1] + dy))
+                        except queue.Full:
+                            break
+        return chunk
+
+    def villages_near(self, x: float, y: float) -> List[object]:
+        """Villages in the player's chunk and the resident neighbors around it."""
+        cx, cy = self.chunk_key(x, y)
+        found = []
+        with self._lock:
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    chunk = self.chunks.get((cx + dx, cy + dy))
+                    if chunk:
+                        found.extend(village for village, _, _ in chunk.villages)
+        return found
+
+    def villages_in_radius(self, x: float, y: float, radius: float) -> List[Tuple[object, float, float]]:
+        """(village, x, y) for every village within radius of (x, y), loading the chunks that cover it."""
+        min_cx, min_cy = self.chunk_key(x - radius, y - radius)
+        max_cx, max_cy = self.chunk_key(x + radius, y + radius)
+        r2 = radius * radius
+        found = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for placed in self.get_chunk((cx, cy)).villages:
+                    if (placed[1] - x) ** 2 + (placed[2] - y) ** 2 <= r2:
+                        found.append(placed)
+        return found
+
+    def nearest_village(self, x: float, y: float, max_ring: int = 2) -> Optional[Tuple[object, float, float]]:
+        """
+        (village, x, y) of the village closest to (x, y), searching outward
+        ring by ring. Only chunks up to `max_ring` rings away are loaded, so a
+        village further out than that is not found.
+        """
+        cx, cy = self.chunk_key(x, y)
+        best, best_d2 = None, math.inf
+        for r in range(max_ring + 1):
+            # Everything in ring r and beyond is at least r - 1 chunks away
+            if best is not None and r > 0 and best_d2 <= ((r - 1) * self.chunk_size) ** 2:
+                break
+            for key in _ring(cx, cy, r):
+                for placed in self.get_chunk(key).villages:
+                    d2 = (placed[1] - x) ** 2 + (placed[2] - y) ** 2
+                    if d2 < best_d2:
+                        best, best_d2 = placed, d2
+        return best
+
+    def find_village(self, name: str) -> Optional[Tuple[object, float, float]]:
+        """(village, x, y) for a village in a resident chunk, by name."""
+        with self._lock:
+            for chunk in self.chunks.values():
+                for placed in chunk.villages:
+                    if placed[0].name == name:
+                        return placed
+        return None
+
+    def mark_dirty(self, x: float, y: float):
+        """Flag the chunk at a position as changed so it is written back on eviction."""
+        with self._lock:
+            self.get_chunk(self.chunk_key(x, y)).dirty = True
+
+    def add_village(self, village, x: float, y: float):
+        added_size = len(json.dumps(self.encode(village)))
+        # Under the lock so the chunk cannot be evicted between loading it and adding to it
+        with self._lock:
+            chunk = self.get_chunk(self.chunk_key(x, y))
+            chunk.villages.append((village, x, y))
+            chunk.dirty = True
+            chunk.size += added_size
+            self.resident_size += added_size
+            self._evict()
+
+    def flush(self):
+        """Write every dirty resident chunk back to the store."""
+        with self._lock:
+            for chunk in self.chunks.values():
+                if chunk.dirty:
+                    self._write_chunk(chunk)
+
+    def close(self):
+        self._prefetch_queue.put(None)
+        self._prefetcher.join()
+        self.flush()
+
+# Debug Example
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+
+    random.seed(3)
+    directory = tempfile.mkdtemp(prefix="ember_chunks_")
+    store = ChunkStore(directory)
+    records = ((({"name": f"village_{i}", "population": random.randint(10, 500)}),
+                random.uniform(0, 20_000), random.uniform(0, 20_000)) for i in range(50_000))
+    write_chunks(store, records, 512.0)
+
+    manager = ChunkManager(store, chunk_size=512.0, memory_budget=256 * 1024)
+    start = time.perf_counter()
+    x, y = 0.0, 0.0
+    for step in range(400):
+        x, y = x + 50, y + 40
+        manager.update_player_position(x, y)
+        if step % 50 == 0:
+            manager.mark_dirty(x, y)
+    manager.close()
+    print(f"Walked 400 steps in {time.perf_counter() - start:.2f}s, "
+          f"{len(manager.chunks)} chunks resident ({manager.resident_size // 1024} KiB)")
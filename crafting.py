@@ -0,0 +1,317 @@
+# crafting.py
+# Multi-level crafting planner for the Anime RPG
+
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from items import CraftingRecipe, InventoryManager, apply_changes, item_registry, iron_blade_recipe
+from snapshots import UndoHistory
+from output import output
+
+# Demand for an item as a function of the batch size n: segments (start, value at start, slope),
+# each running up to the next start. Demands only grow with n, so every slope is >= 0.
+Demand = List[Tuple[int, int, int]]
+
+
+def _demand_at(demand: Demand, n: int) -> Tuple[int, int]:
+    """(value, slope) of a demand at n."""
+    for start, value, slope in reversed(demand):
+        if start <= n:
+            return value + slope * (n - start), slope
+    return 0, 0
+
+
+def _add_demand(a: Demand, b: Demand, factor: int) -> Demand:
+    """a + factor * b"""
+    starts = sorted({start for start, _, _ in a} | {start for start, _, _ in b})
+    merged = []
+    for start in starts:
+        value_a, slope_a = _demand_at(a, start)
+        value_b, slope_b = _demand_at(b, start)
+        merged.append((start, value_a + factor * value_b, slope_a + factor * slope_b))
+    return merged
+
+
+def _first_above(demand: Demand, limit: int) -> Optional[int]:
+    """Smallest n whose demand exceeds limit, or None if it never does."""
+    for idx, (start, value, slope) in enumerate(demand):
+        if value > limit:
+            return start
+        if slope:
+            n = start + (limit - value) // slope + 1
+            if idx + 1 == len(demand) or n < demand[idx + 1][0]:
+                return n
+    return None
+
+
+def _shortfall(demand: Demand, stock: int) -> Demand:
+    """max(0, demand - stock): how many must be crafted once stock is used up."""
+    first = _first_above(demand, stock)
+    if first is None:
+        return [(0, 0, 0)]
+    value, slope = _demand_at(demand, first)
+    shifted = [(start, v - stock, s) for start, v, s in demand if start > first]
+    return ([(0, 0, 0)] if first else []) + [(first, value - stock, slope)] + shifted
+
+
+class RecipeBook:
+    """
+    All known crafting recipes, indexed by output and by ingredient.
+    Expansion orders and raw material costs per item are memoized until
+    the recipe set changes.
+    """
+    def __init__(self):
+        self.recipes: Dict[str, CraftingRecipe] = {}  # output_item_id: recipe
+        self.by_ingredient: Dict[str, List[CraftingRecipe]] = {}
+        self._orders: Dict[str, List[str]] = {}
+        self._raw_costs: Dict[str, Dict[str, int]] = {}
+        self.listeners: List[Callable[[CraftingRecipe], None]] = []  # called with each added recipe
+
+    def add_recipe(self, recipe: CraftingRecipe):
+        replaced = self.recipes.get(recipe.output_item_id)
+        if replaced:
+            for item_id in replaced.required_items:
+                self.by_ingredient[item_id].remove(replaced)
+        self.recipes[recipe.output_item_id] = recipe
+        for item_id in recipe.required_items:
+            self.by_ingredient.setdefault(item_id, []).append(recipe)
+        self._orders.clear()
+        self._raw_costs.clear()
+        for listener in self.listeners:
+            listener(recipe)
+
+    def get_recipe(self, output_item_id: str) -> Optional[CraftingRecipe]:
+        return self.recipes.get(output_item_id)
+
+    def recipes_using(self, item_id: str) -> List[CraftingRecipe]:
+        """Every recipe that takes this item as an ingredient."""
+        return self.by_ingredient.get(item_id, [])
+
+    def expansion_order(self, item_id: str) -> List[str]:
+        """
+        The item and everything it can be crafted from, ordered so each item
+        comes before its ingredients (a topological order of the recipe tree).
+        """
+        order = self._orders.get(item_id)
+        if order is not None:
+            return order
+        visited = set()
+        in_progress = set()
+        post_order = []
+
+        def visit(current: str):
+            if current in visited:
+                return
+            if current in in_progress:
+                raise ValueError(f"Recipe cycle detected at {current!r}")
+            in_progress.add(current)
+            recipe = self.recipes.get(current)
+            if recipe:
+                for ingredient in recipe.required_items:
+                    visit(ingredient)
+            in_progress.discard(current)
+            visited.add(current)
+            post_order.append(current)
+
+        visit(item_id)
+        order = post_order[::-1]
+        self._orders[item_id] = order
+        return order
+
+    def raw_cost(self, item_id: str) -> Dict[str, int]:
+        """Base materials needed to craft one item from scratch."""
+        cost = self._raw_costs.get(item_id)
+        if cost is not None:
+            return cost
+        recipe = self.recipes.get(item_id)
+        if not recipe:
+            cost = {item_id: 1}
+        else:
+            cost = {}
+            for ingredient, amount in recipe.required_items.items():
+                for material, count in self.raw_cost(ingredient).items():
+                    cost[material] = cost.get(material, 0) + count * amount
+        self._raw_costs[item_id] = cost
+        return cost
+
+    def plan(self, item_id: str, quantity: int, inventory: Dict[str, int]) -> Optional[Dict[str, int]]:
+        """
+        Work out how to make `quantity` of an item, using stock first and crafting
+        any missing intermediates. Returns {item_id: amount to craft} or None if
+        the inventory cannot cover it.
+        """
+        if quantity < 1:
+            raise ValueError(f"Cannot plan {quantity} of {item_id!r}: quantity must be at least 1")
+        needed = {item_id: quantity}
+        crafts: Dict[str, int] = {}
+        for current in self.expansion_order(item_id):
+            want = needed.get(current, 0)
+            if not want:
+                continue
+            # The requested item itself is always crafted, never taken from stock
+            deficit = want if current == item_id else max(0, want - inventory.get(current, 0))
+            if not deficit:
+                continue
+            recipe = self.recipes.get(current)
+            if not recipe:
+                return None
+            crafts[current] = deficit
+            for ingredient, amount in recipe.required_items.items():
+                needed[ingredient] = needed.get(ingredient, 0) + deficit * amount
+        return crafts
+
+    def max_craftable(self, item_id: str, inventory: Dict[str, int]) -> int:
+        """
+        Largest quantity of an item that can be crafted from the inventory, in
+        one pass over its expansion order. Rather than planning each candidate
+        quantity, every item's demand is kept as a piecewise linear function of
+        the quantity n, following plan(): intermediates are crafted only for
+        the part of their demand stock cannot cover, and each raw material then
+        caps n at the point its demand outgrows its stock.
+        """
+        if item_id not in self.recipes:
+            return 0
+        needed: Dict[str, Demand] = {item_id: [(0, 0, 1)]}
+        best: Optional[int] = None
+        for current in self.expansion_order(item_id):
+            demand = needed.get(current)
+            if demand is None:
+                continue
+            recipe = self.recipes.get(current)
+            if not recipe:
+                first = _first_above(demand, inventory.get(current, 0))
+                if first is not None and (best is None or first - 1 < best):
+                    best = first - 1
+                continue
+            crafted = demand if current == item_id else _shortfall(demand, inventory.get(current, 0))
+            for ingredient, amount in recipe.required_items.items():
+                needed[ingredient] = _add_demand(needed.get(ingredient, [(0, 0, 0)]), crafted, amount)
+        # None only when no raw material is ever needed (a recipe without ingredients): nothing to count
+        return max(0, best) if best is not None else 0
+
+    def craftable_summary(self, inventory_manager: InventoryManager) -> Dict[str, int]:
+        """Maximum craftable quantity of every recipe from one inventory snapshot."""
+        snapshot = dict(inventory_manager.get_all_items())
+        return {item_id: self.max_craftable(item_id, snapshot) for item_id in self.recipes}
+
+    def craft_many(self, recipe: CraftingRecipe, n: int, inventory_manager: InventoryManager,
+                   history: Optional[UndoHistory] = None) -> int:
+        """
+        Craft n of a recipe's output, crafting missing intermediates along the way.
+        The inventory is only touched if the whole batch can be made and stored.
+        Returns the number crafted (n or 0). Pass an UndoHistory to be able to
+        undo the craft.
+        """
+        if n < 1:
+            output.emit(f"Cannot craft {n} items.", "craft_failed", item_id=recipe.output_item_id)
+            return 0
+        inventory = inventory_manager.get_all_items()
+        crafts = self.plan(recipe.output_item_id, n, inventory)
+        if crafts is None:
+            output.emit("Not enough materials.", "craft_failed", item_id=recipe.output_item_id)
+            return 0
+        if history:
+            history.checkpoint()
+
+        # Net change per item: crafted outputs minus consumed ingredients
+        delta: Dict[str, int] = {}
+        for output_id, count in crafts.items():
+            delta[output_id] = delta.get(output_id, 0) + count
+            for ingredient, amount in self.recipes[output_id].required_items.items():
+                delta[ingredient] = delta.get(ingredient, 0) - count * amount
+        if not apply_changes(inventory_manager, delta):
+            if history:
+                history.discard()
+            output.emit("No room for the crafted items.", "craft_failed", item_id=recipe.output_item_id)
+            return 0
+
+        if output.enabled:
+            item = item_registry.get_item(recipe.output_item_id)
+            output.emit(f"Crafted {n}x {item.name if item else recipe.output_item_id}!", "crafted",
+                        item_id=recipe.output_item_id, quantity=n)
+        return n
+
+class CraftabilityTracker:
+    """
+    Keeps the set of directly craftable recipes current as an inventory changes.
+    Each recipe tracks how many of its ingredients are short; an inventory change
+    only revisits the recipes that use the changed item, and a recipe added to
+    the book is counted as it arrives.
+    """
+    def __init__(self, book: RecipeBook, inventory_manager: InventoryManager):
+        self.book = book
+        self.inventory_manager = inventory_manager
+        self.missing: Dict[str, int] = {}  # output_item_id: number of short ingredients
+        self.craftable: Set[str] = set()
+        inventory_manager.listeners.append(self.on_inventory_change)
+        book.listeners.append(self.on_recipe_added)
+        self.rebuild()
+
+    def rebuild(self):
+        """Recount every recipe from scratch."""
+        self.missing = {}
+        self.craftable = set()
+        for recipe in self.book.recipes.values():
+            self.on_recipe_added(recipe)
+
+    def on_recipe_added(self, recipe: CraftingRecipe):
+        inventory = self.inventory_manager.get_all_items()
+        output_id = recipe.output_item_id
+        short = sum(1 for item_id, amount in recipe.required_items.items() if inventory.get(item_id, 0) < amount)
+        self.missing[output_id] = short
+        if short:
+            self.craftable.discard(output_id)
+        else:
+            self.craftable.add(output_id)
+
+    def on_inventory_change(self, item_id: str, old: int, new: int):
+        for recipe in self.book.recipes_using(item_id):
+            amount = recipe.required_items[item_id]
+            was_short, is_short = old < amount, new < amount
+            if was_short == is_short:
+                continue
+            output_id = recipe.output_item_id
+            self.missing[output_id] += 1 if is_short else -1
+            if self.missing[output_id]:
+                self.craftable.discard(output_id)
+            else:
+                self.craftable.add(output_id)
+
+    def detach(self):
+        self.inventory_manager.listeners.remove(self.on_inventory_change)
+        self.book.listeners.remove(self.on_recipe_added)
+
+recipe_book = RecipeBook()
+
+# Example multi-level recipes
+iron_shard_recipe = CraftingRecipe(
+    output_item_id="iron_shard",
+    required_items={"iron_ore": 2, "coal": 1}
+)
+
+def register_all_recipes():
+    recipe_book.add_recipe(iron_blade_recipe)
+    recipe_book.add_recipe(iron_shard_recipe)
+
+# Sample usage
+if __name__ == "__main__":
+    from items import register_all_items
+    register_all_items()
+    register_all_recipes()
+
+    inv = InventoryManager()
+    inv.add_item("iron_ore", 20)
+    inv.add_item("coal", 8)
+    inv.add_item("iron_shard", 1)
+    inv.add_item("wood", 5)
+
+    tracker = CraftabilityTracker(recipe_book, inv)
+    recipe_book.add_recipe(CraftingRecipe(output_item_id="wooden_shield", required_items={"wood": 4}))
+    print("Craftable:", recipe_book.craftable_summary(inv), "directly:", sorted(tracker.craftable))
+    iron_shard_recipe.craft(inv)
+    print("Shard crafted by hand, short ingredients:", tracker.missing)
+    history = UndoHistory(inv)
+    recipe_book.craft_many(iron_blade_recipe, 3, inv, history)
+    print("Updated Inventory:", inv.get_all_items())
+    print("Directly craftable now:", sorted(tracker.craftable))
+    recipe_book.craft_many(iron_blade_recipe, 5, inv)
+    history.undo()
+    print("After undo:", inv.get_all_items(), "craftable:", sorted(tracker.craftable))
@@ -40,6 +40,10 @@ class CurrencyManager:
             return from_cur.exchange_rate / to_cur.exchange_rate
         return 1.0
 
+    def get_player_gold(self, player) -> float:
+        """The player's Gold balance."""
+        return player.get_balance("Gold")
+
 currency_manager = CurrencyManager()
 
 # Base currency is Gold (standard currency)
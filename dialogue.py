@@ -0,0 +1,306 @@
+# dialogue.py
+# Branching dialogue graphs with compiled conditions for the Anime RPG
+
+import operator
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from schedule import game_clock
+
+# Comparison opcodes allowed in conditions
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+# A compiled condition is a tuple of (loader, comparison, constant) instructions
+Instruction = Tuple[Callable[['DialogueContext'], Any], Callable[[Any, Any], bool], Any]
+Program = Tuple[Instruction, ...]
+
+
+def time_of_day(hour: int) -> str:
+    """Map an hour (0-23) to the time-of-day bucket used by dialogue conditions."""
+    if 6 <= hour < 12:
+        return "morning"
+    elif 12 <= hour < 18:
+        return "afternoon"
+    return "evening"
+
+
+class DialogueContext:
+    """
+    Snapshot of the state a dialogue condition can read.
+    """
+    __slots__ = ("role", "time_of_day", "gold", "quest_states")
+
+    def __init__(self, role: str, time_of_day: str, gold: int = 0, quest_states: Optional[Dict[str, str]] = None):
+        self.role = role
+        self.time_of_day = time_of_day
+        self.gold = gold
+        self.quest_states = quest_states or {}  # quest_id: "active" or "completed"
+
+    @classmethod
+    def for_interaction(cls, villager, player, hour: Optional[int] = None) -> 'DialogueContext':
+        """Build a context for a player talking to a villager."""
+        if hour is None:
+            hour = game_clock.hour
+        quest_states = {}
+        for quest_id, quest in getattr(player, "quests", {}).items():
+            quest_states[quest_id] = "completed" if quest.is_completed else "active"
+        if hasattr(player, "get_balance"):
+            gold = player.get_balance("Gold")
+        else:
+            gold = getattr(player, "gold", 0)
+        return cls(villager.role, time_of_day(hour), gold, quest_states)
+
+
+def _load_role(ctx: DialogueContext):
+    return ctx.role
+
+def _load_time(ctx: DialogueContext):
+    return ctx.time_of_day
+
+def _load_gold(ctx: DialogueContext):
+    return ctx.gold
+
+def _quest_loader(quest_id: str) -> Callable[[DialogueContext], str]:
+    def load_quest(ctx: DialogueContext) -> str:
+        return ctx.quest_states.get(quest_id, "none")
+    return load_quest
+
+_LOADERS: Dict[str, Callable[[DialogueContext], Any]] = {
+    "role": _load_role,
+    "time": _load_time,
+    "gold": _load_gold,
+}
+
+# Compiled programs are shared between every node that uses the same condition text
+_compiled_conditions: Dict[Tuple[str, ...], Program] = {}
+
+
+def compile_conditions(conditions: List[str]) -> Program:
+    """
+    Compile condition strings such as "gold >= 50", "time == morning", "role == Merchant"
+    or "quest.quest_1 == active" into a program that can be evaluated without re-parsing.
+    """
+    key = tuple(conditions)
+    program = _compiled_conditions.get(key)
+    if program is not None:
+        return program
+
+    instructions = []
+    for condition in conditions:
+        parts = condition.split(None, 2)
+        if len(parts) != 3 or parts[1] not in _OPERATORS:
+            raise ValueError(f"Invalid dialogue condition: {condition!r}")
+        subject, op, value = parts
+        if subject.startswith("quest."):
+            loader = _quest_loader(sys.intern(subject[len("quest."):]))
+        elif subject in _LOADERS:
+            loader = _LOADERS[subject]
+        else:
+            raise ValueError(f"Unknown dialogue condition subject: {subject!r}")
+        constant = int(value) if subject == "gold" else sys.intern(value)
+        instructions.append((loader, _OPERATORS[op], constant))
+
+    program = tuple(instructions)
+    _compiled_conditions[key] = program
+    return program
+
+
+def evaluate(program: Program, ctx: DialogueContext) -> bool:
+    """Run a compiled condition program against a context."""
+    for loader, compare, constant in program:
+        if not compare(loader(ctx), constant):
+            return False
+    return True
+
+
+class DialogueChoice:
+    """A player reply that leads to another node."""
+    __slots__ = ("text", "next_node", "conditions")
+
+    def __init__(self, text: str, next_node: Optional[str], conditions: Program = ()):
+        self.text = sys.intern(text)
+        self.next_node = next_node  # None ends the conversation
+        self.conditions = conditions
+
+
+class DialogueNode:
+    """
+    A single step in a dialogue graph. The first line whose conditions pass is spoken.
+    """
+    __slots__ = ("node_id", "lines", "choices")
+
+    def __init__(self, node_id: str, lines: Tuple[Tuple[str, Program], ...], choices: Tuple[DialogueChoice, ...]):
+        self.node_id = node_id
+        self.lines = lines
+        self.choices = choices
+
+    def line_for(self, ctx: DialogueContext) -> Optional[str]:
+        for text, conditions in self.lines:
+            if evaluate(conditions, ctx):
+                return text
+        return None
+
+    def available_choices(self, ctx: DialogueContext) -> List[DialogueChoice]:
+        return [c for c in self.choices if evaluate(c.conditions, ctx)]
+
+
+class DialogueGraph:
+    """
+    A branching dialogue shared by any number of villagers.
+    """
+    def __init__(self, graph_id: str, start_node: str, nodes: Dict[str, DialogueNode]):
+        self.graph_id = graph_id
+        self.start_node = start_node
+        self.nodes = nodes
+
+    def get_node(self, node_id: str) -> Optional[DialogueNode]:
+        return self.nodes.get(node_id)
+
+    def opening_line(self, ctx: DialogueContext) -> Optional[str]:
+        """The start node's line for this context, or None if no line's conditions pass."""
+        return self.nodes[self.start_node].line_for(ctx)
+
+    def advance(self, node: DialogueNode, choice: DialogueChoice) -> Optional[DialogueNode]:
+        """Follow a choice to the next node, or None if the conversation ends."""
+        if choice.next_node is None:
+            return None
+        return self.nodes[choice.next_node]
+
+
+class DialogueRegistry:
+    """
+    Loads dialogue graphs from data and keeps one compiled copy of each.
+    """
+    def __init__(self):
+        self.graphs: Dict[str, DialogueGraph] = {}
+
+    def load_graph(self, graph_id: str, data: dict) -> DialogueGraph:
+        """
+        Compile a graph from data of the form:
+        {"start": node_id, "nodes": {node_id: {"lines": [{"text": ..., "if": [...]}],
+                                               "choices": [{"text": ..., "next": ..., "if": [...]}]}}}
+        Nodes may also be pulled in from an already loaded graph with {"include": "graph_id.node_id"}.
+        """
+        nodes: Dict[str, DialogueNode] = {}
+        for node_id, node_data in data["nodes"].items():
+            if "include" in node_data:
+                self._include(nodes, node_id, node_data["include"])
+                continue
+            lines = tuple(
+                (sys.intern(line["text"]), compile_conditions(line.get("if", [])))
+                for line in node_data.get("lines", [])
+            )
+            choices = tuple(
+                DialogueChoice(c["text"], c.get("next"), compile_conditions(c.get("if", [])))
+                for c in node_data.get("choices", [])
+            )
+            nodes[node_id] = DialogueNode(sys.intern(node_id), lines, choices)
+
+        if data["start"] not in nodes:
+            raise ValueError(f"Dialogue graph {graph_id!r} starts at unknown node {data['start']!r}")
+        for node in nodes.values():
+            for choice in node.choices:
+                if choice.next_node is not None and choice.next_node not in nodes:
+                    raise ValueError(f"Dialogue graph {graph_id!r}: {node.node_id!r} leads to unknown node "
+                                     f"{choice.next_node!r}")
+        graph = DialogueGraph(graph_id, data["start"], nodes)
+        self.graphs[graph_id] = graph
+        return graph
+
+    def _include(self, nodes: Dict[str, DialogueNode], node_id: str, reference: str):
+        """
+        Copy an included node into `nodes` as `node_id`, along with every node
+        reachable from it under "graph_id.node_id" names, so choices on the
+        copies lead to nodes of the including graph. Lines and conditions are
+        shared with the source graph.
+        """
+        source_graph_id, source_node = reference.split(".", 1)
+        source = self.graphs[source_graph_id]
+
+        def local_id(source_id: str) -> str:
+            return sys.intern(node_id) if source_id == source_node else sys.intern(f"{source_graph_id}.{source_id}")
+
+        pending, seen = [source_node], {source_node}
+        while pending:
+            source_id = pending.pop()
+            node = source.nodes[source_id]
+            choices = []
+            for choice in node.choices:
+                next_node = choice.next_node
+                if next_node is not None and next_node not in seen:
+                    seen.add(next_node)
+                    pending.append(next_node)
+                choices.append(DialogueChoice(choice.text, None if next_node is None else local_id(next_node),
+                                              choice.conditions))
+            nodes[local_id(source_id)] = DialogueNode(local_id(source_id), node.lines, tuple(choices))
+
+    def get_graph(self, graph_id: str) -> Optional[DialogueGraph]:
+        return self.graphs.get(graph_id)
+
+dialogue_registry = DialogueRegistry()
+
+# Sample dialogue graphs
+def register_sample_dialogue():
+    dialogue_registry.load_graph("common", {
+        "start": "farewell",
+        "nodes": {
+            "farewell": {
+                "lines": [{"text": "Safe travels, adventurer."}],
+                "choices": [{"text": "Any advice?", "next": "advice"}],
+            },
+            "advice": {"lines": [{"text": "Stay on the roads after dark."}]},
+        },
+    })
+    dialogue_registry.load_graph("merchant", {
+        "start": "greet",
+        "nodes": {
+            "greet": {
+                "lines": [
+                    {"text": "Up early? The freshest goods are out now!", "if": ["time == morning"]},
+                    {"text": "Looking for something special? I've got items for sale!"},
+                ],
+                "choices": [
+                    {"text": "Show me your rare wares.", "next": "rare", "if": ["gold >= 100"]},
+                    {"text": "About the goblins...", "next": "goblins", "if": ["quest.quest_1 == active"]},
+                    {"text": "Goodbye.", "next": "farewell"},
+                ],
+            },
+            "rare": {"lines": [{"text": "Only the finest for a customer of means."}]},
+            "goblins": {"lines": [{"text": "They camp east of the river. Be careful!"}]},
+            "farewell": {"include": "common.farewell"},
+        },
+    })
+
+# Debug Example
+if __name__ == "__main__":
+    register_sample_dialogue()
+    merchant = dialogue_registry.get_graph("merchant")
+    ctx = DialogueContext("Merchant", time_of_day(9), gold=150, quest_states={"quest_1": "active"})
+
+    node = merchant.get_node(merchant.start_node)
+    while node:
+        print(f"Zara: {node.line_for(ctx)}")
+        choices = node.available_choices(ctx)
+        if not choices:
+            break
+        for idx, c in enumerate(choices, 1):
+            print(f"{idx}. {c.text}")
+        node = merchant.advance(node, choices[-1])
+
+    # Gold-gated choices read the player's Gold balance
+    from types import SimpleNamespace
+    from character import Player
+    player = Player("Kai")
+    zara = SimpleNamespace(role="Merchant")
+    greet = merchant.get_node(merchant.start_node)
+    for gold in (50, 150):
+        player.set_currency_balance("Gold", gold)
+        texts = [c.text for c in greet.available_choices(DialogueContext.for_interaction(zara, player, hour=9))]
+        print(f"With {gold} gold: {texts}")
+    assert "Show me your rare wares." in texts, "gold-gated choice should appear once affordable"
@@ -0,0 +1,202 @@
+# encounters.py
+# Weighted encounter tables per region, zone and village for the Anime RPG
+
+import random
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from enemies import Enemy, EnemyFactory, enemy_factory
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table: O(n) to build, then every weighted pick costs one
+    random number and one comparison no matter how many entries there are.
+    """
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("AliasTable needs at least one positive weight")
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Whatever is left over is 1.0 up to rounding error
+
+    def sample(self, rng: random.Random) -> int:
+        u = rng.random() * len(self.prob)
+        idx = int(u)
+        return idx if u - idx < self.prob[idx] else self.alias[idx]
+
+
+class SpawnEntry:
+    """One row of a spawn table: who leads the group, at what levels, and who comes along."""
+    def __init__(self, template_id: str, weight: float, level_band: Tuple[int, int] = (1, 1),
+                 group_size: Tuple[int, int] = (1, 1), escorts: Sequence[Tuple[str, int]] = ()):
+        self.template_id = template_id
+        self.weight = weight
+        self.level_band = level_band  # Inclusive (min, max) level for every enemy in the group
+        self.group_size = group_size  # Inclusive (min, max) copies of the template
+        self.escorts = tuple(escorts)  # (template_id, max count) joining the group, 0..max each
+
+
+class SpawnTable:
+    """
+    Weighted spawn table for one area. `encounter_chance` is the probability
+    that an exploration step there meets anything at all.
+    """
+    def __init__(self, entries: Sequence[SpawnEntry], encounter_chance: float = 1.0):
+        self.entries = list(entries)
+        self.encounter_chance = encounter_chance
+        self.alias = AliasTable([entry.weight for entry in self.entries])
+
+    def roll(self, rng: random.Random) -> Optional[List[Tuple[str, int]]]:
+        """Group composition as (template_id, level) pairs, or None for a quiet step."""
+        if rng.random() >= self.encounter_chance:
+            return None
+        entry = self.entries[self.alias.sample(rng)]
+        low, high = entry.level_band
+        group = [(entry.template_id, rng.randint(low, high)) for _ in range(rng.randint(*entry.group_size))]
+        for template_id, max_count in entry.escorts:
+            group.extend((template_id, rng.randint(low, high)) for _ in range(rng.randint(0, max_count)))
+        return group
+
+
+class Encounter:
+    __slots__ = ("key", "enemies")
+
+    def __init__(self, key: str, enemies: List[Enemy]):
+        self.key = key
+        self.enemies = enemies
+
+    def __repr__(self):
+        return f"Encounter({self.key}: {', '.join(f'{e.name} Lv{e.level}' for e in self.enemies)})"
+
+
+class EncounterService:
+    """
+    Rolls encounters from spawn tables keyed "zone:<id>", "village:<name>" or
+    "region:<name>". Each key keeps a ring buffer of pre-rolled encounters
+    (enemies already built) that exploration pops from, and is refilled in
+    batches when the game is idle. Every key draws from its own seeded RNG, so
+    the sequence of encounters in one area does not depend on the others.
+    """
+    def __init__(self, factory: EnemyFactory = enemy_factory, buffer_size: int = 16, seed: Optional[int] = None):
+        self.factory = factory
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.tables: Dict[str, SpawnTable] = {}
+        self.buffers: Dict[str, Deque[Optional[Encounter]]] = {}
+        self._rngs: Dict[str, random.Random] = {}
+
+    def add_table(self, key: str, table: SpawnTable):
+        self.tables[key] = table
+        self.buffers[key] = deque(maxlen=self.buffer_size)
+
+    def reseed(self, seed: int):
+        """Restart every area's RNG from a new seed and drop encounters rolled with the old one."""
+        self.seed = seed
+        self._rngs.clear()
+        for buffer in self.buffers.values():
+            buffer.clear()
+
+    def _rng(self, key: str) -> random.Random:
+        rng = self._rngs.get(key)
+        if rng is None:
+            rng = self._rngs[key] = random.Random(f"{self.seed}:{key}" if self.seed is not None else None)
+        return rng
+
+    def table_for(self, zone: Optional[str] = None, village: Optional[str] = None,
+                  region: Optional[str] = None) -> Optional[str]:
+        """The most specific table key available: zone, then village, then region."""
+        for key in (f"zone:{zone}" if zone else None, f"village:{village}" if village else None,
+                    f"region:{region}" if region else None):
+            if key in self.tables:
+                return key
+        return None
+
+    def roll(self, key: str) -> Optional[Encounter]:
+        group = self.tables[key].roll(self._rng(key))
+        if group is None:
+            return None
+        return Encounter(key, [self.factory.create_enemy(template_id, level) for template_id, level in group])
+
+    def roll_many(self, key: str, n: int) -> List[Optional[Encounter]]:
+        """Roll the next n steps in one batch; None entries are steps without an encounter."""
+        table, rng, create = self.tables[key], self._rng(key), self.factory.create_enemy
+        rolled = []
+        for _ in range(n):
+            group = table.roll(rng)
+            rolled.append(Encounter(key, [create(t, level) for t, level in group]) if group is not None else None)
+        return rolled
+
+    def refill(self, key: Optional[str] = None):
+        """Top up one area's ring buffer (or all of them) to capacity."""
+        for k in ([key] if key else list(self.buffers)):
+            buffer = self.buffers[k]
+            missing = self.buffer_size - len(buffer)
+            if missing > 0:
+                buffer.extend(self.roll_many(k, missing))
+
+    def next_encounter(self, key: str) -> Optional[Encounter]:
+        """The next step's encounter from the buffer, rolled on the spot only if the buffer ran dry."""
+        buffer = self.buffers[key]
+        if buffer:
+            return buffer.popleft()
+        return self.roll(key)
+
+encounter_service = EncounterService()
+
+
+# Sample spawn tables for the sample world
+def register_sample_encounters(service: EncounterService = encounter_service):
+    service.add_table("region:Forest of Shadows", SpawnTable([
+        SpawnEntry("goblin", 10, (1, 5), (1, 2)),
+    ], encounter_chance=0.3))
+    service.add_table("region:Crystal Mountain", SpawnTable([
+        SpawnEntry("goblin", 8, (4, 10), (1, 3)),
+        SpawnEntry("dragon", 1, (8, 12)),
+    ], encounter_chance=0.4))
+    service.add_table("zone:dark_woods", SpawnTable([
+        SpawnEntry("goblin", 6, (3, 8), (2, 4)),
+        SpawnEntry("dragon", 1, (10, 15), escorts=[("goblin", 2)]),
+    ], encounter_chance=0.8))
+    service.add_table("zone:dragon_peak", SpawnTable([
+        SpawnEntry("dragon", 5, (15, 25)),
+        SpawnEntry("goblin", 3, (8, 12), (3, 5)),
+    ]))
+    service.add_table("village:Stonebrook", SpawnTable([
+        SpawnEntry("goblin", 1, (1, 2)),
+    ], encounter_chance=0.1))
+
+# Sampling check
+if __name__ == "__main__":
+    import time
+    from collections import Counter
+    from enemies import register_all_enemies
+
+    weights = [1, 5, 20, 74]
+    table = AliasTable(weights)
+    rng = random.Random(2)
+    counts = Counter(table.sample(rng) for _ in range(1_000_000))
+    print("Alias frequencies:", [round(counts[i] / 1e4, 2) for i in range(len(weights))], "expected", weights)
+
+    register_all_enemies()
+    register_sample_encounters()
+    encounter_service.reseed(9)
+    start = time.perf_counter()
+    encounter_service.refill()
+    print(f"Pre-rolled {encounter_service.buffer_size} steps for {len(encounter_service.tables)} areas "
+          f"in {(time.perf_counter() - start) * 1e3:.2f} ms")
+    start = time.perf_counter()
+    for _ in range(10_000):
+        encounter_service.next_encounter("zone:dark_woods")
+    print(f"next_encounter: {(time.perf_counter() - start) / 10_000 * 1e6:.2f} us per step once the buffer is empty")
+    print(encounter_service.roll("zone:dragon_peak"))
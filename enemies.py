@@ -3,9 +3,16 @@
 
 import random
 import uuid
-from typing import List, Dict, Callable
-from character import Character
+from typing import List, Dict, Callable, Optional
+from character import Character, StatusEffect
 from items import get_random_loot, item_registry
+from metrics import metrics, timed
+from profiler import profiler
+from output import output
+from skills import skill_registry
+
+# Status effect stats and the Enemy attributes they wear down
+STATUS_STATS = {'HP': 'hp', 'Attack': 'atk', 'Defense': 'defense', 'Speed': 'speed'}
 
 class Enemy:
     def __init__(
@@ -23,6 +30,7 @@ class Enemy:
         special_abilities: List[Callable] = [],
         battle_intro: str = "",
         ascii_art: str = "",
+        items: Optional[Dict[str, int]] = None,  # Consumables carried into battle: item_id: count
     ):
         self.enemy_id = enemy_id
         self.name = name
@@ -38,6 +46,8 @@ class Enemy:
         self.special_abilities = special_abilities
         self.battle_intro = battle_intro
         self.ascii_art = ascii_art
+        self.items = items or {}
+        self.status_effects: List[StatusEffect] = []
 
     def is_alive(self) -> bool:
         return self.hp > 0
@@ -45,12 +55,34 @@ class Enemy:
     def take_damage(self, amount: int):
         reduced = max(1, amount - self.defense)
         self.hp -= reduced
-        print(f"{self.name} took {reduced} damage! HP left: {self.hp}")
-        if self.hp <= 0:
-            print(f"{self.name} has been defeated!")
+        if output.enabled:
+            output.emit(f"{self.name} took {reduced} damage! HP left: {self.hp}", "damage", target=self.name,
+                        amount=reduced, hp=self.hp)
+            if self.hp <= 0:
+                output.emit(f"{self.name} has been defeated!", "defeated", name=self.name)
+
+    def apply_status(self, status: StatusEffect):
+        if output.enabled:
+            output.emit(f"{self.name} is now affected by {status.name}!", "status", target=self.name, status=status.name)
+        self.status_effects.append(status)
+
+    def update_status_effects(self):
+        remaining = []
+        for effect in self.status_effects:
+            for stat, value in effect.effect.items():
+                if stat in STATUS_STATS:
+                    attr = STATUS_STATS[stat]
+                    setattr(self, attr, max(0, getattr(self, attr) - value))
+            if not effect.tick():
+                remaining.append(effect)
+        self.status_effects = remaining
+
+    def heal(self, amount: int):
+        self.hp = min(self.max_hp, self.hp + amount)
 
     def attack_target(self, target: Character):
-        print(f"{self.name} attacks {target.name}!")
+        if output.enabled:
+            output.emit(f"{self.name} attacks {target.name}!", "attack", attacker=self.name, target=target.name)
         target.take_damage(self.atk)
 
     def drop_loot(self) -> List[str]:
@@ -67,18 +99,11 @@ class Enemy:
 
     def show_ascii(self):
         if self.ascii_art:
-            print(self.ascii_art)
-
-# Example special abilities
-def fire_blast(enemy: 'Enemy', target: Character):
-    dmg = enemy.atk + 10
-    print(f"🔥 {enemy.name} casts Fire Blast!")
-    target.take_damage(dmg)
+            output.emit(self.ascii_art, "ascii_art")
 
-def heal_self(enemy: 'Enemy', target: Character):
-    heal_amt = min(20, enemy.max_hp - enemy.hp)
-    enemy.hp += heal_amt
-    print(f"✨ {enemy.name} heals for {heal_amt} HP!")
+# Example special abilities, defined as data in the skill registry
+fire_blast = skill_registry.get_skill("fire_blast").cast
+heal_self = skill_registry.get_skill("heal_self").cast
 
 # Enemy Factory
 class EnemyFactory:
@@ -107,7 +132,8 @@ class EnemyFactory:
             loot_table=template.loot_table,
             special_abilities=template.special_abilities,
             battle_intro=template.battle_intro,
-            ascii_art=template.ascii_art
+            ascii_art=template.ascii_art,
+            items=dict(template.items)
         )
         return new_enemy
 
@@ -153,6 +179,7 @@ dragon = Enemy(
     gold_reward=500,
     loot_table={"buff_atk10": 0.5, "iron_sword": 0.1},
     special_abilities=[fire_blast, heal_self],
+    items={"potion_hp50": 1},
     battle_intro="🔥 A mighty Fire Dragon descends from the sky!",
     ascii_art="""
               __====-_  _-====__
@@ -174,35 +201,57 @@ def register_all_enemies():
     enemy_factory.register_template(dragon)
 
 # Example battle simulator
-def simulate_battle(player: Character, enemy: Enemy):
-    print(enemy.battle_intro)
+@timed("battle_seconds")
+def simulate_battle(player: Character, enemy: Enemy, tactics=None):
+    # Without tactics (an enemy_ai.EnemyAI) the enemy only ever attacks
+    enemy_turn = tactics.act if tactics else Enemy.attack_target
+    output.emit(enemy.battle_intro, "battle_intro", enemy=enemy.name)
     enemy.show_ascii()
-    print("Battle Start!")
+    output.emit("Battle Start!", "battle_start", player=player.name, enemy=enemy.name)
 
     while player.is_alive() and enemy.is_alive():
-        if player.speed >= enemy.speed:
-            player.attack(enemy)
-            if enemy.is_alive():
-                enemy.attack_target(player)
-        else:
-            enemy.attack_target(player)
-            if player.is_alive():
+        with profiler.action("battle_turn"):
+            if player.speed >= enemy.speed:
                 player.attack(enemy)
+                if enemy.is_alive():
+                    enemy_turn(enemy, player)
+            else:
+                enemy_turn(enemy, player)
+                if player.is_alive():
+                    player.attack(enemy)
+        # A buffered sink writes each turn's messages in one go
+        output.flush()
 
+    metrics.inc("battles_total", outcome="win" if player.is_alive() else "loss")
     if player.is_alive():
-        print(f"{player.name} won! Gained {enemy.exp_reward} EXP and {enemy.gold_reward} gold.")
+        output.emit(f"{player.name} won! Gained {enemy.exp_reward} EXP and {enemy.gold_reward} gold.", "battle_won",
+                    player=player.name, enemy=enemy.name, exp=enemy.exp_reward, gold=enemy.gold_reward)
         loot = enemy.drop_loot()
-        for item_id in loot:
-            item = item_registry.get_item(item_id)
-            if item:
-                print(f"Looted: {item.name}")
+        if output.enabled:
+            for item_id in loot:
+                item = item_registry.get_item(item_id)
+                if item:
+                    output.emit(f"Looted: {item.name}", "loot", item_id=item_id)
     else:
-        print(f"{player.name} was defeated by {enemy.name}...")
+        output.emit(f"{player.name} was defeated by {enemy.name}...", "battle_lost", player=player.name, enemy=enemy.name)
+    output.flush()
 
 # Debug Example
 if __name__ == "__main__":
+    import sys
     from character import Player
     register_all_enemies()
-    player = Player("Kai")
-    gob = enemy_factory.create_enemy("goblin")
-    simulate_battle(player, gob)
+    if "--profile" in sys.argv:
+        # Repeat battles so the sampler collects enough stacks, then write a flame graph input
+        idx = sys.argv.index("--profile")
+        path = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else "battle_profile.collapsed"
+        profiler.start()
+        for _ in range(500):
+            simulate_battle(Player("Kai"), enemy_factory.create_enemy("goblin"))
+        profiler.stop()
+        profiler.write_collapsed(path)
+        print(f"Profile written to {path}: {profiler.action_totals()}")
+    else:
+        player = Player("Kai")
+        gob = enemy_factory.create_enemy("goblin")
+        simulate_battle(player, gob)
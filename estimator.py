@@ -0,0 +1,165 @@
+# estimator.py
+# Analytical combat outcome estimates for matchmaking and encounter selection
+
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from balance import MAX_TURNS, Stats
+
+# How each known special ability changes a turn: (kind, amount)
+#   "damage": an attack with `amount` bonus attack, "heal": restore up to `amount` HP
+SPECIAL_ABILITY_MODELS: Dict[str, Tuple[str, int]] = {
+    "fire_blast": ("damage", 10),
+    "heal_self": ("heal", 20),
+}
+
+# Probability mass below which a branch of the HP-state distribution is dropped
+PRUNE_BELOW = 1e-12
+
+
+class Outcome:
+    """Expected result of one battle, from the player's side."""
+    __slots__ = ("win_prob", "expected_turns", "expected_hp_left")
+
+    def __init__(self, win_prob: float, expected_turns: float, expected_hp_left: float):
+        self.win_prob = win_prob
+        self.expected_turns = expected_turns
+        self.expected_hp_left = expected_hp_left  # Player HP after the battle, counting losses as 0
+
+    def __repr__(self):
+        return (f"Outcome(win_prob={self.win_prob:.3f}, expected_turns={self.expected_turns:.2f}, "
+                f"expected_hp_left={self.expected_hp_left:.1f})")
+
+
+def _hits_to_kill(hp: int, damage: int) -> int:
+    return -(-hp // damage) if damage > 0 else MAX_TURNS + 1
+
+
+@lru_cache(maxsize=65536)
+def estimate(player: Stats, enemy: Stats, specials: Tuple[str, ...] = (), special_chance: float = 0.0,
+             enemy_max_hp: Optional[int] = None) -> Outcome:
+    """
+    Outcome of `player` (hp, attack, defense, speed) against `enemy` under the
+    simulate_battle rules: the faster side acts first (the player on ties),
+    enemy defense lets at least 1 damage through, player defense can absorb a
+    hit completely. On each of its turns the enemy uses one of `specials`
+    (ability function names, picked uniformly) with probability
+    `special_chance`; heals stop at `enemy_max_hp`, which defaults to the
+    enemy's starting HP. Results are cached per stat tuple.
+    """
+    if not specials or special_chance <= 0:
+        return _closed_form(player, enemy)
+    e_hp, e_atk, e_def, e_speed = enemy
+    return _distribution(player, (e_hp, max(e_hp, enemy_max_hp or 0), e_atk, e_def, e_speed),
+                         specials, special_chance)
+
+
+def _closed_form(player: Stats, enemy: Stats) -> Outcome:
+    p_hp, p_atk, p_def, p_speed = player
+    e_hp, e_atk, e_def, e_speed = enemy
+    player_hits = _hits_to_kill(e_hp, max(1, p_atk - e_def))
+    enemy_damage = max(0, e_atk - p_def)
+    enemy_hits = _hits_to_kill(p_hp, enemy_damage)
+    # Striking first wins a tie on hits needed; striking second needs one hit fewer
+    if p_speed >= e_speed:
+        won = player_hits <= enemy_hits
+        landed = player_hits - 1 if won else enemy_hits  # Enemy hits the player takes
+    else:
+        won = player_hits < enemy_hits
+        landed = player_hits if won else enemy_hits
+    turns = min(player_hits if won else enemy_hits, MAX_TURNS)
+    if won and player_hits > MAX_TURNS:
+        won = False
+    return Outcome(1.0 if won else 0.0, turns, max(0, p_hp - landed * enemy_damage) if won else 0.0)
+
+
+def _distribution(player: Stats, enemy: Tuple[int, int, int, int, int], specials: Tuple[str, ...],
+                  special_chance: float) -> Outcome:
+    """
+    Propagate the probability of every (player HP, enemy HP) state turn by turn.
+    `enemy` is (current hp, max hp, attack, defense, speed).
+    """
+    p_hp, p_atk, p_def, p_speed = player
+    e_start, e_max, e_atk, e_def, e_speed = enemy
+    player_damage = max(1, p_atk - e_def)
+    # Enemy actions as (probability, damage to player, heal amount)
+    actions = [(1 - special_chance, max(0, e_atk - p_def), 0)]
+    for name in specials:
+        kind, amount = SPECIAL_ABILITY_MODELS.get(name, ("damage", 0))
+        if kind == "heal":
+            actions.append((special_chance / len(specials), 0, amount))
+        else:
+            actions.append((special_chance / len(specials), max(0, e_atk + amount - p_def), 0))
+    player_first = p_speed >= e_speed
+
+    states = {(p_hp, e_start): 1.0}
+    win_prob = turns_total = hp_left = 0.0
+    for turn in range(1, MAX_TURNS + 1):
+        next_states: Dict[Tuple[int, int], float] = {}
+        for (hp, e_hp), prob in states.items():
+            if player_first:
+                e_hp -= player_damage
+                if e_hp <= 0:
+                    win_prob += prob
+                    turns_total += prob * turn
+                    hp_left += prob * hp
+                    continue
+            for chance, damage, heal in actions:
+                branch = prob * chance
+                if branch < PRUNE_BELOW:
+                    continue
+                new_hp = hp - damage
+                if new_hp <= 0:
+                    turns_total += branch * turn
+                    continue
+                new_e_hp = min(e_max, e_hp + heal)
+                if not player_first:
+                    new_e_hp -= player_damage
+                    if new_e_hp <= 0:
+                        win_prob += branch
+                        turns_total += branch * turn
+                        hp_left += branch * new_hp
+                        continue
+                key = (new_hp, new_e_hp)
+                next_states[key] = next_states.get(key, 0.0) + branch
+        states = next_states
+        if not states:
+            break
+    # Battles still going at the turn limit count as losses, like balance.fight
+    turns_total += sum(states.values()) * MAX_TURNS
+    return Outcome(win_prob, turns_total, hp_left)
+
+
+def estimate_battle(player, enemy, special_chance: float = 0.0) -> Outcome:
+    """Estimate a battle between a PlayerCharacter and an Enemy at their current HP; heals stop at max HP."""
+    player_stats = (player.current_stats['HP'], player.base_stats['Attack'] + player._equipment_stat_total('Attack'),
+                    player.base_stats['Defense'], player.speed)
+    enemy_stats = (enemy.hp, enemy.atk, enemy.defense, enemy.speed)
+    specials = tuple(ability.__name__ for ability in enemy.special_abilities)
+    return estimate(player_stats, enemy_stats, specials, special_chance, enemy.max_hp)
+
+# Accuracy and speed check
+if __name__ == "__main__":
+    import random
+    import time
+    from balance import fight, player_stats
+
+    random.seed(4)
+    cases = [(player_stats(random.randint(1, 40)),
+              (random.randint(20, 800), random.randint(5, 90), random.randint(0, 40), random.randint(1, 20)))
+             for _ in range(2_000)]
+    mismatches = 0
+    for player, enemy in cases:
+        won, turns = fight(player, enemy, random.Random(0))
+        outcome = estimate(player, enemy)
+        mismatches += (outcome.win_prob == 1.0) != won or outcome.expected_turns != turns
+    print(f"Closed form vs fight(): {mismatches} mismatches in {len(cases)} battles")
+
+    start = time.perf_counter()
+    for player, enemy in cases:
+        estimate(player, enemy)
+    print(f"Cached lookups: {(time.perf_counter() - start) / len(cases) * 1e6:.2f} us each")
+
+    player, enemy = player_stats(1), (60, 14, 3, 7)
+    start = time.perf_counter()
+    outcome = estimate(player, enemy, ("fire_blast", "heal_self"), 0.3)
+    print(f"With specials: {outcome} in {(time.perf_counter() - start) * 1e3:.2f} ms uncached")
@@ -0,0 +1,235 @@
+# events.py
+# Data-driven villager events with cooldowns for the Anime RPG
+
+import heapq
+import random
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from dialogue import time_of_day
+from quests import quest_db
+from schedule import GameClock, game_clock
+from output import output
+
+# Event rules. A rule matches on one of "villager" (name), "role" or "trigger"
+# (the villager's event_trigger), optionally only during a time of day.
+EVENT_RULES: List[dict] = [
+    {
+        "event_id": "special_sale",
+        "trigger": "special_sale",
+        "chance": 0.2,
+        "cooldown": 24 * 60,
+        "effects": [
+            {"type": "message", "text": "**{name} has a special offer today!**"},
+            {"type": "message", "text": "{name} is holding a special sale! All items are discounted."},
+            {"type": "discount", "shop": "Village Shop", "percent": 20, "duration": 120},
+            {"type": "trade"},
+        ],
+    },
+    {
+        "event_id": "hidden_secret",
+        "trigger": "hidden_secret",
+        "chance": 0.2,
+        "cooldown": 24 * 60,
+        "effects": [
+            {"type": "message", "text": "**{name} has a special offer today!**"},
+            {"type": "message", "text": "{name} whispers: 'I have a hidden secret for you... investigate the old tree in the forest.'"},
+            {"type": "world_flag", "flag": "old_tree_secret"},
+        ],
+    },
+    {
+        "event_id": "goblin_warning",
+        "role": "Blacksmith",
+        "time": "evening",
+        "chance": 0.1,
+        "cooldown": 3 * 24 * 60,
+        "effects": [
+            {"type": "message", "text": "{name} mutters about goblins raiding the roads at night."},
+            {"type": "quest_unlock", "quest_id": "quest_1"},
+        ],
+    },
+]
+
+
+# Effect handlers: (engine, villager, player, params)
+def _effect_message(engine: 'EventEngine', villager, player, params: dict):
+    output.emit(params["text"].format(name=villager.name), "event_message", villager=villager.name)
+
+def _effect_discount(engine: 'EventEngine', villager, player, params: dict):
+    shop = engine.shops.get(params["shop"])
+    if shop:
+        engine.start_discount(shop, params["percent"] / 100, params.get("duration", 60))
+
+def _effect_trade(engine: 'EventEngine', villager, player, params: dict):
+    if player is not None:
+        villager.trade(player)
+
+def _effect_world_flag(engine: 'EventEngine', villager, player, params: dict):
+    engine.world_flags[params["flag"]] = params.get("value", True)
+
+def _effect_quest_unlock(engine: 'EventEngine', villager, player, params: dict):
+    quest_id = params["quest_id"]
+    engine.unlocked_quests.add(quest_id)
+    quest = quest_db.get_quest(quest_id)
+    if player is not None and quest and not quest.is_completed and hasattr(player, "add_quest"):
+        player.add_quest(quest)
+
+EFFECT_HANDLERS: Dict[str, Callable[['EventEngine', Any, Any, dict], None]] = {
+    "message": _effect_message,
+    "discount": _effect_discount,
+    "trade": _effect_trade,
+    "world_flag": _effect_world_flag,
+    "quest_unlock": _effect_quest_unlock,
+}
+
+
+class EventRule:
+    """A compiled event rule: odds, cooldown and bound effect handlers."""
+    __slots__ = ("event_id", "chance", "cooldown", "effects")
+
+    def __init__(self, event_id: str, chance: float, cooldown: int, effects: Tuple[Tuple[Callable, dict], ...]):
+        self.event_id = event_id
+        self.chance = chance
+        self.cooldown = cooldown
+        self.effects = effects
+
+
+class EventEngine:
+    """
+    Evaluates villager events through an index keyed by (match kind, value, time of day),
+    so each villager only looks at the handful of rules that can apply to it. Cooldowns
+    and timed effects are kept in a single priority queue ordered by expiry. Cooldowns
+    are per villager name, which VillagerManager keeps unique, so they also hold for
+    villagers that were never given an id.
+    """
+    def __init__(self, clock: GameClock, rng: Optional[random.Random] = None):
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.rules: Dict[Tuple[str, str, Optional[str]], List[EventRule]] = {}
+        self.shops: Dict[str, Any] = {}
+        self.world_flags: Dict[str, Any] = {}
+        self.unlocked_quests: Set[str] = set()
+        self._cooling: Set[Tuple[str, str]] = set()  # (villager name, event_id)
+        self._discounts: Dict[str, List[float]] = {}  # shop name: rates of the discounts running there
+        self._timers: List[Tuple[int, int, Callable, Any]] = []  # (due minute, seq, callback, arg)
+        self._timer_seq = 0
+
+    def load_rules(self, rules: List[dict]):
+        """Compile rule data into the lookup index."""
+        for data in rules:
+            effects = []
+            for effect in data["effects"]:
+                handler = EFFECT_HANDLERS.get(effect["type"])
+                if handler is None:
+                    raise ValueError(f"Unknown event effect type: {effect['type']!r}")
+                effects.append((handler, effect))
+            rule = EventRule(data["event_id"], data.get("chance", 1.0), data.get("cooldown", 0), tuple(effects))
+            kinds = [kind for kind in ("villager", "role", "trigger") if kind in data]
+            if len(kinds) != 1:
+                raise ValueError(f"Event rule {data['event_id']!r} must match exactly one of villager, role or trigger")
+            key = (kinds[0], data[kinds[0]], data.get("time"))
+            self.rules.setdefault(key, []).append(rule)
+
+    def register_shop(self, shop):
+        self.shops[shop.name] = shop
+
+    def schedule(self, minutes: int, callback: Callable, arg: Any = None):
+        """Run callback(arg) once the game clock has advanced by the given minutes."""
+        self._timer_seq += 1
+        heapq.heappush(self._timers, (self.clock.minutes + minutes, self._timer_seq, callback, arg))
+
+    def start_discount(self, shop, rate: float, minutes: int):
+        """Discount a shop for a while. Overlapping discounts don't stack: the best one applies."""
+        rates = self._discounts.setdefault(shop.name, [])
+        rates.append(rate)
+        shop.discount = max(rates)
+        self.schedule(minutes, self.end_discount, (shop, rate))
+
+    def end_discount(self, entry: Tuple[Any, float]):
+        """Expire one discount, leaving any others on the same shop running."""
+        shop, rate = entry
+        rates = self._discounts.get(shop.name, [])
+        if rate in rates:
+            rates.remove(rate)
+        if rates:
+            shop.discount = max(rates)
+        else:
+            self._discounts.pop(shop.name, None)
+            shop.discount = 0.0
+
+    def _end_cooldown(self, key: Tuple[str, str]):
+        self._cooling.discard(key)
+
+    def tick(self):
+        """Expire every cooldown and timed effect that is due."""
+        now = self.clock.minutes
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            _, _, callback, arg = heapq.heappop(timers)
+            callback(arg)
+
+    def candidate_rules(self, villager) -> List[EventRule]:
+        bucket = time_of_day(self.clock.hour)
+        rules = self.rules
+        found = []
+        for key in (("villager", villager.name), ("role", villager.role), ("trigger", villager.event_trigger)):
+            found.extend(rules.get((key[0], key[1], bucket), ()))
+            found.extend(rules.get((key[0], key[1], None), ()))
+        return found
+
+    def evaluate(self, villager, player=None, force: bool = False) -> List[str]:
+        """
+        Roll every applicable, off-cooldown rule for a villager and apply the ones that fire.
+        With force=True the chance roll is skipped. Returns the fired event ids.
+        """
+        fired = []
+        for rule in self.candidate_rules(villager):
+            key = (villager.name, rule.event_id)
+            if key in self._cooling:
+                continue
+            if not force and self.rng.random() >= rule.chance:
+                continue
+            for handler, params in rule.effects:
+                handler(self, villager, player, params)
+            if rule.cooldown:
+                self._cooling.add(key)
+                self.schedule(rule.cooldown, self._end_cooldown, key)
+            fired.append(rule.event_id)
+        return fired
+
+    def evaluate_many(self, villagers) -> int:
+        """Batch pass for ambient events across many NPCs (no player involved)."""
+        self.tick()
+        count = 0
+        for villager in villagers:
+            count += len(self.evaluate(villager))
+        return count
+
+event_engine = EventEngine(game_clock)
+event_engine.load_rules(EVENT_RULES)
+
+# Debug Example
+if __name__ == "__main__":
+    import time
+
+    class _NPC:
+        def __init__(self, villager_id, name, role, event_trigger):
+            self.villager_id = villager_id
+            self.name = name
+            self.role = role
+            self.event_trigger = event_trigger
+
+    clock = GameClock(start_hour=18)
+    engine = EventEngine(clock, random.Random(11))
+    engine.load_rules([{"event_id": f"{role}_gossip", "role": role, "chance": 0.05, "cooldown": 240,
+                        "effects": [{"type": "world_flag", "flag": f"{role}_gossip"}]}
+                       for role in ("Blacksmith", "Merchant", "Healer")])
+    engine.load_rules([{"event_id": "hidden_secret", "trigger": "hidden_secret", "chance": 0.2, "cooldown": 24 * 60,
+                        "effects": [{"type": "world_flag", "flag": "old_tree_secret"}]}])
+    npcs = [_NPC(i, f"npc_{i}", ("Blacksmith", "Merchant", "Healer")[i % 3], "hidden_secret" if i % 7 == 0 else None)
+            for i in range(10_000)]
+
+    start = time.perf_counter()
+    fired = 0
+    for _ in range(24):
+        clock.advance(60)
+        fired += engine.evaluate_many(npcs)
+    print(f"24 ticks over 10k NPCs in {time.perf_counter() - start:.3f}s, {fired} events fired")
@@ -0,0 +1,298 @@
+# generator.py
+# Seeded procedural content generator for scale testing the Anime RPG
+
+import json
+import math
+import os
+import random
+from typing import Iterable, Iterator, List, Tuple
+from chunks import ChunkStore, write_chunks
+from enemies import Enemy
+from items import Item
+from quests import Quest
+
+RARITIES = ("Common", "Rare", "Epic", "Legendary")
+RARITY_WEIGHTS = (0.70, 0.20, 0.08, 0.02)
+RARITY_VALUE = {"Common": 10, "Rare": 60, "Epic": 300, "Legendary": 1500}
+RARITY_DROP_CHANCE = {"Common": 0.5, "Rare": 0.15, "Epic": 0.04, "Legendary": 0.01}
+ITEM_TYPES = ("consumable", "equipment", "material")
+ROLES = ("Blacksmith", "Merchant", "Healer", "Farmer", "Guard", "Elder")
+# Rules matched by trigger; goblin_warning is matched by role (Blacksmith) instead
+EVENT_TRIGGERS = (None, None, None, "special_sale", "hidden_secret")
+CURRENCIES = ("Gold", "Silver", "Platinum")
+NAME_PARTS = ("Ash", "Brook", "Crystal", "Dawn", "Ember", "Frost", "Gale", "Haven", "Iron", "Moon",
+              "Shadow", "Stone", "Storm", "Sun", "Thorn", "Wolf")
+
+# Records per file for items, enemies and quests
+CHUNK_RECORDS = 10_000
+
+
+def _mix(seed: int, index: int) -> float:
+    """Stateless hash of (seed, index) to [0, 1), so any entity's traits can be recomputed without the others."""
+    z = (seed * 0x9E3779B97F4A7C15 + index + 1) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return ((z ^ (z >> 31)) >> 11) / float(1 << 53)
+
+
+class ContentGenerator:
+    """
+    Generates a consistent world of any size from a seed. Every entity kind has
+    its own random stream and cross-references only need the other kinds'
+    counts (item rarity is a pure function of the item's index), so each kind is
+    produced lazily and never needs the others in memory.
+    """
+    def __init__(self, seed: int = 0, items: int = 1_000, enemies: int = 200, quests: int = 500,
+                 villages: int = 100, villagers_per_village: Tuple[int, int] = (3, 8),
+                 villages_per_chunk: int = 4, chunk_size: float = 512.0):
+        self.seed = seed
+        self.counts = {"items": items, "enemies": enemies, "quests": quests, "villages": villages}
+        self.villagers_per_village = villagers_per_village
+        self.villages_per_chunk = villages_per_chunk
+        self.chunk_size = chunk_size
+        self._cumulative = [sum(RARITY_WEIGHTS[:i + 1]) for i in range(len(RARITY_WEIGHTS))]
+
+    def _rng(self, kind: str) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}")
+
+    # Stable ids and names, derivable from an index alone
+    @staticmethod
+    def item_id(index: int) -> str:
+        return f"gen_item_{index}"
+
+    @staticmethod
+    def enemy_id(index: int) -> str:
+        return f"gen_enemy_{index}"
+
+    @staticmethod
+    def quest_id(index: int) -> str:
+        return f"gen_quest_{index}"
+
+    @staticmethod
+    def village_name(index: int) -> str:
+        return f"{NAME_PARTS[index % len(NAME_PARTS)]}{NAME_PARTS[index // len(NAME_PARTS) % len(NAME_PARTS)].lower()} {index}"
+
+    def villager_name(self, village_index: int, slot: int) -> str:
+        return f"{ROLES[slot % len(ROLES)]} {slot} of {self.village_name(village_index)}"
+
+    def rarity_of(self, item_index: int) -> str:
+        roll = _mix(self.seed, item_index)
+        for rarity, bound in zip(RARITIES, self._cumulative):
+            if roll < bound:
+                return rarity
+        return RARITIES[-1]
+
+    def _random_item(self, rng: random.Random) -> int:
+        return rng.randrange(self.counts["items"])
+
+    def generate_items(self) -> Iterator[dict]:
+        rng = self._rng("items")
+        for index in range(self.counts["items"]):
+            rarity = self.rarity_of(index)
+            item_type = rng.choice(ITEM_TYPES)
+            yield {
+                "item_id": self.item_id(index),
+                "name": f"{rng.choice(NAME_PARTS)} {item_type.title()} {index}",
+                "description": f"A {rarity.lower()} {item_type}.",
+                "item_type": item_type,
+                "rarity": rarity,
+                "usable_in_battle": item_type == "consumable",
+                "usable_outside_battle": True,
+                "value": int(RARITY_VALUE[rarity] * rng.uniform(0.5, 2.0)),
+                "max_stack": 1 if item_type == "equipment" else 99,
+                "weight": round(rng.uniform(0.1, 10.0), 2),
+            }
+
+    def generate_enemies(self) -> Iterator[dict]:
+        rng = self._rng("enemies")
+        for index in range(self.counts["enemies"]):
+            level = rng.randint(1, 60)
+            loot_table = {}
+            for _ in range(rng.randint(1, 6)):
+                item_index = self._random_item(rng)
+                loot_table[self.item_id(item_index)] = RARITY_DROP_CHANCE[self.rarity_of(item_index)]
+            yield {
+                "enemy_id": self.enemy_id(index),
+                "name": f"{rng.choice(NAME_PARTS)} Beast {index}",
+                "level": level,
+                "max_hp": 20 + level * rng.randint(8, 16),
+                "atk": 5 + level * rng.randint(2, 4),
+                "defense": level + rng.randint(0, level),
+                "speed": rng.randint(1, 10 + level // 5),
+                "exp_reward": level * 10,
+                "gold_reward": level * 5,
+                "loot_table": loot_table,
+            }
+
+    def generate_quests(self, max_prerequisites: int = 2, window: int = 50) -> Iterator[dict]:
+        """
+        Quests only depend on quests with a lower index (from a sliding window, so
+        long chains form), which keeps the prerequisite graph acyclic.
+        """
+        rng = self._rng("quests")
+        villages = self.counts["villages"]
+        for index in range(self.counts["quests"]):
+            earlier = range(max(0, index - window), index)
+            prerequisites = rng.sample(earlier, min(len(earlier), rng.randint(0, max_prerequisites)))
+            objectives = []
+            if self.counts["enemies"]:
+                for _ in range(rng.randint(1, 3)):
+                    enemy_index = rng.randrange(self.counts["enemies"])
+                    objectives.append(f"{self.enemy_id(enemy_index)} x {rng.randint(1, 20)}")
+            reward_items = [self.item_id(self._random_item(rng)) for _ in range(rng.randint(0, 2))] \
+                if self.counts["items"] else []
+            yield {
+                "quest_id": self.quest_id(index),
+                "title": f"The {rng.choice(NAME_PARTS)} Task {index}",
+                "description": "A generated quest.",
+                "reward_exp": rng.randint(10, 1000),
+                "reward_gold": rng.randint(5, 500),
+                "reward_items": reward_items,
+                "quest_giver": self.villager_name(index % villages, 0) if villages else "",
+                "prerequisites": [self.quest_id(p) for p in sorted(prerequisites)],
+                "objectives": objectives,
+            }
+
+    def _village_record(self, rng: random.Random, index: int) -> dict:
+        villagers = []
+        quest_count = self.counts["quests"]
+        for slot in range(rng.randint(*self.villagers_per_village)):
+            role = ROLES[slot % len(ROLES)]
+            for_sale = [self.item_id(self._random_item(rng)) for _ in range(rng.randint(2, 6))] \
+                if role in ("Blacksmith", "Merchant", "Healer") and self.counts["items"] else []
+            villagers.append({
+                "name": self.villager_name(index, slot),
+                "role": role,
+                "dialogue": [f"Welcome to {self.village_name(index)}!"],
+                # The first villager gives the quest that names them as its giver
+                "quest_id": self.quest_id(index) if slot == 0 and index < quest_count else None,
+                "items_for_sale": for_sale,
+                "event_trigger": rng.choice(EVENT_TRIGGERS),
+                "dialogue_graph": None,
+            })
+        currency = rng.choice(CURRENCIES)
+        stock = []
+        if self.counts["items"]:
+            for _ in range(rng.randint(3, 10)):
+                item_index = self._random_item(rng)
+                stock.append({"item_id": self.item_id(item_index), "quantity": rng.randint(1, 10), "currency": currency,
+                              "price": RARITY_VALUE[self.rarity_of(item_index)] * rng.randint(1, 3)})
+        return {
+            "name": self.village_name(index),
+            "region": f"Region {index // 64}",
+            "population": rng.randint(50, 5000),
+            "currency": currency,
+            "villagers": villagers,
+            "quests": [self.quest_id(q) for q in range(index, quest_count, max(1, self.counts["villages"]))][:3],
+            "merchants": [[v["name"], v["items_for_sale"]] for v in villagers if v["role"] == "Merchant"],
+            "shop": {"name": f"{self.village_name(index)} Shop", "currency": currency, "stock": stock},
+        }
+
+    def generate_villages(self) -> Iterator[Tuple[Tuple[int, int], List[Tuple[dict, float, float]]]]:
+        """Yield (chunk key, [(village record, x, y)]) one chunk at a time, filling a square grid of chunks."""
+        rng = self._rng("villages")
+        total = self.counts["villages"]
+        chunks_needed = -(-total // self.villages_per_chunk)
+        side = max(1, math.ceil(math.sqrt(chunks_needed)))
+        index = 0
+        for chunk in range(chunks_needed):
+            key = (chunk % side, chunk // side)
+            placed = []
+            for _ in range(min(self.villages_per_chunk, total - index)):
+                x = (key[0] + rng.random()) * self.chunk_size
+                y = (key[1] + rng.random()) * self.chunk_size
+                placed.append((self._village_record(rng, index), x, y))
+                index += 1
+            yield key, placed
+
+    def write(self, directory: str, chunk_records: int = CHUNK_RECORDS) -> dict:
+        """
+        Stream the whole world to disk: items, enemies and quests as numbered JSON
+        files of `chunk_records` records, villages as world chunks readable by a
+        ChunkManager. Returns the manifest, which is also saved as manifest.json.
+        """
+        os.makedirs(directory, exist_ok=True)
+        files = {
+            "items": write_records(directory, "items", self.generate_items(), chunk_records),
+            "enemies": write_records(directory, "enemies", self.generate_enemies(), chunk_records),
+            "quests": write_records(directory, "quests", self.generate_quests(), chunk_records),
+        }
+        store = ChunkStore(os.path.join(directory, "villages"))
+        village_chunks = 0
+        for _, placed in self.generate_villages():
+            write_chunks(store, placed, self.chunk_size)
+            village_chunks += 1
+        manifest = {"seed": self.seed, "counts": self.counts, "files": files,
+                    "village_chunks": village_chunks, "chunk_size": self.chunk_size}
+        with open(os.path.join(directory, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def write_records(directory: str, kind: str, records: Iterable[dict], chunk_records: int = CHUNK_RECORDS) -> int:
+    """Write records in numbered files as they arrive; only one file's worth is held at a time."""
+    kind_dir = os.path.join(directory, kind)
+    os.makedirs(kind_dir, exist_ok=True)
+    batch: List[dict] = []
+    files = 0
+
+    def flush():
+        nonlocal files
+        with open(os.path.join(kind_dir, f"{kind}_{files:05d}.json"), "w") as f:
+            json.dump(batch, f)
+        files += 1
+        batch.clear()
+
+    for record in records:
+        batch.append(record)
+        if len(batch) >= chunk_records:
+            flush()
+    if batch:
+        flush()
+    return files
+
+
+def iter_records(directory: str, kind: str) -> Iterator[dict]:
+    """Read records back one file at a time."""
+    kind_dir = os.path.join(directory, kind)
+    for filename in sorted(os.listdir(kind_dir)):
+        with open(os.path.join(kind_dir, filename)) as f:
+            yield from json.load(f)
+
+
+def item_from_record(record: dict) -> Item:
+    return Item(**record)
+
+
+def enemy_from_record(record: dict) -> Enemy:
+    return Enemy(**record)
+
+
+def quest_from_record(record: dict) -> Quest:
+    return Quest(**record)
+
+# Generate a world from the command line
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate a seeded world for scale testing.")
+    parser.add_argument("directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--enemies", type=int, default=20_000)
+    parser.add_argument("--quests", type=int, default=50_000)
+    parser.add_argument("--villages", type=int, default=10_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generator = ContentGenerator(args.seed, args.items, args.enemies, args.quests, args.villages)
+    manifest = generator.write(args.directory)
+    elapsed = time.perf_counter() - start
+    total = sum(manifest["counts"].values())
+    print(f"Generated {total:,} entities in {elapsed:.1f}s ({total / elapsed:,.0f}/s) into {args.directory}")
+    try:
+        import resource
+        print(f"Peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    except ImportError:
+        pass
@@ -0,0 +1,246 @@
+# inventory.py
+# Stack-aware inventory shared by players, shops, loot and crafting
+
+from typing import Dict, List, Optional
+from items import InventoryManager, Item, ItemRegistry, item_registry
+from snapshots import InventorySnapshot
+from output import output
+
+DEFAULT_MAX_STACK = 99  # Used for items that are not in the registry
+
+
+class ItemStack:
+    """One inventory slot: an item and how many of it are stacked there."""
+    __slots__ = ("item_id", "name", "quantity")
+
+    def __init__(self, item_id: str, name: str, quantity: int):
+        self.item_id = item_id
+        self.name = name
+        self.quantity = quantity
+
+    def __repr__(self):
+        return f"{self.name} (x{self.quantity})"
+
+
+class Inventory(InventoryManager):
+    """
+    Inventory with stacking per Item.max_stack and optional slot and weight limits.
+    Item totals live in the InventoryManager count dict, so add/remove/has are O(1)
+    per item; stack sizes are kept alongside for slot accounting and display.
+    """
+    def __init__(self, max_slots: Optional[int] = None, max_weight: Optional[float] = None,
+                 registry: ItemRegistry = item_registry):
+        super().__init__()
+        self.max_slots = max_slots
+        self.max_weight = max_weight
+        self.registry = registry
+        self.stacks: Dict[str, List[int]] = {}  # item_id: stack sizes
+        self.slots_used = 0
+        self.weight = 0.0
+
+    def __len__(self):
+        return self.slots_used
+
+    def _item_info(self, item_id: str):
+        item = self.registry.get_item(item_id)
+        if item:
+            return item.max_stack, item.weight
+        return DEFAULT_MAX_STACK, 0.0
+
+    def _new_slots_needed(self, item_id: str, quantity: int) -> int:
+        max_stack, _ = self._item_info(item_id)
+        free_space = sum(max_stack - size for size in self.stacks.get(item_id, ()))
+        overflow = max(0, quantity - free_space)
+        return -(-overflow // max_stack)
+
+    def can_add_many(self, items: Dict[str, int]) -> bool:
+        """Check slot and weight limits for adding several items at once."""
+        if self.max_slots is not None:
+            slots = sum(self._new_slots_needed(item_id, qty) for item_id, qty in items.items())
+            if self.slots_used + slots > self.max_slots:
+                return False
+        if self.max_weight is not None:
+            weight = sum(self._item_info(item_id)[1] * qty for item_id, qty in items.items())
+            if self.weight + weight > self.max_weight:
+                return False
+        return True
+
+    def can_add(self, item_id: str, quantity: int = 1) -> bool:
+        return self.can_add_many({item_id: quantity})
+
+    def add_item(self, item_id: str, quantity: int = 1) -> bool:
+        """Add items, topping up partial stacks before opening new ones. All or nothing."""
+        if quantity <= 0:
+            return False
+        if not self.can_add(item_id, quantity):
+            output.emit(f"Not enough room for {quantity}x {item_id}.", "inventory_full", item_id=item_id, quantity=quantity)
+            return False
+        max_stack, weight = self._item_info(item_id)
+        stacks = self.stacks.setdefault(item_id, [])
+        remaining = quantity
+        for idx, size in enumerate(stacks):
+            if remaining and size < max_stack:
+                moved = min(max_stack - size, remaining)
+                stacks[idx] = size + moved
+                remaining -= moved
+        while remaining:
+            moved = min(max_stack, remaining)
+            stacks.append(moved)
+            self.slots_used += 1
+            remaining -= moved
+        self.weight += weight * quantity
+        super().add_item(item_id, quantity)
+        return True
+
+    def remove_item(self, item_id: str, quantity: int = 1) -> bool:
+        """Remove items, emptying the smallest stacks first. All or nothing."""
+        if quantity <= 0 or not self.has_item(item_id, quantity):
+            return False
+        stacks = self.stacks[item_id]
+        stacks.sort(reverse=True)
+        remaining = quantity
+        while remaining:
+            if stacks[-1] <= remaining:
+                remaining -= stacks.pop()
+                self.slots_used -= 1
+            else:
+                stacks[-1] -= remaining
+                remaining = 0
+        if not stacks:
+            del self.stacks[item_id]
+        self.weight -= self._item_info(item_id)[1] * quantity
+        super().remove_item(item_id, quantity)
+        return True
+
+    def count(self, item_id: str) -> int:
+        return self.inventory.get(item_id, 0)
+
+    def split_stack(self, item_id: str, stack_index: int, amount: int) -> bool:
+        """Move `amount` from one stack of an item into a new slot."""
+        stacks = self.stacks.get(item_id)
+        if not stacks or not 0 <= stack_index < len(stacks) or not 0 < amount < stacks[stack_index]:
+            return False
+        if self.max_slots is not None and self.slots_used >= self.max_slots:
+            return False
+        stacks[stack_index] -= amount
+        stacks.append(amount)
+        self.slots_used += 1
+        return True
+
+    def get_stacks(self, item_type: Optional[str] = None, rarity: Optional[str] = None) -> List[ItemStack]:
+        """Every slot as an ItemStack, optionally filtered by item type or rarity."""
+        view = []
+        for item_id, sizes in self.stacks.items():
+            item = self.registry.get_item(item_id)
+            if item_type is not None and (not item or item.item_type != item_type):
+                continue
+            if rarity is not None and (not item or item.rarity != rarity):
+                continue
+            name = item.name if item else item_id
+            view.extend(ItemStack(item_id, name, size) for size in sizes)
+        return view
+
+    def sorted_stacks(self, key: str = "name", reverse: bool = False, **filters) -> List[ItemStack]:
+        """Slots sorted by name, quantity, value or rarity."""
+        rarity_order = {"Common": 0, "Rare": 1, "Epic": 2, "Legendary": 3}
+
+        def sort_key(stack: ItemStack):
+            if key == "quantity":
+                return stack.quantity
+            item = self.registry.get_item(stack.item_id)
+            if key == "value":
+                return item.value if item else 0
+            if key == "rarity":
+                return rarity_order.get(item.rarity, -1) if item else -1
+            return stack.name
+
+        return sorted(self.get_stacks(**filters), key=sort_key, reverse=reverse)
+
+    def _rebuild_stacks(self, item_id: str):
+        """Re-pack one item's stacks from its total count."""
+        max_stack, weight = self._item_info(item_id)
+        old_stacks = self.stacks.pop(item_id, [])
+        self.slots_used -= len(old_stacks)
+        self.weight -= weight * sum(old_stacks)
+        quantity = self.inventory.get(item_id, 0)
+        if quantity:
+            full, rest = divmod(quantity, max_stack)
+            self.stacks[item_id] = [max_stack] * full + ([rest] if rest else [])
+            self.slots_used += len(self.stacks[item_id])
+            self.weight += weight * quantity
+
+    def load_inventory(self, filepath: str):
+        super().load_inventory(filepath)
+        # Rebuild stacks from the loaded totals
+        self.stacks = {}
+        self.slots_used = 0
+        self.weight = 0.0
+        for item_id in list(self.inventory):
+            self._rebuild_stacks(item_id)
+
+    def restore(self, snapshot: InventorySnapshot):
+        """Roll back to a snapshot; only the items that changed are re-stacked."""
+        changed = self.inventory.snapshot().changed_keys(snapshot)
+        super().restore(snapshot)
+        for item_id in changed:
+            self._rebuild_stacks(item_id)
+
+
+def transfer(src: Inventory, dst: Inventory, items: Dict[str, int]) -> bool:
+    """
+    Move several items from one inventory to another in one step, as both legs
+    of a TradeEscrow do. Nothing moves unless the source holds everything and
+    the destination has room for all of it.
+    """
+    if any(qty <= 0 for qty in items.values()):
+        return False
+    if not all(src.has_item(item_id, qty) for item_id, qty in items.items()):
+        return False
+    if not dst.can_add_many(items):
+        return False
+    for item_id, qty in items.items():
+        src.remove_item(item_id, qty)
+        dst.add_item(item_id, qty)
+    return True
+
+
+class TradeEscrow:
+    """
+    Two-sided trade between inventories. Both sides are snapshotted as the
+    trade executes; if either transfer fails, both inventories are rolled back
+    to that moment, so changes made while the trade was open are kept.
+    """
+    def __init__(self, first: Inventory, second: Inventory):
+        self.first = first
+        self.second = second
+        self._snapshots = None
+
+    def execute(self, first_gives: Dict[str, int], second_gives: Dict[str, int]) -> bool:
+        self._snapshots = (self.first.snapshot(), self.second.snapshot())
+        if transfer(self.first, self.second, first_gives) and transfer(self.second, self.first, second_gives):
+            return True
+        self.rollback()
+        return False
+
+    def rollback(self):
+        if self._snapshots is None:
+            return
+        self.first.restore(self._snapshots[0])
+        self.second.restore(self._snapshots[1])
+
+# Sample usage
+if __name__ == "__main__":
+    from items import register_all_items
+    register_all_items()
+
+    bag = Inventory(max_slots=5)
+    bag.add_item("potion_hp50", 150)
+    bag.add_item("iron_sword", 2)
+    bag.split_stack("potion_hp50", 0, 10)
+    for stack in bag.sorted_stacks("quantity", reverse=True):
+        print(stack)
+    print("Slots used:", len(bag), "Room for another sword:", bag.can_add("iron_sword"))
+
+    chest = Inventory()
+    transfer(bag, chest, {"potion_hp50": 120, "iron_sword": 1})
+    print("Bag:", bag.get_all_items(), "Chest:", chest.get_all_items())
@@ -4,6 +4,8 @@
 import json
 import random
 from typing import Callable, Optional, List, Dict
+from snapshots import CowCounts, InventorySnapshot
+from output import output
 
 # Item Effect class
 class ItemEffect:
@@ -29,6 +31,7 @@ class Item:
         value: int = 0,
         max_stack: int = 99,
         is_key_item: bool = False,
+        weight: float = 0.0,
     ):
         self.item_id = item_id
         self.name = name
@@ -41,13 +44,14 @@ class Item:
         self.value = value
         self.max_stack = max_stack
         self.is_key_item = is_key_item
+        self.weight = weight
 
     def use(self, target):
         if self.effect:
-            print(f"Using {self.name} on {target.name}...")
+            output.emit(f"Using {self.name} on {target.name}...", "use_item", item_id=self.item_id, target=target.name)
             self.effect.apply(target)
         else:
-            print(f"{self.name} has no effect.")
+            output.emit(f"{self.name} has no effect.")
 
 # Equipment class inheriting from Item
 class Equipment(Item):
@@ -84,6 +88,9 @@ class ItemRegistry:
     def register_item(self, item: Item):
         self.items[item.item_id] = item
 
+    def unregister_item(self, item_id: str):
+        self.items.pop(item_id, None)
+
     def get_item(self, item_id: str) -> Optional[Item]:
         return self.items.get(item_id)
 
@@ -101,12 +108,12 @@ item_registry = ItemRegistry()
 def heal_50_hp(target):
     if hasattr(target, "heal"):
         target.heal(50)
-        print(f"{target.name} healed for 50 HP!")
+        output.emit(f"{target.name} healed for 50 HP!", "heal", target=target.name, amount=50)
 
 def buff_attack(target):
     if hasattr(target, "buff_stat"):
         target.buff_stat("atk", 10, 3)
-        print(f"{target.name}'s attack increased by 10 for 3 turns!")
+        output.emit(f"{target.name}'s attack increased by 10 for 3 turns!", "buff", target=target.name, stat="atk")
 
 # Register some example items
 potion = Item(
@@ -179,16 +186,23 @@ class CraftingRecipe:
                 return False
         return True
 
-    def craft(self, inventory: Dict[str, int]) -> Optional[Item]:
-        if not self.can_craft(inventory):
-            print("Not enough materials.")
-            return None
-        for item_id, amount in self.required_items.items():
-            inventory[item_id] -= amount
+    def craft(self, inventory_manager: 'InventoryManager') -> bool:
+        """
+        Swap one craft's ingredients for its output, through the manager so its
+        listeners see every change. Nothing changes if the output can't be stored.
+        """
+        if not self.can_craft(inventory_manager.get_all_items()):
+            output.emit("Not enough materials.", "craft_failed", item_id=self.output_item_id)
+            return False
+        changes = {item_id: -amount for item_id, amount in self.required_items.items()}
+        changes[self.output_item_id] = changes.get(self.output_item_id, 0) + 1
+        if not apply_changes(inventory_manager, changes):
+            output.emit("No room for the crafted item.", "craft_failed", item_id=self.output_item_id)
+            return False
         item = item_registry.get_item(self.output_item_id)
-        if item:
-            print(f"Crafted {item.name}!")
-        return item
+        output.emit(f"Crafted {item.name if item else self.output_item_id}!", "crafted",
+                    item_id=self.output_item_id, quantity=1)
+        return True
 
 # Example recipe
 iron_blade_recipe = CraftingRecipe(
@@ -199,36 +213,85 @@ iron_blade_recipe = CraftingRecipe(
 # Save/Load Item Inventory
 class InventoryManager:
     def __init__(self):
-        self.inventory: Dict[str, int] = {}
+        self.inventory = CowCounts()  # item_id: count, with O(1) snapshots
+        self.listeners: List[Callable[[str, int, int], None]] = []  # called with (item_id, old, new)
+
+    def _notify(self, item_id: str, old: int, new: int):
+        for listener in self.listeners:
+            listener(item_id, old, new)
 
     def add_item(self, item_id: str, quantity: int = 1):
+        old = self.inventory.get(item_id, 0)
         if item_id in self.inventory:
             self.inventory[item_id] += quantity
         else:
             self.inventory[item_id] = quantity
+        if self.listeners:
+            self._notify(item_id, old, self.inventory[item_id])
 
     def remove_item(self, item_id: str, quantity: int = 1):
         if item_id in self.inventory:
+            old = self.inventory[item_id]
             self.inventory[item_id] -= quantity
+            new = self.inventory[item_id]
             if self.inventory[item_id] <= 0:
                 del self.inventory[item_id]
+            if self.listeners:
+                self._notify(item_id, old, max(0, new))
 
     def has_item(self, item_id: str, quantity: int = 1) -> bool:
         return self.inventory.get(item_id, 0) >= quantity
 
-    def get_all_items(self) -> Dict[str, int]:
+    def get_all_items(self) -> CowCounts:
         return self.inventory
 
-    def save_inventory(self, filepath: str):
+    def snapshot(self) -> InventorySnapshot:
+        """Freeze the current counts. O(1); later changes copy only what they touch."""
+        return self.inventory.snapshot()
+
+    def restore(self, snapshot: InventorySnapshot):
+        """Roll the inventory back to a snapshot, notifying listeners of changed items only."""
+        current = self.inventory.snapshot()
+        self.inventory = CowCounts.from_snapshot(snapshot)
+        for item_id in current.changed_keys(snapshot):
+            self._notify(item_id, current.get(item_id, 0), snapshot.get(item_id, 0))
+
+    def save_inventory(self, filepath: str, snapshot: Optional[InventorySnapshot] = None):
+        # Work from a snapshot so gameplay can keep changing the live inventory meanwhile
+        if snapshot is None:
+            snapshot = self.snapshot()
         with open(filepath, 'w') as f:
-            json.dump(self.inventory, f)
+            json.dump(snapshot.to_dict(), f)
 
     def load_inventory(self, filepath: str):
         try:
             with open(filepath, 'r') as f:
-                self.inventory = json.load(f)
+                old_inventory = self.inventory
+                self.inventory = CowCounts(json.load(f))
+            for item_id in set(old_inventory) | set(self.inventory):
+                self._notify(item_id, old_inventory.get(item_id, 0), self.inventory.get(item_id, 0))
         except FileNotFoundError:
-            print("Inventory file not found. Starting fresh.")
+            output.emit("Inventory file not found. Starting fresh.")
+
+def apply_changes(inventory_manager: InventoryManager, changes: Dict[str, int]) -> bool:
+    """
+    Apply net item changes (item_id: +added / -removed) all or nothing. Removals
+    go first so they free room for the additions; if a slot- or weight-limited
+    inventory refuses any step, it is rolled back and False is returned.
+    """
+    snapshot = inventory_manager.snapshot()
+    ordered = sorted(changes.items(), key=lambda change: change[1])
+    for item_id, change in ordered:
+        if change < 0:
+            done = inventory_manager.remove_item(item_id, -change)
+        elif change > 0:
+            done = inventory_manager.add_item(item_id, change)
+        else:
+            continue
+        if done is False:  # The plain InventoryManager returns None and never refuses
+            inventory_manager.restore(snapshot)
+            return False
+    return True
 
 # Sample usage
 if __name__ == "__main__":
@@ -241,8 +304,6 @@ if __name__ == "__main__":
     print("Current Inventory:", inv.get_all_items())
 
     # Try crafting
-    crafted_item = iron_blade_recipe.craft(inv.inventory)
-    if crafted_item:
-        inv.add_item(crafted_item.item_id)
+    iron_blade_recipe.craft(inv)
 
     print("Updated Inventory:", inv.get_all_items())
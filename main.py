@@ -1,8 +1,13 @@
 # main.py
 # Main game loop and management for the Anime RPG
 
+import json
+import math
+import os
+import sys
 import time
 import random
+from typing import Optional
 from character import *
 from quests import *
 from villages import *
@@ -11,51 +16,82 @@ from shop import *
 from currency import *
 from chats import *
 from world import *
+from chunks import ChunkManager, ChunkStore
+from roads import *
+from schedule import game_clock, npc_scheduler
+from metrics import metrics, timed
+from profiler import profiler
+from session import SessionRecorder, SessionReplayer
+from output import output
+from items import register_all_items
+from enemies import register_all_enemies, simulate_battle
+from enemy_ai import enemy_ai
+from encounters import encounter_service, register_sample_encounters
+from auction import auction_house
 
 # Initialize all the game components
 quest_db = QuestDatabase()
-village_manager = VillageManager()
-villager_manager = VillagerManager()
 currency_manager = CurrencyManager()
 world = World()
+create_sample_world(world, village_manager)  # village_manager comes from villages.py
+road_network = RoadNetwork()
+create_sample_roads(road_network, world)
+register_all_items()
+register_all_enemies()
+register_sample_encounters(encounter_service)
+encounter_service.refill()
+
+# Villages within this distance use their own (usually calmer) encounter table
+VILLAGE_OUTSKIRTS_RADIUS = 80
 
 # Game Settings
 game_running = True
 current_player = None
+current_village = None
+visiting_villager_ids = []  # Villagers of a streamed village, registered while the player is there
 chat_manager = ChatManager(villager_manager)
-shop = Shop()
 
 # Welcome to the game
 def game_intro():
-    print("\nWelcome to the Anime RPG!")
-    print("Embark on a journey of quests, battles, and treasures!")
-    print("\nWhat is your name, adventurer?")
-    player_name = input("Enter your name: ")
+    output.emit("\nWelcome to the Anime RPG!", "intro")
+    output.emit("Embark on a journey of quests, battles, and treasures!", "intro")
+    output.emit("\nWhat is your name, adventurer?", "intro")
+    player_name = output.prompt("Enter your name: ")
     global current_player
     current_player = Player(player_name)
-    print(f"\nWelcome, {current_player.name}!")
+    output.emit(f"\nWelcome, {current_player.name}!", "welcome")
 
 # Main Game Loop
 def game_loop():
     global game_running
     while game_running:
         display_main_menu()
-        choice = input("\nWhat do you want to do? (Enter a number): ")
+        choice = output.prompt("\nWhat do you want to do? (Enter a number): ")
         handle_main_menu_choice(choice)
 
 # Main Menu
 def display_main_menu():
-    print("\n----- Main Menu -----")
-    print("1. Explore the World")
-    print("2. Chat with Villagers")
-    print("3. Check Quests")
-    print("4. Visit the Shop")
-    print("5. View Inventory")
-    print("6. Check Currency")
-    print("7. Save and Exit Game")
-    print("8. Exit Game Without Saving")
+    output.emit("\n----- Main Menu -----", "menu")
+    output.emit("1. Explore the World", "menu")
+    output.emit("2. Chat with Villagers", "menu")
+    output.emit("3. Check Quests", "menu")
+    output.emit("4. Visit the Shop", "menu")
+    output.emit("5. View Inventory", "menu")
+    output.emit("6. Check Currency", "menu")
+    output.emit("7. Save and Exit Game", "menu")
+    output.emit("8. Exit Game Without Saving", "menu")
 
 def handle_main_menu_choice(choice: str):
+    label = choice if choice in MENU_CHOICES else "invalid"
+    with metrics.timer("menu_action_seconds", choice=label), profiler.action(f"menu:{label}"):
+        dispatch_menu_choice(choice)
+    # Orders placed during the turn are matched once it ends
+    auction_house.tick()
+    output.flush()
+
+MENU_CHOICES = ('1', '2', '3', '4', '5', '6', '7', '8')
+
+def dispatch_menu_choice(choice: str):
     if choice == '1':
         explore_world()
     elif choice == '2':
@@ -73,71 +109,129 @@ def handle_main_menu_choice(choice: str):
     elif choice == '8':
         exit_game()
     else:
-        print("Invalid choice. Please try again.")
+        output.emit("Invalid choice. Please try again.", "invalid_choice")
 
 # Explore the world (village management and interactions)
 def explore_world():
-    print("\nYou are now exploring the world...")
-    # Choose a random village to visit
-    village = random.choice(village_manager.get_all_villages())
-    print(f"\nYou have arrived in the village of {village.name}.")
+    output.emit("\nYou are now exploring the world...", "explore")
+    # Wander away from the current position
+    x, y = world.player_position
+    x, y = x + random.uniform(-200, 200), y + random.uniform(-200, 200)
+    world.move_player(x, y)
+    zone = world.encounter_zone_at(x, y)
+    if zone:
+        output.emit(f"You pass through {zone.name}...", "zone_entered", zone=zone.zone_id)
+    region = world.region_at(x, y)
+    # The closest village, both for its outskirts encounter table and as the place to head to
+    village = world.nearest_village(x, y)
+    village_position = world.get_village_position(village.name) if village else None
+    outskirts = village_position is not None and math.dist(village_position, (x, y)) <= VILLAGE_OUTSKIRTS_RADIUS
+    key = encounter_service.table_for(zone=zone.zone_id if zone else None,
+                                      village=village.name if outskirts else None,
+                                      region=region.name if region else None)
+    if key:
+        encounter = encounter_service.next_encounter(key)
+        if encounter:
+            fight_encounter(encounter)
+            # Roll the next steps while the player reads the battle report
+            encounter_service.refill(key)
+
+    # Head to the closest village
+    if not village:
+        output.emit("There are no villages nearby.", "no_village")
+        return
+    world.move_player(*village_position)
+
+    # Travel along the roads when coming from another village
+    global current_village
+    if current_village and current_village is not village:
+        route = road_network.find_route(current_village.name, village.name)
+        if route:
+            output.emit(f"You travel {' -> '.join(route.path)} ({route.travel_time:.1f} hours).", "travel", path=route.path, hours=route.travel_time)
+            # The rest of the world keeps living while the player travels
+            npc_scheduler.tick(int(route.travel_time * 60))
+            output.emit(f"It is now {game_clock}.", "time", minutes=game_clock.minutes)
+    current_village = village
+    enter_village(village)
+    output.emit(f"\nYou have arrived in the village of {village.name}.", "village_arrived", village=village.name)
     village.show_village_info()
 
     # Allow the player to interact with the village
-    interaction_choice = input("\nDo you want to interact with the villagers? (y/n): ")
+    interaction_choice = output.prompt("\nDo you want to interact with the villagers? (y/n): ")
     if interaction_choice.lower() == 'y':
         interact_with_villagers(village)
 
+# Villages streamed in from world chunks are not in village_manager, so their villagers are
+# registered for chats on arrival and dropped again when the player leaves
+def enter_village(village):
+    for villager_id in visiting_villager_ids:
+        villager_manager.remove_villager(villager_id)
+    visiting_villager_ids.clear()
+    if village_manager.get_village(village.name) is None:
+        visiting_villager_ids.extend(villager_manager.add_villager(villager, village.name)
+                                     for villager in village.villagers)
+
+# Fight every enemy in an encounter in turn
+def fight_encounter(encounter):
+    output.emit(f"\nAmbush! {', '.join(f'{enemy.name} (Lv {enemy.level})' for enemy in encounter.enemies)} appear!", "ambush", enemies=[enemy.enemy_id for enemy in encounter.enemies])
+    for enemy in encounter.enemies:
+        simulate_battle(current_player, enemy, enemy_ai)
+        if not current_player.is_alive():
+            output.emit("You black out and wake up on the road, patched up by a passing healer.", "knocked_out")
+            current_player.heal(current_player.max_hp - current_player.current_stats['HP'])
+            break
+
 # Interact with villagers
 def interact_with_villagers(village):
-    print(f"\nVillagers in {village.name}:")
+    output.emit(f"\nVillagers in {village.name}:", "villager_list", village=village.name)
     for villager in villager_manager.get_villagers_in_village(village.name):
-        print(f"- {villager.name} ({villager.role})")
+        output.emit(f"- {villager.name} ({villager.role})", "villager_list", villager=villager.name, role=villager.role)
 
-    villager_choice = input("\nEnter the name of the villager you want to chat with: ")
+    villager_choice = output.prompt("\nEnter the name of the villager you want to chat with: ")
     chat_manager.initiate_chat(current_player, villager_choice)
 
 # Check the quests
 def check_quests():
-    print("\n----- Quests -----")
+    output.emit("\n----- Quests -----", "quest_log")
     if not current_player.quests:
-        print("You don't have any quests at the moment.")
+        output.emit("You don't have any quests at the moment.", "quest_log")
     else:
         for quest_id, quest in current_player.quests.items():
-            print(f"Quest: {quest.title}")
-            print(f"Description: {quest.description}")
-            print(f"Objectives: {', '.join(quest.objectives)}")
-            print(f"Progress: {quest.progress}/{len(quest.objectives)}")
-            print(f"Reward: {quest.reward_exp} EXP, {quest.reward_gold} gold\n")
+            output.emit(f"Quest: {quest.title}", "quest_log", quest_id=quest_id)
+            output.emit(f"Description: {quest.description}", "quest_log", quest_id=quest_id)
+            output.emit(f"Objectives: {', '.join(quest.objectives)}", "quest_log", quest_id=quest_id)
+            output.emit(f"Progress: {quest.progress}/{len(quest.objectives)}", "quest_log", quest_id=quest_id)
+            output.emit(f"Reward: {quest.reward_exp} EXP, {quest.reward_gold} gold\n", "quest_log", quest_id=quest_id)
 
 # Visit the shop (interact with shops to buy items)
 def visit_shop():
-    print("\nYou are now in the shop...")
-    shop.show_items_for_sale()
-    choice = input("\nDo you want to buy something? (y/n): ")
+    output.emit("\nYou are now in the shop...", "shop")
+    shop.show_stock()
+    choice = output.prompt("\nDo you want to buy something? (y/n): ")
     if choice.lower() == 'y':
-        item_choice = input("\nEnter the name of the item you want to buy: ")
+        item_choice = output.prompt("\nEnter the name of the item you want to buy: ")
         shop.purchase_item(current_player, item_choice)
     else:
-        print("Goodbye! Come back soon.")
+        output.emit("Goodbye! Come back soon.", "shop")
 
 # View the player's inventory
 def view_inventory():
-    print("\n----- Inventory -----")
+    output.emit("\n----- Inventory -----", "inventory")
     if not current_player.inventory:
-        print("Your inventory is empty.")
+        output.emit("Your inventory is empty.", "inventory")
     else:
-        for item in current_player.inventory:
-            print(f"- {item.name} (x{item.quantity})")
+        for item in current_player.inventory.sorted_stacks():
+            output.emit(f"- {item.name} (x{item.quantity})", "inventory", item_id=item.item_id, quantity=item.quantity)
 
 # Check the player's currency
 def check_currency():
-    print("\n----- Currency -----")
-    print(f"Current Gold: {currency_manager.get_player_gold(current_player)}")
+    output.emit("\n----- Currency -----", "currency")
+    output.emit(f"Current Gold: {currency_manager.get_player_gold(current_player)}", "currency")
 
 # Save the player's game progress
+@timed("save_seconds")
 def save_game():
-    print("\nSaving your progress...")
+    output.emit("\nSaving your progress...", "saving")
     # Save logic (in reality, this would write to a file or database)
     with open("save_game.txt", "w") as save_file:
         save_file.write(f"{current_player.name}\n")
@@ -146,17 +240,65 @@ def save_game():
         for quest_id, quest in current_player.quests.items():
             save_file.write(f"{quest_id}, ")
         save_file.write("\nInventory: ")
-        for item in current_player.inventory:
+        for item in current_player.inventory.get_stacks():
             save_file.write(f"{item.name} (x{item.quantity}), ")
-    print("Game saved successfully!")
+    output.emit("Game saved successfully!", "saved")
 
 # Exit the game
 def exit_game():
-    print("\nThank you for playing the Anime RPG!")
+    output.emit("\nThank you for playing the Anime RPG!", "goodbye")
     global game_running
     game_running = False
 
-# Game Initialization
-if __name__ == "__main__":
+def play_session():
     game_intro()
     game_loop()
+
+def flag_value(flag: str, default: str) -> Optional[str]:
+    """Value of a command-line flag such as `--profile [path]`, the default if no value follows it, or None."""
+    if flag not in sys.argv:
+        return None
+    idx = sys.argv.index(flag)
+    has_value = idx + 1 < len(sys.argv) and not sys.argv[idx + 1].startswith("-")
+    return sys.argv[idx + 1] if has_value else default
+
+# Game Initialization
+if __name__ == "__main__":
+    # --profile [path] samples the session and writes collapsed stacks for a flame graph
+    profile_path = flag_value("--profile", "ember_profile.collapsed")
+    # --record [path] logs the RNG seed and every input; --replay path re-runs such a log headlessly
+    record_path = flag_value("--record", "ember_session.log")
+    replay_path = flag_value("--replay", "ember_session.log")
+    # --world [dir] streams villages from a world written by generator.py
+    world_dir = flag_value("--world", "ember_world")
+    if world_dir:
+        with open(os.path.join(world_dir, "manifest.json")) as f:
+            chunk_size = json.load(f)["chunk_size"]
+        world.attach_chunks(ChunkManager(ChunkStore(os.path.join(world_dir, "villages")), chunk_size=chunk_size,
+                                         decode=Village.from_dict, encode=Village.to_dict))
+    if profile_path:
+        profiler.start()
+    try:
+        if replay_path:
+            stats = SessionReplayer(replay_path).replay(play_session)
+            print(f"Replayed {stats['actions']} actions in {stats['seconds']:.3f}s "
+                  f"({stats['actions_per_sec']:,.0f} actions/sec)")
+        elif record_path:
+            recorder = SessionRecorder(record_path)
+            recorder.start()
+            try:
+                play_session()
+            finally:
+                recorder.stop()
+                print(f"Session recorded to {record_path}")
+        else:
+            play_session()
+    finally:
+        if world.chunks:
+            world.chunks.close()
+        if profile_path:
+            profiler.stop()
+            profiler.write_collapsed(profile_path)
+            print(f"Profile written to {profile_path}: {profiler.action_totals()}")
+    if metrics.enabled:
+        metrics.export(os.environ["EMBER_METRICS"])
@@ -0,0 +1,266 @@
+# metrics.py
+# Lightweight counters, histograms and timers for the Anime RPG
+
+import bisect
+import builtins
+import functools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Latency buckets in seconds, roughly x2.5 apart from 10us to 10s
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are interpolated inside the matching bucket."""
+    __slots__ = ("buckets", "counts", "count", "total")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= target and bucket_count:
+                lower = self.buckets[idx - 1] if idx > 0 else 0.0
+                upper = self.buckets[idx] if idx < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class _NullTimer:
+    """Shared do-nothing timer handed out while metrics are disabled."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("histogram", "registry", "start", "waited")
+
+    def __init__(self, histogram: Histogram, registry: 'MetricsRegistry'):
+        self.histogram = histogram
+        self.registry = registry
+
+    def __enter__(self):
+        self.waited = self.registry.waited()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.histogram.observe(elapsed - (self.registry.waited() - self.waited))
+        return False
+
+
+def _escape(value) -> str:
+    """A label value as Prometheus text format expects it inside double quotes."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    Holds every metric by (name, labels). When disabled, inc/timer return
+    immediately and the timed decorator calls straight through.
+
+    Timers leave out time spent blocked at input() prompts once
+    exclude_input_waits() has wrapped input(), so a handler that asks the
+    player something records only the game's own work.
+    """
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[Tuple[str, LabelKey], Counter] = {}
+        self.histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._lock = threading.Lock()
+        self._waits = threading.local()
+
+    def waited(self) -> float:
+        """Seconds the calling thread has spent waiting at input() prompts."""
+        return getattr(self._waits, "seconds", 0.0)
+
+    def exclude_input_waits(self):
+        """Wrap builtins.input so the time spent waiting for an answer is kept out of timers."""
+        read = builtins.input
+        waits = self._waits
+
+        @functools.wraps(read)
+        def timed_input(prompt: str = "") -> str:
+            start = time.perf_counter()
+            try:
+                return read(prompt)
+            finally:
+                waits.seconds = getattr(waits, "seconds", 0.0) + time.perf_counter() - start
+        builtins.input = timed_input
+
+    def counter(self, name: str, **labels) -> Counter:
+        key = (name, tuple(sorted(labels.items())))
+        counter = self.counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self.counters.setdefault(key, Counter())
+        return counter
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def inc(self, name: str, amount: int = 1, **labels):
+        if self.enabled:
+            self.counter(name, **labels).inc(amount)
+
+    def timer(self, name: str, **labels):
+        """Context manager that records elapsed seconds into a histogram."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name, **labels), self)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self) -> dict:
+        return {
+            "counters": [{"name": name, "labels": dict(labels), "value": c.value}
+                         for (name, labels), c in self.counters.items()],
+            "histograms": [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.total,
+                            "p50": h.percentile(0.5), "p90": h.percentile(0.9), "p99": h.percentile(0.99)}
+                           for (name, labels), h in self.histograms.items()],
+        }
+
+    def to_prometheus(self) -> str:
+        def fmt(labels: LabelKey, extra: str = "") -> str:
+            parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        # Sorting keeps every series of a metric together under its one TYPE line
+        lines = []
+        typed = None
+        for (name, labels), counter in sorted(self.counters.items()):
+            if name != typed:
+                lines.append(f"# TYPE {name} counter")
+                typed = name
+            lines.append(f"{name}{fmt(labels)} {counter.value}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if name != typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed = name
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                bucket_labels = fmt(labels, 'le="%s"' % bound)
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = fmt(labels, 'le="+Inf"')
+            lines.append(f"{name}_bucket{inf_labels} {histogram.count}")
+            lines.append(f"{name}_sum{fmt(labels)} {histogram.total}")
+            lines.append(f"{name}_count{fmt(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, filepath: str):
+        """Write metrics to a file: JSON for *.json, Prometheus text format otherwise."""
+        with open(filepath, "w") as f:
+            if filepath.endswith(".json"):
+                json.dump(self.to_dict(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+    def serve(self, port: int = 9464) -> HTTPServer:
+        """Serve /metrics (Prometheus text) and /metrics.json from a background thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics.json":
+                    body, content_type = json.dumps(registry.to_dict()).encode(), "application/json"
+                elif self.path == "/metrics":
+                    body, content_type = registry.to_prometheus().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+# Enabled by pointing EMBER_METRICS at an output file (.json or Prometheus text)
+metrics = MetricsRegistry(enabled=bool(os.environ.get("EMBER_METRICS")))
+if metrics.enabled:
+    metrics.exclude_input_waits()
+
+
+def timed(name: str, **labels) -> Callable:
+    """Decorator recording each call's duration into the `name` histogram."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            waited = metrics.waited()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                metrics.histogram(name, **labels).observe(elapsed - (metrics.waited() - waited))
+        return wrapper
+    return decorator
+
+# Overhead check
+if __name__ == "__main__":
+    @timed("demo_seconds")
+    def work():
+        return sum(range(50))
+
+    for enabled in (False, True):
+        metrics.enabled = enabled
+        start = time.perf_counter()
+        for _ in range(200_000):
+            work()
+        print(f"enabled={enabled}: {(time.perf_counter() - start) / 200_000 * 1e9:.0f} ns/call")
+    print(metrics.to_prometheus().splitlines()[-1])
@@ -0,0 +1,102 @@
+# output.py
+# Pluggable output sinks for game messages in the Anime RPG
+#
+# Game code reports what happens through `output.emit(text, kind, **fields)`
+# instead of print(), and the active sink decides where it goes: the console,
+# a per-turn buffer, structured events for a server, or nowhere at all.
+# Hot paths check `output.enabled` first so a discarded message is never even
+# formatted. Questions for the player go through `output.prompt` rather than
+# input(), so a buffering sink never holds back the text they answer.
+
+import contextlib
+import sys
+from typing import Callable, Dict, List, Optional
+
+
+class OutputSink:
+    """Base sink; `enabled` tells callers whether emitted messages go anywhere."""
+    enabled = True
+
+    def emit(self, text: str, kind: str = "message", **fields):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+
+class ConsoleSink(OutputSink):
+    """Interactive play: every message is printed immediately."""
+    def emit(self, text: str, kind: str = "message", **fields):
+        print(text)
+
+
+class BufferedSink(OutputSink):
+    """Collects messages and writes them in one go when flushed, e.g. once per battle turn."""
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.lines: List[str] = []
+
+    def emit(self, text: str, kind: str = "message", **fields):
+        self.lines.append(text)
+
+    def flush(self):
+        if self.lines:
+            (self.stream or sys.stdout).write("\n".join(self.lines) + "\n")
+            self.lines.clear()
+
+
+class EventSink(OutputSink):
+    """
+    Structured events for servers and tools: each message becomes a dict with
+    its kind, text and fields, passed to a handler or kept in `events`.
+    """
+    def __init__(self, handler: Optional[Callable[[Dict], None]] = None):
+        self.handler = handler
+        self.events: List[Dict] = []
+
+    def emit(self, text: str, kind: str = "message", **fields):
+        event = {"kind": kind, "text": text, **fields}
+        if self.handler:
+            self.handler(event)
+        else:
+            self.events.append(event)
+
+
+class NullSink(OutputSink):
+    """Simulations and benchmarks: everything is dropped."""
+    enabled = False
+
+    def emit(self, text: str, kind: str = "message", **fields):
+        pass
+
+
+class Output:
+    """The game's single output channel; swap its sink per session."""
+    def __init__(self, sink: OutputSink):
+        self.set_sink(sink)
+
+    def set_sink(self, sink: OutputSink):
+        self.sink = sink
+        self.enabled = sink.enabled
+        self.emit = sink.emit  # Bound once so emitting is a single call
+
+    def flush(self):
+        self.sink.flush()
+
+    def prompt(self, text: str = "") -> str:
+        """Ask the player something, flushing buffered messages first so they appear before the question."""
+        self.sink.flush()
+        return input(text)
+
+    @contextlib.contextmanager
+    def use(self, sink: OutputSink):
+        """Route output to another sink for the duration of a block."""
+        previous = self.sink
+        self.set_sink(sink)
+        try:
+            yield sink
+        finally:
+            sink.flush()
+            self.set_sink(previous)
+
+output = Output(ConsoleSink())
@@ -0,0 +1,132 @@
+# profiler.py
+# Sampling profiler with flame-graph output for the Anime RPG
+
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+class _NullAction:
+    """Shared do-nothing context handed out while the profiler is off."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_ACTION = _NullAction()
+
+
+class _Action:
+    __slots__ = ("profiler", "label")
+
+    def __init__(self, profiler: 'SamplingProfiler', label: str):
+        self.profiler = profiler
+        self.label = label
+
+    def __enter__(self):
+        self.profiler._actions.append(self.label)
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._actions.pop()
+        return False
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack from a timer thread and counts identical
+    stacks. Each sample is prefixed with the game actions in progress (menu choice,
+    chat option, battle turn), and output uses the collapsed-stack format read by
+    flamegraph.pl, speedscope and similar tools.
+    """
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.active = False
+        self._actions: List[str] = []
+        self._frame_names: Dict[object, str] = {}  # code object: "file:function"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target_id: Optional[int] = None
+
+    def action(self, label: str):
+        """Context manager tagging samples taken inside it with a game action."""
+        if not self.active:
+            return _NULL_ACTION
+        return _Action(self, label)
+
+    def start(self, thread_id: Optional[int] = None):
+        """Start sampling the given thread (the calling thread by default)."""
+        if self.active:
+            return
+        self._target_id = thread_id or threading.get_ident()
+        self._stop.clear()
+        self.active = True
+        self._thread = threading.Thread(target=self._run, name="ember-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.active:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.active = False
+
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            name = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            self._frame_names[code] = name
+        return name
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[";".join(self._actions + stack)] += 1
+
+    def write_collapsed(self, filepath: str):
+        """Write 'frame;frame;frame count' lines for flame-graph tools."""
+        with open(filepath, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def action_totals(self) -> Dict[str, int]:
+        """Samples per top-level action, a quick text summary of where time went."""
+        totals: Dict[str, int] = Counter()
+        for stack, count in self.samples.items():
+            totals[stack.split(";", 1)[0]] += count
+        return dict(totals)
+
+profiler = SamplingProfiler()
+
+# Overhead check
+if __name__ == "__main__":
+    import time
+
+    def busy():
+        return sum(i * i for i in range(200_000))
+
+    start = time.perf_counter()
+    for _ in range(30):
+        busy()
+    baseline = time.perf_counter() - start
+
+    profiler.start()
+    start = time.perf_counter()
+    for turn in range(30):
+        with profiler.action("battle_turn"):
+            busy()
+    profiled = time.perf_counter() - start
+    profiler.stop()
+    print(f"Overhead: {(profiled / baseline - 1) * 100:.1f}% with {sum(profiler.samples.values())} samples")
+    print(profiler.samples.most_common(1)[0])
@@ -5,8 +5,8 @@ import random
 from typing import List, Dict, Optional
 from character import *
 from items import item_registry
-from items import item_registry
-from quest_templates import create_quests_from_data
+from metrics import metrics, timed
+from output import output
 
 class Quest:
     def __init__(
@@ -50,23 +50,26 @@ class Quest:
         for item_id in self.reward_items:
             item = item_registry.get_item(item_id)
             if item:
-                player.add_item_to_inventory(item)
-                print(f"{player.name} received {item.name} as a reward!")
+                player.add_item_to_inventory(item.item_id)
+                if output.enabled:
+                    output.emit(f"{player.name} received {item.name} as a reward!", "reward_item", item_id=item.item_id)
 
-        print(f"{player.name} has completed the quest: {self.title}")
-        print(f"Rewards: {self.reward_exp} EXP, {self.reward_gold} gold.")
+        if output.enabled:
+            output.emit(f"{player.name} has completed the quest: {self.title}")
+            output.emit(f"Rewards: {self.reward_exp} EXP, {self.reward_gold} gold.", "quest_rewards",
+                        quest_id=self.quest_id, exp=self.reward_exp, gold=self.reward_gold)
 
     def display_quest_info(self):
         """
         Display the basic information about the quest.
         """
-        print(f"Quest: {self.title}")
-        print(f"Description: {self.description}")
-        print(f"Quest Giver: {self.quest_giver}")
-        print(f"Objectives: {', '.join(self.objectives)}")
-        print(f"Reward: {self.reward_exp} EXP, {self.reward_gold} gold")
+        output.emit(f"Quest: {self.title}")
+        output.emit(f"Description: {self.description}")
+        output.emit(f"Quest Giver: {self.quest_giver}")
+        output.emit(f"Objectives: {', '.join(self.objectives)}")
+        output.emit(f"Reward: {self.reward_exp} EXP, {self.reward_gold} gold")
         if self.reward_items:
-            print(f"Items Rewarded: {', '.join(self.reward_items)}")
+            output.emit(f"Items Rewarded: {', '.join(self.reward_items)}")
 
 # Quest Database
 class QuestDatabase:
@@ -80,27 +83,31 @@ class QuestDatabase:
     def get_quest(self, quest_id: str) -> Optional[Quest]:
         return self.quests.get(quest_id)
 
+    @timed("quest_complete_seconds")
     def complete_quest(self, player: PlayerCharacter, quest_id: str):
         quest = self.get_quest(quest_id)
         if quest and not quest.is_completed and quest.check_completion(player):
             quest.is_completed = True
             quest.give_rewards(player)
             self.completed_quests[quest_id] = quest
-            print(f"{player.name} has completed the quest {quest.title}!")
+            metrics.inc("quests_completed_total")
+            if output.enabled:
+                output.emit(f"{player.name} has completed the quest {quest.title}!", "quest_completed",
+                            name=player.name, quest_id=quest_id)
         else:
-            print(f"Quest {quest_id} is not completed yet or already finished.")
+            output.emit(f"Quest {quest_id} is not completed yet or already finished.", "quest_incomplete", quest_id=quest_id)
 
 # Quest Database and Player Integration
 quest_db = QuestDatabase()
 
-# Load quests from external data (this will be populated by quels from `aquests.py`)
+# Load quests from external data (this will be populated by quests from `aquests.py`)
 def load_quests_from_data():
+    from aquests import create_quests_from_data  # aquests imports this module
     create_quests_from_data(quest_db)
 
 # Debug Example
 if __name__ == "__main__":
-    from character import *
-    player = player("Kai")
+    player = Player("Kai")
     load_quests_from_data()
     player.start_quest("quest_1")
     player.complete_objective("Goblin x 10")
@@ -0,0 +1,192 @@
+# roads.py
+# Road network, routing and travel times between villages for the Anime RPG
+
+import heapq
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class Route:
+    """A path through the road network and its total travel time (in hours)."""
+    def __init__(self, path: List[str], travel_time: float):
+        self.path = path
+        self.travel_time = travel_time
+
+    def __repr__(self):
+        return f"Route({' -> '.join(self.path)}, {self.travel_time:.2f}h)"
+
+
+class RoadNetwork:
+    """
+    Undirected road graph over villages and other named waypoints.
+    Point-to-point routes use A* with landmark (ALT) lower bounds and are cached;
+    travel_times_from computes a whole one-to-all table in a single Dijkstra pass.
+    """
+    def __init__(self, route_cache_size: int = 4096):
+        self.roads: Dict[str, Dict[str, float]] = {}  # location: {neighbor: travel time}
+        self.landmarks: List[str] = []
+        self._landmark_times: List[Dict[str, float]] = []
+        self._route_cache: 'OrderedDict[Tuple[str, str], Optional[Route]]' = OrderedDict()
+        self.route_cache_size = route_cache_size
+
+    def add_location(self, name: str):
+        self.roads.setdefault(name, {})
+
+    def add_road(self, a: str, b: str, distance: float, speed: float = 1.0):
+        """Connect two locations. Travel time is distance / speed."""
+        travel_time = distance / speed
+        self.add_location(a)
+        self.add_location(b)
+        # Keep the fastest road if two locations are connected twice
+        if travel_time < self.roads[a].get(b, math.inf):
+            self.roads[a][b] = travel_time
+            self.roads[b][a] = travel_time
+        self._invalidate()
+
+    def _invalidate(self):
+        """Road changes make cached routes and landmark tables stale."""
+        self._route_cache.clear()
+        if self.landmarks:
+            self.landmarks = []
+            self._landmark_times = []
+
+    def travel_times_from(self, origin: str) -> Dict[str, float]:
+        """
+        Batch query: travel time from origin to every reachable location.
+        Useful for trade-route and NPC scheduling simulations.
+        """
+        times = {origin: 0.0}
+        heap = [(0.0, origin)]
+        roads = self.roads
+        while heap:
+            time_so_far, location = heapq.heappop(heap)
+            if time_so_far > times[location]:
+                continue
+            for neighbor, cost in roads[location].items():
+                new_time = time_so_far + cost
+                if new_time < times.get(neighbor, math.inf):
+                    times[neighbor] = new_time
+                    heapq.heappush(heap, (new_time, neighbor))
+        return times
+
+    def build_landmarks(self, count: int = 4):
+        """
+        Pick landmarks by farthest-point selection and precompute their travel
+        times, giving A* an admissible heuristic via the triangle inequality.
+        """
+        self.landmarks = []
+        self._landmark_times = []
+        if not self.roads:
+            return
+        candidate = next(iter(self.roads))
+        min_times: Dict[str, float] = {}
+        for _ in range(min(count, len(self.roads))):
+            times = self.travel_times_from(candidate)
+            self.landmarks.append(candidate)
+            self._landmark_times.append(times)
+            for location in self.roads:
+                min_times[location] = min(min_times.get(location, math.inf), times.get(location, math.inf))
+            # Next landmark is the reachable location farthest from all chosen ones
+            candidate = max((loc for loc in min_times if min_times[loc] < math.inf and loc not in self.landmarks),
+                            key=min_times.get, default=None)
+            if candidate is None:
+                break
+        self._route_cache.clear()
+
+    def _heuristic(self, location: str, goal: str) -> float:
+        best = 0.0
+        for times in self._landmark_times:
+            to_goal = times.get(goal)
+            to_loc = times.get(location)
+            if to_goal is not None and to_loc is not None:
+                bound = abs(to_goal - to_loc)
+                if bound > best:
+                    best = bound
+        return best
+
+    def find_route(self, origin: str, destination: str) -> Optional[Route]:
+        """Fastest route between two locations, or None if unreachable."""
+        key = (origin, destination)
+        if key in self._route_cache:
+            self._route_cache.move_to_end(key)
+            return self._route_cache[key]
+
+        route = self._a_star(origin, destination)
+        self._route_cache[key] = route
+        if len(self._route_cache) > self.route_cache_size:
+            self._route_cache.popitem(last=False)
+        return route
+
+    def _a_star(self, origin: str, destination: str) -> Optional[Route]:
+        if origin not in self.roads or destination not in self.roads:
+            return None
+        times = {origin: 0.0}
+        came_from: Dict[str, str] = {}
+        heap = [(self._heuristic(origin, destination), 0.0, origin)]
+        roads = self.roads
+        while heap:
+            _, time_so_far, location = heapq.heappop(heap)
+            if location == destination:
+                path = [location]
+                while location in came_from:
+                    location = came_from[location]
+                    path.append(location)
+                path.reverse()
+                return Route(path, time_so_far)
+            if time_so_far > times[location]:
+                continue
+            for neighbor, cost in roads[location].items():
+                new_time = time_so_far + cost
+                if new_time < times.get(neighbor, math.inf):
+                    times[neighbor] = new_time
+                    came_from[neighbor] = location
+                    heapq.heappush(heap, (new_time + self._heuristic(neighbor, destination), new_time, neighbor))
+        return None
+
+# Sample roads between the sample villages
+def create_sample_roads(road_network: RoadNetwork, world):
+    """Connect the sample villages through a mountain pass, using map distances."""
+    road_network.add_location("Mountain Pass")
+    pass_position = (450, 250)
+    for village_name, speed in (("Stonebrook", 40.0), ("Crystal Haven", 25.0)):
+        position = world.get_village_position(village_name)
+        if position:
+            road_network.add_road(village_name, "Mountain Pass", math.dist(position, pass_position), speed)
+    road_network.build_landmarks()
+
+# Debug Example
+if __name__ == "__main__":
+    import random
+    import time
+
+    # Build a large random road grid and time repeated queries
+    random.seed(7)
+    network = RoadNetwork()
+    size = 150
+    for x in range(size):
+        for y in range(size):
+            if x + 1 < size:
+                network.add_road(f"{x},{y}", f"{x + 1},{y}", 1.0, random.uniform(0.5, 2.0))
+            if y + 1 < size:
+                network.add_road(f"{x},{y}", f"{x},{y + 1}", 1.0, random.uniform(0.5, 2.0))
+
+    start = time.perf_counter()
+    network.build_landmarks(8)
+    print(f"Built 8 landmarks over {len(network.roads)} locations in {time.perf_counter() - start:.2f}s")
+
+    pairs = [(f"{random.randrange(size)},{random.randrange(size)}", f"{random.randrange(size)},{random.randrange(size)}")
+             for _ in range(200)]
+    start = time.perf_counter()
+    for a, b in pairs:
+        network.find_route(a, b)
+    print(f"200 A* routes in {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    for a, b in pairs:
+        network.find_route(a, b)
+    print(f"200 cached routes in {time.perf_counter() - start:.5f}s")
+
+    start = time.perf_counter()
+    times = network.travel_times_from("0,0")
+    print(f"One-to-all travel times for {len(times)} locations in {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,121 @@
+# session.py
+# Record and replay of play sessions for the Anime RPG
+#
+# A session log is one JSON header line with the RNG seed, then one JSON string
+# per line for every answer typed at an input() prompt. Seeding the shared RNGs
+# the same way and feeding the same answers back re-runs the session exactly.
+
+import builtins
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+from events import event_engine
+from output import NullSink, output
+from encounters import encounter_service
+
+LOG_VERSION = 1
+
+
+def seed_session(seed: int):
+    """Seed every random source the game draws from during play."""
+    random.seed(seed)
+    event_engine.rng.seed(seed + 1)
+    encounter_service.reseed(seed + 2)
+
+
+class _NullWriter:
+    """stdout replacement that drops everything, for headless replays."""
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class SessionRecorder:
+    """
+    Wraps input() so each answer is appended to the log as it is typed; a
+    crashed or interrupted session still leaves a usable log behind.
+    """
+    def __init__(self, filepath: str, seed: Optional[int] = None):
+        self.filepath = filepath
+        self.seed = seed if seed is not None else int.from_bytes(os.urandom(4), "little")
+        self._file = None
+        self._original_input: Optional[Callable] = None
+
+    def start(self):
+        seed_session(self.seed)
+        self._file = open(self.filepath, "w")
+        header = {"version": LOG_VERSION, "seed": self.seed, "hash_seed": os.environ.get("PYTHONHASHSEED")}
+        self._file.write(json.dumps(header) + "\n")
+        self._original_input = builtins.input
+        builtins.input = self._input
+
+    def _input(self, prompt: str = "") -> str:
+        answer = self._original_input(prompt)
+        self._file.write(json.dumps(answer) + "\n")
+        self._file.flush()
+        return answer
+
+    def stop(self):
+        if self._original_input:
+            builtins.input = self._original_input
+            self._original_input = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class SessionReplayer:
+    """
+    Re-executes a recorded session at full speed with output suppressed.
+    When the recorded answers run out input() raises EOFError, just like a
+    closed terminal, which ends the replay.
+    """
+    def __init__(self, filepath: str):
+        with open(filepath, "r") as f:
+            self.header = json.loads(f.readline())
+            self.inputs: List[str] = [json.loads(line) for line in f if line.strip()]
+        if self.header.get("version") != LOG_VERSION:
+            raise ValueError(f"Unsupported session log version: {self.header.get('version')}")
+        self.position = 0
+
+    def _input(self, prompt: str = "") -> str:
+        if self.position >= len(self.inputs):
+            raise EOFError("End of recorded session")
+        sys.stdout.write(prompt)
+        answer = self.inputs[self.position]
+        self.position += 1
+        return answer
+
+    def replay(self, play: Callable[[], None], quiet: bool = True) -> Dict[str, float]:
+        """Run `play` against the recorded inputs and report throughput in actions per second."""
+        if self.header.get("hash_seed") != os.environ.get("PYTHONHASHSEED"):
+            print("Warning: PYTHONHASHSEED differs from the recording; set iteration order may not match.")
+        seed_session(self.header["seed"])
+        self.position = 0
+        original_input = builtins.input
+        builtins.input = self._input
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                if quiet:
+                    # Game messages are dropped before formatting; menus still print, so stdout goes too
+                    stack.enter_context(output.use(NullSink()))
+                    stack.enter_context(contextlib.redirect_stdout(_NullWriter()))
+                play()
+        except EOFError:
+            pass
+        finally:
+            elapsed = time.perf_counter() - start
+            builtins.input = original_input
+        return {
+            "actions": self.position,
+            "seconds": elapsed,
+            "actions_per_sec": self.position / elapsed if elapsed > 0 else 0.0,
+            "completed": self.position == len(self.inputs),
+        }
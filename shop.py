@@ -6,6 +6,9 @@ from typing import List, Dict
 from items import item_registry, Item
 from character import Character
 from currency import currency_manager, Currency
+from events import event_engine
+from metrics import metrics, timed
+from output import output
 
 class ShopItem:
     def __init__(self, item_id: str, price: float, quantity: int, currency: str):
@@ -14,40 +17,54 @@ class ShopItem:
         self.quantity = quantity  # The number of items available in the shop
         self.currency = currency  # Currency used for the item price
 
-    def purchase(self, character: Character):
+    def purchase(self, character: Character, discount: float = 0.0):
         """Allow character to purchase the item if they have enough gold."""
         currency = currency_manager.get_currency(self.currency)
-        if character.get_balance(currency) >= self.price:
-            character.deduct_currency(self.currency, self.price)
-            character.add_to_inventory(self.item_id)
+        price = round(self.price * (1 - discount), 2)
+        if self.quantity <= 0:
+            output.emit("This item is sold out.", "purchase_failed", item_id=self.item_id)
+        elif character.get_balance(currency) >= price:
+            # Hand the item over first: a full inventory must not cost the player anything
+            if not character.add_item_to_inventory(self.item_id):
+                return
+            character.deduct_currency(self.currency, price)
             self.quantity -= 1
-            print(f"Purchased {item_registry.get_item(self.item_id).name} for {self.price} {currency.symbol}.")
+            metrics.inc("shop_purchases_total", currency=self.currency)
+            if output.enabled:
+                output.emit(f"Purchased {item_registry.get_item(self.item_id).name} for {price} {currency.symbol}.",
+                            "purchase", item_id=self.item_id, price=price, currency=self.currency)
         else:
-            print(f"Not enough {currency.symbol} to purchase this item.")
+            output.emit(f"Not enough {currency.symbol} to purchase this item.", "purchase_failed", item_id=self.item_id)
 
 class Shop:
     def __init__(self, name: str, stock: List[ShopItem], currency: str):
         self.name = name
         self.stock = stock
         self.currency = currency
+        self.discount = 0.0  # Fraction taken off every price (set by events)
 
     def show_stock(self):
         """Show the available stock of the shop."""
         currency = currency_manager.get_currency(self.currency)
-        print(f"{self.name}'s Shop")
-        print(f"Currency: {currency.symbol}")
-        print("--------------------")
+        if not output.enabled:
+            return
+        output.emit(f"{self.name}'s Shop")
+        output.emit(f"Currency: {currency.symbol}")
+        output.emit("--------------------")
         for item in self.stock:
             item_data = item_registry.get_item(item.item_id)
-            print(f"{item_data.name} - {item.price} {currency.symbol} (x{item.quantity})")
+            price = round(item.price * (1 - self.discount), 2)
+            output.emit(f"{item_data.name} - {price} {currency.symbol} (x{item.quantity})", "stock",
+                        item_id=item.item_id, price=price, quantity=item.quantity)
 
+    @timed("shop_purchase_seconds")
     def purchase_item(self, character: Character, item_id: str):
         """Purchase an item by item_id."""
         item = next((item for item in self.stock if item.item_id == item_id), None)
         if item:
-            item.purchase(character)
+            item.purchase(character, self.discount)
         else:
-            print("Item not found in stock.")
+            output.emit("Item not found in stock.", "purchase_failed", item_id=item_id)
 
     def restock(self):
         """Restock shop with random items."""
@@ -55,9 +72,12 @@ class Shop:
             item.quantity = random.randint(1, 5)  # Randomize stock quantity between 1-5
 
 # Example of available items in the game
-health_potion = Item(item_id="potion_health", name="Health Potion", description="Restores 50 HP.", effect="heal", value=50)
-mana_potion = Item(item_id="potion_mana", name="Mana Potion", description="Restores 30 MP.", effect="mana", value=30)
-iron_sword = Item(item_id="sword_iron", name="Iron Sword", description="A basic sword for beginners.", effect="atk", value=10)
+health_potion = Item(item_id="potion_health", name="Health Potion", description="Restores 50 HP.", item_type="consumable",
+                     rarity="Common", usable_in_battle=True, usable_outside_battle=True, value=50)
+mana_potion = Item(item_id="potion_mana", name="Mana Potion", description="Restores 30 MP.", item_type="consumable",
+                   rarity="Common", usable_in_battle=True, usable_outside_battle=True, value=30)
+iron_sword = Item(item_id="sword_iron", name="Iron Sword", description="A basic sword for beginners.", item_type="equipment",
+                  rarity="Common", usable_in_battle=False, usable_outside_battle=True, value=10)
 
 item_registry.register_item(health_potion)
 item_registry.register_item(mana_potion)
@@ -71,6 +91,7 @@ shop_items = [
 ]
 
 shop = Shop(name="Village Shop", stock=shop_items, currency="Gold")
+event_engine.register_shop(shop)
 
 # Debug Example
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+# snapshots.py
+# Copy-on-write item counts with cheap snapshots for the Anime RPG
+
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from output import output
+
+BUCKET_COUNT = 32  # Must be a power of two
+
+
+class InventorySnapshot(Mapping):
+    """
+    Read-only item counts frozen at one moment. Snapshots share every bucket
+    that has not changed since, so holding many of them costs memory only in
+    proportion to what changed between them.
+    """
+    __slots__ = ("buckets", "size")
+
+    def __init__(self, buckets: Tuple[dict, ...], size: int):
+        self.buckets = buckets
+        self.size = size
+
+    def __getitem__(self, item_id: str) -> int:
+        return self.buckets[hash(item_id) & (BUCKET_COUNT - 1)][item_id]
+
+    def get(self, item_id: str, default=None):
+        return self.buckets[hash(item_id) & (BUCKET_COUNT - 1)].get(item_id, default)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self.buckets[hash(item_id) & (BUCKET_COUNT - 1)]
+
+    def __iter__(self) -> Iterator[str]:
+        for bucket in self.buckets:
+            yield from bucket
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self):
+        return f"InventorySnapshot({self.to_dict()})"
+
+    def to_dict(self) -> Dict[str, int]:
+        data = {}
+        for bucket in self.buckets:
+            data.update(bucket)
+        return data
+
+    def changed_keys(self, other: 'InventorySnapshot') -> Set[str]:
+        """Item ids whose counts differ, only looking inside buckets that are not shared."""
+        changed = set()
+        for mine, theirs in zip(self.buckets, other.buckets):
+            if mine is theirs:
+                continue
+            for item_id in mine.keys() | theirs.keys():
+                if mine.get(item_id) != theirs.get(item_id):
+                    changed.add(item_id)
+        return changed
+
+
+class CowCounts(MutableMapping):
+    """
+    Mutable item counts split across fixed hash buckets. Taking a snapshot just
+    marks every bucket as shared; the next write to a shared bucket copies that
+    bucket only, so snapshots are O(1) and never need a deep copy.
+    """
+    __slots__ = ("_buckets", "_owned", "_size")
+
+    def __init__(self, data: Optional[Mapping] = None):
+        self._buckets: List[dict] = [{} for _ in range(BUCKET_COUNT)]
+        self._owned: List[bool] = [True] * BUCKET_COUNT
+        self._size = 0
+        if data:
+            self.update(data)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: InventorySnapshot) -> 'CowCounts':
+        counts = cls()
+        counts._buckets = list(snapshot.buckets)
+        counts._owned = [False] * BUCKET_COUNT
+        counts._size = snapshot.size
+        return counts
+
+    def _writable(self, item_id: str) -> dict:
+        idx = hash(item_id) & (BUCKET_COUNT - 1)
+        if not self._owned[idx]:
+            self._buckets[idx] = dict(self._buckets[idx])
+            self._owned[idx] = True
+        return self._buckets[idx]
+
+    def __getitem__(self, item_id: str) -> int:
+        return self._buckets[hash(item_id) & (BUCKET_COUNT - 1)][item_id]
+
+    def get(self, item_id: str, default=None):
+        return self._buckets[hash(item_id) & (BUCKET_COUNT - 1)].get(item_id, default)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._buckets[hash(item_id) & (BUCKET_COUNT - 1)]
+
+    def __setitem__(self, item_id: str, quantity: int):
+        bucket = self._writable(item_id)
+        if item_id not in bucket:
+            self._size += 1
+        bucket[item_id] = quantity
+
+    def __delitem__(self, item_id: str):
+        bucket = self._writable(item_id)
+        del bucket[item_id]
+        self._size -= 1
+
+    def __iter__(self) -> Iterator[str]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self):
+        return repr(self.snapshot().to_dict())
+
+    def snapshot(self) -> InventorySnapshot:
+        self._owned = [False] * BUCKET_COUNT
+        return InventorySnapshot(tuple(self._buckets), self._size)
+
+
+class UndoHistory:
+    """
+    Bounded stack of inventory snapshots, e.g. one per crafting action.
+    """
+    def __init__(self, inventory_manager, limit: int = 50):
+        self.inventory_manager = inventory_manager
+        self.limit = limit
+        self.snapshots: List[InventorySnapshot] = []
+
+    def checkpoint(self):
+        self.snapshots.append(self.inventory_manager.snapshot())
+        if len(self.snapshots) > self.limit:
+            self.snapshots.pop(0)
+
+    def discard(self):
+        """Drop the latest checkpoint, e.g. when the action it guarded failed."""
+        if self.snapshots:
+            self.snapshots.pop()
+
+    def undo(self) -> bool:
+        if not self.snapshots:
+            output.emit("Nothing to undo.")
+            return False
+        self.inventory_manager.restore(self.snapshots.pop())
+        return True
@@ -1,46 +1,62 @@
 # villagers.py
 # Enhanced Villager system with more interactivity for Anime RPG
 
-from typing import List, Dict, Optional
-from quests import QuestDatabase, Quest
+import sys
+from typing import Callable, List, Dict, Optional, Tuple
+from quests import QuestDatabase, Quest, quest_db
 from character import Character
-from world import Village
+from dialogue import DialogueContext, dialogue_registry
+from schedule import NPCScheduler, game_clock, npc_scheduler
+from events import event_engine
+from output import output
 from random import choice, randint
 import time
 
 class Villager:
+    __slots__ = ("villager_id", "name", "role", "dialogue", "quest_id", "items_for_sale",
+                 "event_trigger", "dialogue_graph", "village", "last_interacted")
+
     def __init__(self, name: str, role: str, dialogue: List[str], quest_id: Optional[str] = None,
-                 items_for_sale: Optional[List[str]] = None, event_trigger: Optional[str] = None):
+                 items_for_sale: Optional[List[str]] = None, event_trigger: Optional[str] = None,
+                 dialogue_graph: Optional[str] = None, village: Optional[str] = None):
         """
         Represents a villager NPC in the village.
         """
+        self.villager_id = -1  # Stable id assigned by the VillagerManager
         self.name = name
-        self.role = role  # Role of the villager (e.g., blacksmith, healer, merchant)
+        self.role = sys.intern(role)  # Role of the villager (e.g., blacksmith, healer, merchant)
         self.dialogue = dialogue  # List of dialogue lines
         self.quest_id = quest_id  # Optional quest associated with the villager (if any)
         self.items_for_sale = items_for_sale or []  # Items the villager might sell
         self.event_trigger = event_trigger  # Optional event that triggers a special interaction (e.g., a special sale)
+        self.dialogue_graph = dialogue_graph  # Optional shared dialogue graph id (see dialogue.py)
+        self.village = village  # Name of the village the villager lives in
         self.last_interacted = None  # Track the last time the player interacted
 
     def interact(self, player: Character):
         """Interact with the villager. Display random dialogue and potential quests."""
-        print(f"\nTalking to {self.name} the {self.role}:")
-        current_time = time.localtime()
-        current_hour = current_time.tm_hour
+        output.emit(f"\nTalking to {self.name} the {self.role}:", "talk", villager=self.name, role=self.role)
+        # Read the simulated clock and the NPC's precomputed schedule state
+        current_hour = game_clock.hour
+        if npc_scheduler.current_activity(self.villager_id) == "rest":
+            output.emit(f"({self.name} looks sleepy, but still has a word for you.)")
 
+        graph = dialogue_registry.get_graph(self.dialogue_graph) if self.dialogue_graph else None
+        # Branching dialogue picks its own line from the compiled conditions; plain lines if none apply
+        line = graph.opening_line(DialogueContext.for_interaction(self, player, current_hour)) if graph else None
+        if line is not None:
+            output.emit(line, "dialogue", villager=self.name)
         # Time-dependent dialogue (e.g., morning, afternoon, night)
-        if 6 <= current_hour < 12:
-            print(choice(self.dialogue) + " Good morning!")
+        elif 6 <= current_hour < 12:
+            output.emit(choice(self.dialogue) + " Good morning!", "dialogue", villager=self.name)
         elif 12 <= current_hour < 18:
-            print(choice(self.dialogue) + " Good afternoon!")
+            output.emit(choice(self.dialogue) + " Good afternoon!", "dialogue", villager=self.name)
         else:
-            print(choice(self.dialogue) + " Good evening!")
+            output.emit(choice(self.dialogue) + " Good evening!", "dialogue", villager=self.name)
 
-        # Event-triggered interaction (special offer or event)
-        if self.event_trigger:
-            if randint(1, 10) > 8:  # Random chance for event trigger
-                print(f"**{self.name} has a special offer today!**")
-                self.trigger_event(player)
+        # Event-triggered interaction (odds, cooldowns and effects come from events.EVENT_RULES)
+        event_engine.tick()
+        event_engine.evaluate(self, player)
 
         if self.quest_id:
             self.give_quest(player)
@@ -50,55 +66,141 @@ class Villager:
         if self.quest_id:
             quest = quest_db.get_quest(self.quest_id)
             if quest and not quest.is_completed:
-                print(f"{self.name} has given you the quest '{quest.title}'!")
+                output.emit(f"{self.name} has given you the quest '{quest.title}'!", "quest_given", villager=self.name,
+                            quest_id=quest.quest_id)
                 quest.display_quest_info()
                 player.add_quest(quest)
             else:
-                print(f"{self.name} has no active quests for you right now.")
+                output.emit(f"{self.name} has no active quests for you right now.")
         else:
-            print(f"{self.name} has no quest for you right now.")
+            output.emit(f"{self.name} has no quest for you right now.")
 
     def trade(self, player: Character):
         """Allow the player to trade items with the villager."""
         if self.items_for_sale:
-            print(f"{self.name} is offering the following items for sale:")
+            output.emit(f"{self.name} is offering the following items for sale:")
             for item in self.items_for_sale:
-                print(f"- {item}")
+                output.emit(f"- {item}", "for_sale", villager=self.name, item_id=item)
             # Offer a trade interaction (just a simple example)
-            item_to_buy = input(f"Would you like to buy an item from {self.name}? Enter item name or 'exit' to cancel: ")
+            item_to_buy = output.prompt(f"Would you like to buy an item from {self.name}? Enter item name or 'exit' to cancel: ")
             if item_to_buy in self.items_for_sale:
-                print(f"You bought {item_to_buy} from {self.name}.")
+                output.emit(f"You bought {item_to_buy} from {self.name}.", "purchase", villager=self.name, item_id=item_to_buy)
                 player.add_item_to_inventory(item_to_buy)
             else:
-                print(f"Item not available. Try again later or choose 'exit'.")
+                output.emit(f"Item not available. Try again later or choose 'exit'.")
         else:
-            print(f"{self.name} has no items for sale at the moment.")
+            output.emit(f"{self.name} has no items for sale at the moment.")
 
     def trigger_event(self, player: Character):
         """Trigger special events based on the villager's state or time."""
-        if self.event_trigger == "special_sale":
-            print(f"{self.name} is holding a special sale! All items are discounted.")
-            self.trade(player)
-        elif self.event_trigger == "hidden_secret":
-            print(f"{self.name} whispers: 'I have a hidden secret for you... investigate the old tree in the forest.'")
-        else:
-            print(f"{self.name} seems to be quiet today.")
+        if not event_engine.evaluate(self, player, force=True):
+            output.emit(f"{self.name} seems to be quiet today.")
 
     def update_last_interacted(self):
         """Updates the last interaction time."""
         self.last_interacted = time.time()
 
 class VillagerManager:
-    def __init__(self):
-        self.villagers: Dict[str, Villager] = {}
+    """
+    Single store for every villager. Villagers get stable integer ids and are
+    indexed by name, village, role, (village, role) and event trigger, so each
+    lookup only touches the villagers it returns. Names must be unique, since
+    chats and interactions look villagers up by name.
+    """
+    def __init__(self, scheduler: Optional[NPCScheduler] = None):
+        self.villagers: Dict[int, Villager] = {}
+        self.next_id = 0
+        self._by_name: Dict[str, int] = {}
+        self._by_village: Dict[Optional[str], Dict[int, Villager]] = {}
+        self._by_role: Dict[str, Dict[int, Villager]] = {}
+        self._by_village_role: Dict[Tuple[Optional[str], str], Dict[int, Villager]] = {}
+        self._by_event: Dict[str, Dict[int, Villager]] = {}
+        self.scheduler = scheduler  # Optional NPC schedule simulation
+        self.listeners: List[Callable[[Villager, Optional[str], str], None]] = []  # (villager, old, new) on moves
+        if scheduler:
+            scheduler.on_arrival = self.move_villager
+
+    def _index_keys(self, villager: Villager):
+        yield self._by_village, villager.village
+        yield self._by_role, villager.role
+        yield self._by_village_role, (villager.village, villager.role)
+        if villager.event_trigger:
+            yield self._by_event, villager.event_trigger
+
+    def _index(self, villager: Villager):
+        for index, key in self._index_keys(villager):
+            index.setdefault(key, {})[villager.villager_id] = villager
+
+    def _unindex(self, villager: Villager):
+        for index, key in self._index_keys(villager):
+            bucket = index[key]
+            del bucket[villager.villager_id]
+            if not bucket:
+                del index[key]
+
+    def add_villager(self, villager: Villager, village: Optional[str] = None) -> int:
+        """Add a villager to the system and return its id. Raises ValueError if another villager has its name."""
+        existing = self.get_villager(villager.name)
+        if existing is not None and existing is not villager:
+            raise ValueError(f"A villager named {villager.name!r} already exists")
+        if existing is villager:
+            self.remove_villager(villager.villager_id)
+        if village is not None:
+            villager.village = village
+        if villager.villager_id < 0:
+            villager.villager_id = self.next_id
+            self.next_id += 1
+        self.villagers[villager.villager_id] = villager
+        self._by_name[villager.name] = villager.villager_id
+        self._index(villager)
+        if self.scheduler:
+            self.scheduler.add_npc(villager.villager_id, villager.role)
+        return villager.villager_id
+
+    def remove_villager(self, villager_id: int):
+        """Remove a villager and drop it from every index."""
+        villager = self.villagers.pop(villager_id, None)
+        if not villager:
+            return
+        del self._by_name[villager.name]
+        self._unindex(villager)
+        if self.scheduler:
+            self.scheduler.remove_npc(villager_id)
 
-    def add_villager(self, villager: Villager):
-        """Add a villager to the system."""
-        self.villagers[villager.name] = villager
+    def move_villager(self, villager_id: int, village: str):
+        """
+        Move a villager to another village, keeping its id and schedule.
+        Listeners (VillageManager) move it between the villages' own lists.
+        """
+        villager = self.villagers[villager_id]
+        old_village = villager.village
+        if old_village == village:
+            return
+        self._unindex(villager)
+        villager.village = village
+        self._index(villager)
+        for listener in self.listeners:
+            listener(villager, old_village, village)
 
     def get_villager(self, name: str) -> Optional[Villager]:
         """Get a villager by name."""
-        return self.villagers.get(name)
+        villager_id = self._by_name.get(name)
+        return self.villagers.get(villager_id) if villager_id is not None else None
+
+    def get_villager_by_id(self, villager_id: int) -> Optional[Villager]:
+        return self.villagers.get(villager_id)
+
+    def get_villagers_in_village(self, village: str, role: Optional[str] = None) -> List[Villager]:
+        """All villagers in a village, optionally only those with a given role."""
+        if role is not None:
+            return list(self._by_village_role.get((village, role), {}).values())
+        return list(self._by_village.get(village, {}).values())
+
+    def get_villagers_by_role(self, role: str) -> List[Villager]:
+        return list(self._by_role.get(role, {}).values())
+
+    def get_villagers_by_event(self, event_trigger: str) -> List[Villager]:
+        return list(self._by_event.get(event_trigger, {}).values())
 
     def interact_with_villager(self, player: Character, villager_name: str):
         """Let the player interact with a villager."""
@@ -110,7 +212,10 @@ class VillagerManager:
             if villager.role == "Merchant":
                 villager.trade(player)
         else:
-            print(f"{villager_name} is not a valid villager.")
+            output.emit(f"{villager_name} is not a valid villager.")
+
+# Villager Manager instance
+villager_manager = VillagerManager(npc_scheduler)
 
 # Sample villagers with advanced interactions
 def create_sample_villagers():
@@ -144,7 +249,7 @@ if __name__ == "__main__":
     player = Player("Kai")
     
     # Setup villagers
-    villager_manager = VillagerManager()
+    villager_manager = VillagerManager(npc_scheduler)
     create_sample_villagers()
 
     # Interactions
@@ -7,31 +7,11 @@ from character import *
 from currency import *
 from world import *
 from random import *
+from villagers import Villager, villager_manager
+from output import output
 
 
 
-class Villager:
-    def __init__(self, name: str, role: str, dialogue: List[str], quest_id: Optional[str] = None):
-        """
-        Represents a villager NPC in the village.
-        """
-        self.name = name
-        self.role = role  # Role of the villager (e.g., blacksmith, healer, merchant)
-        self.dialogue = dialogue  # List of dialogue lines
-        self.quest_id = quest_id  # Optional quest associated with the villager (if any)
-
-    def interact(self):
-        """Interact with the villager. Display random dialogue."""
-        print(f"Talking to {self.name} the {self.role}:")
-        print(choice(self.dialogue))
-        if self.quest_id:
-            print(f"{self.name} offers you a quest!")
-            quest = quest_db.get_quest(self.quest_id)
-            if quest and not quest.is_completed:
-                quest.display_quest_info()
-            else:
-                print(f"Quest {self.quest_id} already completed or unavailable.")
-
 class Village:
     def __init__(self, name: str, region: str, population: int, currency: str, villagers: List[Villager], quests: List[str]):
         """
@@ -42,66 +22,119 @@ class Village:
         self.population = population
         self.currency = currency  # Currency used in the village
         self.villagers = villagers  # List of villagers (NPCs)
+        for villager in villagers:
+            villager.village = name
         self.quests = quests  # List of quest IDs that are available in the village
         self.merchants = []  # Merchants that may sell items in the village
+        self.shop: Optional[dict] = None  # Shop data: name, currency and stock rows of item_id/price/quantity/currency
 
     def show_village_info(self):
         """Display the information about the village."""
-        print(f"\nVillage: {self.name}")
-        print(f"Region: {self.region}")
-        print(f"Population: {self.population}")
-        print(f"Currency: {self.currency}")
-        print("Villagers:")
+        output.emit(f"\nVillage: {self.name}")
+        output.emit(f"Region: {self.region}")
+        output.emit(f"Population: {self.population}")
+        output.emit(f"Currency: {self.currency}")
+        output.emit("Villagers:")
         for villager in self.villagers:
-            print(f"- {villager.name}, {villager.role}")
-        print("Available Quests:")
+            output.emit(f"- {villager.name}, {villager.role}")
+        output.emit("Available Quests:")
         for quest_id in self.quests:
             quest = quest_db.get_quest(quest_id)
             if quest:
-                print(f"- {quest.title} ({'Completed' if quest.is_completed else 'In Progress'})")
+                output.emit(f"- {quest.title} ({'Completed' if quest.is_completed else 'In Progress'})")
             else:
-                print(f"- Quest {quest_id} not found.")
+                output.emit(f"- Quest {quest_id} not found.")
 
     def add_merchant(self, merchant_name: str, items_for_sale: List[str]):
         """Add a merchant to the village."""
         self.merchants.append((merchant_name, items_for_sale))
-        print(f"Merchant {merchant_name} has arrived in {self.name}!")
+        output.emit(f"Merchant {merchant_name} has arrived in {self.name}!", "merchant_arrived", merchant=merchant_name,
+                    village=self.name)
 
     def interact_with_villager(self, player: Character, villager_name: str):
         """Allow the player to interact with a villager."""
         villager = next((v for v in self.villagers if v.name == villager_name), None)
         if villager:
-            villager.interact()
+            villager.interact(player)
             if villager.quest_id and not quest_db.get_quest(villager.quest_id).is_completed:
                 quest_db.complete_quest(player, villager.quest_id)
         else:
-            print(f"{villager_name} is not in the village.")
+            output.emit(f"{villager_name} is not in the village.")
+
+    def to_dict(self) -> dict:
+        """Serialize the village, e.g. for writing a world chunk to disk."""
+        return {
+            'name': self.name,
+            'region': self.region,
+            'population': self.population,
+            'currency': self.currency,
+            'villagers': [
+                {'name': v.name, 'role': v.role, 'dialogue': v.dialogue, 'quest_id': v.quest_id,
+                 'items_for_sale': v.items_for_sale, 'event_trigger': v.event_trigger,
+                 'dialogue_graph': v.dialogue_graph}
+                for v in self.villagers
+            ],
+            'quests': self.quests,
+            'merchants': [[name, items] for name, items in self.merchants],
+            'shop': self.shop,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Village':
+        """Rebuild a village from to_dict() output."""
+        village = cls(
+            name=data['name'],
+            region=data['region'],
+            population=data['population'],
+            currency=data['currency'],
+            villagers=[Villager(**v) for v in data['villagers']],
+            quests=data['quests'],
+        )
+        village.merchants = [(name, items) for name, items in data.get('merchants', [])]
+        village.shop = data.get('shop')
+        return village
 
     def show_merchant_items(self, villager_name: str):
         """Show the items available for purchase by a merchant in the village."""
         for merchant, items in self.merchants:
-            print(f"\n{merchant}'s Items:")
+            output.emit(f"\n{merchant}'s Items:")
             for item in items:
-                print(f"- {item}")
+                output.emit(f"- {item}")
 
 # Village System
 class VillageManager:
     def __init__(self):
         self.villages: Dict[str, Village] = {}
+        villager_manager.listeners.append(self.on_villager_moved)
 
     def add_village(self, village: Village):
         """Add a village to the world."""
         self.villages[village.name] = village
+        for villager in village.villagers:
+            villager_manager.add_villager(villager, village.name)
+
+    def on_villager_moved(self, villager: Villager, old_village: Optional[str], new_village: str):
+        """Keep each village's own villager list in step with VillagerManager.move_villager."""
+        old = self.villages.get(old_village)
+        if old and villager in old.villagers:
+            old.villagers.remove(villager)
+        new = self.villages.get(new_village)
+        if new and villager not in new.villagers:
+            new.villagers.append(villager)
 
     def get_village(self, village_name: str) -> Optional[Village]:
         """Get a village by name."""
         return self.villages.get(village_name)
 
+    def get_all_villages(self) -> List[Village]:
+        """Get every village in the world."""
+        return list(self.villages.values())
+
     def list_villages(self):
         """List all villages in the world."""
-        print("Villages in the world:")
+        output.emit("Villages in the world:")
         for village in self.villages.values():
-            print(f"- {village.name} in {village.region} region")
+            output.emit(f"- {village.name} in {village.region} region")
 
 # Sample Villages and NPCs
 def create_sample_villages():
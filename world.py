@@ -0,0 +1,248 @@
+# world.py
+# World map with regions, villages and encounter zones for the Anime RPG
+
+import math
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Rect = Tuple[float, float, float, float]  # (min_x, min_y, max_x, max_y)
+
+
+class SpatialGrid:
+    """
+    Uniform grid index over named points. Queries only visit the cells that
+    can contain an answer, so cost depends on local density, not world size.
+    """
+    def __init__(self, cell_size: float = 64.0):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[str]] = {}
+        self.positions: Dict[str, Tuple[float, float]] = {}
+        self._bounds: Optional[List[int]] = None  # occupied cell range [min_cx, min_cy, max_cx, max_cy]
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def insert(self, key: str, x: float, y: float):
+        if key in self.positions:
+            self.remove(key)
+        cx, cy = self._cell(x, y)
+        self.cells.setdefault((cx, cy), []).append(key)
+        self.positions[key] = (x, y)
+        if self._bounds is None:
+            self._bounds = [cx, cy, cx, cy]
+        else:
+            b = self._bounds
+            b[0], b[1], b[2], b[3] = min(b[0], cx), min(b[1], cy), max(b[2], cx), max(b[3], cy)
+
+    def remove(self, key: str):
+        position = self.positions.pop(key, None)
+        if position is None:
+            return
+        cell = self._cell(*position)
+        bucket = self.cells[cell]
+        bucket.remove(key)
+        if not bucket:
+            del self.cells[cell]
+
+    def within_radius(self, x: float, y: float, radius: float) -> List[str]:
+        """All keys within radius of (x, y)."""
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+        r2 = radius * radius
+        found = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for key in self.cells.get((cx, cy), ()):
+                    px, py = self.positions[key]
+                    if (px - x) ** 2 + (py - y) ** 2 <= r2:
+                        found.append(key)
+        return found
+
+    def _ring(self, cx: int, cy: int, r: int) -> Iterator[Tuple[int, int]]:
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def nearest(self, x: float, y: float) -> Optional[str]:
+        """The key closest to (x, y), searching outward ring by ring."""
+        if not self.positions:
+            return None
+        cx, cy = self._cell(x, y)
+        b = self._bounds
+        max_ring = max(abs(cx - b[0]), abs(cx - b[2]), abs(cy - b[1]), abs(cy - b[3]))
+        # Rings closer than the occupied bounds are empty, so skip straight to them
+        min_ring = max(b[0] - cx, cx - b[2], b[1] - cy, cy - b[3], 0)
+        best_key, best_d2 = None, math.inf
+        for r in range(min_ring, max_ring + 1):
+            # Everything in ring r and beyond is at least r - 1 cells away
+            if best_key is not None and r > 0 and best_d2 <= ((r - 1) * self.cell_size) ** 2:
+                break
+            for cell in self._ring(cx, cy, r):
+                for key in self.cells.get(cell, ()):
+                    px, py = self.positions[key]
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 < best_d2:
+                        best_key, best_d2 = key, d2
+        return best_key
+
+
+class RectIndex:
+    """
+    Grid index over named rectangles, used for regions and encounter zones.
+    """
+    def __init__(self, cell_size: float = 64.0):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[str]] = {}
+        self.rects: Dict[str, Rect] = {}
+
+    def _cell_range(self, rect: Rect):
+        size = self.cell_size
+        return (range(int(math.floor(rect[0] / size)), int(math.floor(rect[2] / size)) + 1),
+                range(int(math.floor(rect[1] / size)), int(math.floor(rect[3] / size)) + 1))
+
+    def insert(self, key: str, rect: Rect):
+        self.rects[key] = rect
+        xs, ys = self._cell_range(rect)
+        for cx in xs:
+            for cy in ys:
+                self.cells.setdefault((cx, cy), []).append(key)
+
+    def at_point(self, x: float, y: float) -> List[str]:
+        """All rectangles containing (x, y)."""
+        cell = (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+        return [key for key in self.cells.get(cell, ())
+                if self.rects[key][0] <= x <= self.rects[key][2] and self.rects[key][1] <= y <= self.rects[key][3]]
+
+
+class Region:
+    """A named area of the world map."""
+    def __init__(self, name: str, bounds: Rect):
+        self.name = name
+        self.bounds = bounds
+
+
+class EncounterZone:
+    """An area where enemies can be encountered while exploring."""
+    def __init__(self, zone_id: str, name: str, region: str, bounds: Rect):
+        self.zone_id = zone_id
+        self.name = name
+        self.region = region
+        self.bounds = bounds
+
+
+class World:
+    """
+    The world map. Villages are placed at points, regions and encounter zones cover rectangles.
+
+    Villages added with add_village stay resident. A large generated world can
+    be attached as a chunks.ChunkManager instead: its villages are streamed in
+    around the player as move_player is called, and every village query
+    covers both.
+    """
+    def __init__(self, cell_size: float = 64.0):
+        self.regions: Dict[str, Region] = {}
+        self.villages: Dict[str, object] = {}  # name: Village
+        self.encounter_zones: Dict[str, EncounterZone] = {}
+        self.village_index = SpatialGrid(cell_size)
+        self.region_index = RectIndex(cell_size)
+        self.zone_index = RectIndex(cell_size)
+        self.player_position: Tuple[float, float] = (0.0, 0.0)
+        self.chunks = None  # Optional chunks.ChunkManager streaming generated villages
+
+    def attach_chunks(self, chunks):
+        """Stream villages from a ChunkManager, starting with the chunks around the player."""
+        self.chunks = chunks
+        chunks.update_player_position(*self.player_position)
+
+    def move_player(self, x: float, y: float):
+        self.player_position = (x, y)
+        if self.chunks:
+            self.chunks.update_player_position(x, y)
+
+    def add_region(self, region: Region):
+        self.regions[region.name] = region
+        self.region_index.insert(region.name, region.bounds)
+
+    def add_village(self, village, x: float, y: float):
+        """Place a village on the map."""
+        self.villages[village.name] = village
+        self.village_index.insert(village.name, x, y)
+
+    def add_encounter_zone(self, zone: EncounterZone):
+        self.encounter_zones[zone.zone_id] = zone
+        self.zone_index.insert(zone.zone_id, zone.bounds)
+
+    def get_village_position(self, village_name: str) -> Optional[Tuple[float, float]]:
+        position = self.village_index.positions.get(village_name)
+        if position is None and self.chunks:
+            placed = self.chunks.find_village(village_name)
+            if placed:
+                position = placed[1], placed[2]
+        return position
+
+    def nearest_village(self, x: float, y: float):
+        name = self.village_index.nearest(x, y)
+        if not self.chunks:
+            return self.villages[name] if name else None
+        placed = self.chunks.nearest_village(x, y)
+        if name and (placed is None or math.dist(self.village_index.positions[name], (x, y))
+                     <= math.dist(placed[1:], (x, y))):
+            return self.villages[name]
+        return placed[0] if placed else None
+
+    def villages_in_radius(self, x: float, y: float, radius: float) -> List:
+        found = [self.villages[name] for name in self.village_index.within_radius(x, y, radius)]
+        if self.chunks:
+            found.extend(village for village, _, _ in self.chunks.villages_in_radius(x, y, radius))
+        return found
+
+    def region_at(self, x: float, y: float) -> Optional[Region]:
+        names = self.region_index.at_point(x, y)
+        return self.regions[names[0]] if names else None
+
+    def encounter_zone_at(self, x: float, y: float) -> Optional[EncounterZone]:
+        zone_ids = self.zone_index.at_point(x, y)
+        return self.encounter_zones[zone_ids[0]] if zone_ids else None
+
+# Sample world layout for the sample villages
+def create_sample_world(world: World, village_manager):
+    world.add_region(Region("Forest of Shadows", (0, 0, 500, 500)))
+    world.add_region(Region("Crystal Mountain", (500, 0, 1000, 500)))
+    world.add_encounter_zone(EncounterZone("dark_woods", "Dark Woods", "Forest of Shadows", (150, 150, 400, 400)))
+    world.add_encounter_zone(EncounterZone("dragon_peak", "Dragon Peak", "Crystal Mountain", (800, 50, 950, 250)))
+
+    layout = {"Stonebrook": (100, 120), "Crystal Haven": (700, 300)}
+    for name, (x, y) in layout.items():
+        village = village_manager.get_village(name)
+        if village:
+            world.add_village(village, x, y)
+
+# Debug Example
+if __name__ == "__main__":
+    import random
+    import time
+
+    class _Place:
+        def __init__(self, name):
+            self.name = name
+
+    world = World()
+    random.seed(1)
+    start = time.perf_counter()
+    for i in range(100_000):
+        world.add_village(_Place(f"village_{i}"), random.uniform(0, 20_000), random.uniform(0, 20_000))
+    print(f"Placed 100k villages in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        world.nearest_village(random.uniform(0, 20_000), random.uniform(0, 20_000))
+    print(f"10k nearest-village queries in {time.perf_counter() - start:.3f}s")
+    print("Villages within 200 of the center:", len(world.villages_in_radius(10_000, 10_000, 200)))